@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Warm benchmark worker for trigger_server.py (BENCHMARK_WORKER_MODE=warm)
+
+Imports benchmark_model.py's dependencies once, then runs benchmark jobs sent
+by the server over a Unix socket, one at a time. Each request carries the
+job's argv plus its stdout/stderr pipes, so output streams exactly as it does
+from a fresh subprocess. A job that crashes the interpreter only takes this
+worker down; the server replaces it.
+
+Standard library only: the worker runs under the benchmark's interpreter, not
+the server's.
+"""
+
+import argparse
+import ast
+import importlib
+import importlib.util
+import json
+import os
+import runpy
+import signal
+import socket
+import sys
+import traceback
+
+
+def _calls_main(node):
+    """True for `main()`, `sys.exit(main())` or `exit(main())`"""
+    if not isinstance(node, ast.Expr) or not isinstance(node.value, ast.Call):
+        return False
+    call = node.value
+    if isinstance(call.func, ast.Name) and call.func.id == "main":
+        return not call.args
+    exit_names = ("exit", "sys.exit")
+    return ast.unparse(call.func) in exit_names and len(call.args) == 1 and _calls_main(ast.Expr(call.args[0]))
+
+
+def preload(script):
+    """Import the script's top-level dependencies; return the script itself as a module when
+    its `if __name__ == "__main__":` block only calls main(), so jobs can call main() directly"""
+    with open(script) as f:
+        tree = ast.parse(f.read(), script)
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            names = [node.module]
+        else:
+            continue
+        for name in names:
+            try:
+                importlib.import_module(name)
+            except Exception as e:
+                print(f"benchmark worker: could not preload {name}: {e}", file=sys.stderr)
+
+    has_main = any(isinstance(node, ast.FunctionDef) and node.name == "main" for node in tree.body)
+    guards = [
+        node for node in tree.body
+        if isinstance(node, ast.If) and "__main__" in ast.unparse(node.test)
+    ]
+    if not has_main or len(guards) != 1 or len(guards[0].body) != 1 or not _calls_main(guards[0].body[0]):
+        return None
+    try:
+        spec = importlib.util.spec_from_file_location("benchmark_model", script)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[spec.name] = module
+        spec.loader.exec_module(module)
+        return module
+    except BaseException:
+        print("benchmark worker: importing the benchmark script failed, jobs will run it as a script", file=sys.stderr)
+        traceback.print_exc()
+        sys.modules.pop("benchmark_model", None)
+        return None
+
+
+def _exit_status(code):
+    """Map a SystemExit code to a process return code the way the interpreter does"""
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    print(code, file=sys.stderr)
+    return 1
+
+
+def run_job(module, request, fds):
+    """Run one job with fds 1/2 pointed at its pipes; returns its exit code"""
+    out_fd, err_fd = fds
+    sys.stdout.flush()
+    sys.stderr.flush()
+    saved = (os.dup(1), os.dup(2))
+    os.dup2(out_fd, 1)
+    os.dup2(err_fd, 2)
+    os.close(out_fd)
+    os.close(err_fd)
+    previous_cwd = os.getcwd()
+    try:
+        os.chdir(request["cwd"])
+        argv = request["argv"]
+        sys.argv = list(argv)
+        try:
+            if module is not None and os.path.abspath(argv[0]) == os.path.abspath(module.__file__):
+                returncode = _exit_status(module.main())
+            else:
+                runpy.run_path(argv[0], run_name="__main__")
+                returncode = 0
+        except SystemExit as e:
+            returncode = _exit_status(e.code)
+        except BaseException:
+            traceback.print_exc()
+            returncode = 1
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        # Restoring fds 1/2 drops the last write ends, so the server sees EOF
+        os.dup2(saved[0], 1)
+        os.dup2(saved[1], 2)
+        os.close(saved[0])
+        os.close(saved[1])
+        os.chdir(previous_cwd)
+    return returncode
+
+
+def serve(sock, script):
+    module = preload(script)
+    while True:
+        try:
+            message, fds, _, _ = socket.recv_fds(sock, 65536, 2)
+        except OSError:
+            break
+        if not message:
+            break  # the server closed our socket: retire
+        returncode = run_job(module, json.loads(message), fds)
+        sock.send(json.dumps({"returncode": returncode}).encode())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fd", type=int, required=True, help="inherited Unix socket connected to the server")
+    parser.add_argument("script", help="benchmark script to preload")
+    args = parser.parse_args()
+
+    # Ctrl-C reaches the whole process group; the server decides when workers stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    sys.stdout.reconfigure(line_buffering=True)  # stream job output as lines are printed
+    # Same import path a fresh `python benchmark_model.py` would have
+    sys.path[0] = os.path.dirname(os.path.abspath(args.script))
+    serve(socket.socket(fileno=args.fd), args.script)
+
+
+if __name__ == "__main__":
+    main()
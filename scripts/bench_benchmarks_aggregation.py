@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Benchmark /api/benchmarks aggregation: six per-widget queries vs one grouped pass
+Seeds a synthetic benchmark_results TEMP table (shadows the real one for this session only)
+
+Usage: DB_HOST=... python scripts/bench_benchmarks_aggregation.py --rows 2000000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from trigger_server import (  # noqa: E402
+    aggregate_benchmarks,
+    fetch_benchmark_groups,
+    get_db_connection,
+)
+
+# The six queries /api/benchmarks ran before the single-pass aggregation
+LEGACY_QUERIES = {
+    "summary": """
+        SELECT COUNT(*), COUNT(DISTINCT model_name), COUNT(DISTINCT role_type)
+        FROM benchmark_results WHERE {where_sql}
+    """,
+    "speed_champion": """
+        SELECT model_name, AVG(response_time) as avg_time FROM benchmark_results
+        WHERE {where_sql} GROUP BY model_name ORDER BY avg_time ASC LIMIT 1
+    """,
+    "quality_champion": """
+        SELECT model_name, AVG(quality_score) as avg_score FROM benchmark_results
+        WHERE {where_sql} GROUP BY model_name ORDER BY avg_score DESC LIMIT 1
+    """,
+    "matrix": """
+        WITH role_performance AS (
+            SELECT role_type, model_name, AVG(quality_score) as avg_score,
+                   AVG(response_time) as avg_time, COUNT(*) as test_count
+            FROM benchmark_results WHERE {where_sql} GROUP BY role_type, model_name
+        ),
+        best_per_role AS (
+            SELECT DISTINCT ON (role_type) role_type, model_name, avg_score, avg_time, test_count
+            FROM role_performance ORDER BY role_type, avg_score DESC
+        )
+        SELECT role_type, model_name, ROUND(avg_score::numeric, 1), ROUND(avg_time::numeric, 1), test_count
+        FROM best_per_role ORDER BY avg_score DESC
+    """,
+    "response_times": """
+        SELECT model_name, AVG(response_time) as avg_time FROM benchmark_results
+        WHERE {where_sql} GROUP BY model_name ORDER BY avg_time ASC
+    """,
+    "quality_distribution": """
+        SELECT model_name, AVG(quality_score) as avg_score FROM benchmark_results
+        WHERE {where_sql} GROUP BY model_name ORDER BY avg_score DESC
+    """,
+}
+
+FILTERS = {
+    "all": ("success = true", []),
+    "two models": ("success = true AND model_name IN (%s,%s)", ["model-1", "model-2"]),
+    "score band": ("success = true AND quality_score >= %s AND quality_score <= %s", [6.0, 9.0]),
+}
+
+
+def seed(cur, rows, models, roles):
+    """Create and fill the session-local synthetic table"""
+    cur.execute("""
+        CREATE TEMP TABLE benchmark_results (
+            id BIGSERIAL PRIMARY KEY,
+            model_name TEXT,
+            role_type TEXT,
+            quality_score DOUBLE PRECISION,
+            response_time DOUBLE PRECISION,
+            success BOOLEAN,
+            timestamp TIMESTAMP
+        )
+    """)
+    cur.execute("""
+        INSERT INTO benchmark_results (model_name, role_type, quality_score, response_time, success, timestamp)
+        SELECT
+            'model-' || (g %% %s),
+            'role-' || ((g / %s) %% %s),
+            4 + random() * 6,
+            1 + random() * 60,
+            random() > 0.1,
+            NOW() - random() * INTERVAL '90 days'
+        FROM generate_series(1, %s) g
+    """, (models, models, roles, rows))
+    cur.execute("ANALYZE benchmark_results")
+
+
+def run_legacy(cur, where_sql, params):
+    results = {}
+    for name, sql in LEGACY_QUERIES.items():
+        cur.execute(sql.format(where_sql=where_sql), params)
+        results[name] = cur.fetchall()
+    return results
+
+
+def legacy_to_response(results):
+    """Shape the legacy query results like aggregate_benchmarks() output"""
+    summary_row = results["summary"][0]
+    speed = results["speed_champion"][0] if results["speed_champion"] else None
+    quality = results["quality_champion"][0] if results["quality_champion"] else None
+    summary = {
+        "totalTests": summary_row[0],
+        "models": summary_row[1],
+        "roles": summary_row[2],
+        "speedChampion": {"model": speed[0], "time": round(float(speed[1]), 1)} if speed else None,
+        "qualityChampion": {"model": quality[0], "score": round(float(quality[1]), 1)} if quality else None,
+    }
+    matrix = [
+        {"task": r[0], "model": r[1], "score": float(r[2]), "time": float(r[3]), "test_count": int(r[4])}
+        for r in results["matrix"]
+    ]
+    chart_data = {
+        "responseTimes": [{"model": r[0], "time": round(float(r[1]), 1)} for r in results["response_times"]],
+        "qualityDistribution": [{"model": r[0], "score": round(float(r[1]), 1)} for r in results["quality_distribution"]],
+    }
+    return summary, matrix, chart_data
+
+
+def timed(fn, repeat):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return result, timings[len(timings) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--models", type=int, default=6)
+    parser.add_argument("--roles", type=int, default=9)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+    print(f"Seeding {args.rows:,} synthetic rows ({args.models} models x {args.roles} roles)...")
+    started = time.perf_counter()
+    seed(cur, args.rows, args.models, args.roles)
+    print(f"Seeded in {time.perf_counter() - started:.1f}s\n")
+
+    print(f"{'filter':<12} {'legacy (6 scans)':>18} {'single pass':>14} {'speedup':>9}  match")
+    for label, (where_sql, params) in FILTERS.items():
+        legacy, legacy_time = timed(lambda: run_legacy(cur, where_sql, params), args.repeat)
+        groups, single_time = timed(lambda: fetch_benchmark_groups(cur, where_sql, params), args.repeat)
+
+        expected = legacy_to_response(legacy)
+        summary, matrix, chart_data = aggregate_benchmarks(groups)
+        summary.pop("lastUpdated")
+        # Ties between equal averages may legitimately order differently; compare as sets
+        match = (
+            summary == expected[0]
+            and sorted(map(str, matrix)) == sorted(map(str, expected[1]))
+            and all(
+                sorted(map(str, chart_data[key])) == sorted(map(str, expected[2][key]))
+                for key in chart_data
+            )
+        )
+        print(
+            f"{label:<12} {legacy_time * 1000:>15.1f} ms {single_time * 1000:>11.1f} ms "
+            f"{legacy_time / single_time:>8.2f}x  {'yes' if match else 'NO'}"
+        )
+
+    cur.close()
+    conn.rollback()
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
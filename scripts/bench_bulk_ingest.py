@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark result ingestion: one INSERT + commit per row vs /api/results/bulk's batched path
+Uses a TEMP benchmark_results table (shadows the real one for this session only)
+
+Usage: DB_HOST=... python scripts/bench_bulk_ingest.py --existing 200000 --rows 50000
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from trigger_server import BULK_INGEST_PAGE_ROWS, get_db_connection, ingest_results, parse_ingest_row  # noqa: E402
+
+
+def seed(cur, existing):
+    cur.execute("""
+        CREATE TEMP TABLE benchmark_results (
+            id BIGSERIAL PRIMARY KEY,
+            model_name TEXT,
+            role_type TEXT,
+            quality_score DOUBLE PRECISION,
+            response_time DOUBLE PRECISION,
+            prompt_text TEXT,
+            full_response TEXT,
+            scoring_breakdown JSONB,
+            success BOOLEAN,
+            timestamp TIMESTAMPTZ
+        )
+    """)
+    cur.execute("CREATE INDEX ON benchmark_results (timestamp, id)")
+    cur.execute("""
+        INSERT INTO benchmark_results (model_name, role_type, quality_score, response_time,
+                                       prompt_text, full_response, scoring_breakdown, success, timestamp)
+        SELECT 'model-' || (g %% 8), 'role-' || (g %% 10), random() * 10, random() * 60,
+               'prompt ' || g, repeat('response ', 50), '{"accuracy": 0.5}', true,
+               NOW() - g * INTERVAL '1 second'
+        FROM generate_series(1, %s) g
+    """, (existing,))
+    cur.execute("ANALYZE benchmark_results")
+
+
+def make_rows(count):
+    start = datetime.now(timezone.utc) + timedelta(days=1)
+    return [
+        {
+            "model": f"model-{i % 8}",
+            "role": f"role-{i % 10}",
+            "score": (i % 100) / 10,
+            "time": (i % 600) / 10,
+            "prompt": f"bench prompt {i}",
+            "response": "response " * 50,
+            "breakdown": {"accuracy": 0.5, "completeness": 0.7},
+            "success": True,
+            "timestamp": (start + timedelta(milliseconds=i)).isoformat(),
+        }
+        for i in range(count)
+    ]
+
+
+def row_at_a_time(conn, cur, values):
+    for value in values:
+        cur.execute("""
+            INSERT INTO benchmark_results (model_name, role_type, quality_score, response_time,
+                                           prompt_text, full_response, scoring_breakdown, success, timestamp)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """, value)
+        conn.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--existing", type=int, default=200_000, help="rows already in the table")
+    parser.add_argument("--rows", type=int, default=50_000, help="rows per batched ingest")
+    parser.add_argument("--single-rows", type=int, default=2_000, help="rows for the one-at-a-time baseline")
+    args = parser.parse_args()
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+    print(f"Seeding {args.existing:,} existing rows...")
+    seed(cur, args.existing)
+    conn.commit()
+
+    values = [parse_ingest_row(row) for row in make_rows(args.rows)]
+
+    started = time.perf_counter()
+    row_at_a_time(conn, cur, values[:args.single_rows])
+    single = time.perf_counter() - started
+    cur.execute("DELETE FROM benchmark_results WHERE prompt_text LIKE 'bench prompt %%'")
+    conn.commit()
+
+    started = time.perf_counter()
+    written = ingest_results(cur, values)
+    conn.commit()
+    batched = time.perf_counter() - started
+
+    started = time.perf_counter()
+    retried = ingest_results(cur, values)
+    conn.commit()
+    retry = time.perf_counter() - started
+
+    statements = -(-args.rows // BULK_INGEST_PAGE_ROWS) + 2  # pages + advisory lock + commit
+    print(f"\n{'path':<34} {'rows':>8} {'seconds':>9} {'rows/s':>10} {'round trips':>12}")
+    print(f"{'INSERT + commit per row':<34} {args.single_rows:>8,} {single:>9.2f} "
+          f"{args.single_rows / single:>10,.0f} {2 * args.single_rows:>12,}")
+    print(f"{'bulk (execute_values, 1 txn)':<34} {len(written):>8,} {batched:>9.2f} "
+          f"{len(written) / batched:>10,.0f} {statements:>12,}")
+    print(f"{'bulk retry (all duplicates)':<34} {args.rows:>8,} {retry:>9.2f} "
+          f"{args.rows / retry:>10,.0f} {statements:>12,}")
+    print(f"\nRetry inserted {len(retried)} duplicate rows")
+    print("Against a remote database every round trip adds network latency, which the per-row path pays per row")
+
+    cur.close()
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+EXPLAIN-based check that trigger_server.py queries on benchmark_results use indexes
+
+By default seeds a large synthetic benchmark_results in a scratch schema, applies
+the sql/migrations/*.sql files there in order, and fails (exit 1) if
+any route query plans a sequential scan on benchmark_results.
+
+    python scripts/check_query_plans.py --rows 1000000
+    python scripts/check_query_plans.py --existing      # check the real table as-is
+    python scripts/check_query_plans.py --apply         # apply the migrations to the real table
+"""
+
+import argparse
+import re
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from werkzeug.datastructures import MultiDict  # noqa: E402
+
+from trigger_server import (  # noqa: E402
+    RESPONSE_TIME_BUCKETS,
+    RESULT_FIELDS,
+    BenchmarkRollup,
+    build_benchmark_filters,
+    build_result_filters,
+    export_query,
+    fetch_benchmark_groups,
+    fetch_results_page,
+    fetch_time_percentiles,
+    get_db_connection,
+    rollup,
+)
+
+MIGRATIONS = ROOT / "sql" / "migrations"
+SCRATCH_SCHEMA = "query_plan_check"
+
+
+class ExplainCursor:
+    """Stands in for a cursor: records EXPLAIN plans instead of running queries"""
+
+    def __init__(self, cur):
+        self._cur = cur
+        self.plans = []
+
+    def execute(self, sql, params=None):
+        self._cur.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+        self.plans.append(self._cur.fetchone()[0][0]["Plan"])
+
+    def fetchall(self):
+        return []
+
+    def fetchone(self):
+        return None
+
+
+def seq_scans(plan, table="benchmark_results"):
+    """Every Seq Scan node on `table` in a plan tree"""
+    found = []
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") == table:
+        found.append(plan)
+    for child in plan.get("Plans", []):
+        found.extend(seq_scans(child, table))
+    return found
+
+
+def scan_summary(plan):
+    nodes = []
+
+    def walk(node):
+        if "Relation Name" in node:
+            nodes.append(f"{node['Node Type']} on {node['Relation Name']}"
+                         + (f" using {node['Index Name']}" if "Index Name" in node else ""))
+        for child in node.get("Plans", []):
+            walk(child)
+
+    walk(plan)
+    return "; ".join(nodes) or plan["Node Type"]
+
+
+def migration_statements():
+    statements = []
+    for path in sorted(MIGRATIONS.glob("*.sql")):
+        sql = re.sub(r"--[^\n]*", "", path.read_text())
+        statements += [statement.strip() for statement in sql.split(";") if statement.strip()]
+    return statements
+
+
+def seed(cur, rows):
+    cur.execute(f"DROP SCHEMA IF EXISTS {SCRATCH_SCHEMA} CASCADE")
+    cur.execute(f"CREATE SCHEMA {SCRATCH_SCHEMA}")
+    cur.execute(f"SET search_path = {SCRATCH_SCHEMA}")
+    cur.execute("""
+        CREATE TABLE benchmark_results (
+            id BIGSERIAL PRIMARY KEY,
+            model_name TEXT,
+            role_type TEXT,
+            quality_score DOUBLE PRECISION,
+            response_time DOUBLE PRECISION,
+            prompt_text TEXT,
+            full_response TEXT,
+            scoring_breakdown JSONB,
+            success BOOLEAN,
+            timestamp TIMESTAMP
+        )
+    """)
+    # A year of history, 8 models x 10 roles, ~10% failures, realistic payload sizes
+    cur.execute("""
+        INSERT INTO benchmark_results (model_name, role_type, quality_score, response_time,
+                                       prompt_text, full_response, scoring_breakdown, success, timestamp)
+        SELECT
+            'model-' || (g %% 8),
+            'role-' || ((g / 8) %% 10),
+            4 + random() * 6,
+            1 + random() * 60,
+            repeat('prompt ', 20),
+            repeat(md5(g::text), 8),
+            jsonb_build_object('accuracy', (random() * 10)::int),
+            random() > 0.1,
+            NOW() - (g::float / %s) * INTERVAL '365 days'
+        FROM generate_series(1, %s) g
+    """, (rows, rows))
+
+
+def scenarios(cur):
+    """(label, callable issuing the route's query against an ExplainCursor)"""
+    def groups(args):
+        return lambda explain: fetch_benchmark_groups(explain, *build_benchmark_filters(MultiDict(args)))
+
+    def results_page(args, deep=False):
+        def run(explain):
+            where_sql, params = build_result_filters(MultiDict(args))
+            if deep:
+                # A cursor far into history: page cost must not depend on depth
+                cur.execute("SELECT timestamp, id FROM benchmark_results ORDER BY timestamp, id LIMIT 1 OFFSET 1000")
+                timestamp, row_id = cur.fetchone()
+                where_sql += " AND (timestamp, id) < (%s, %s)"
+                params += [timestamp.isoformat(), row_id]
+            columns = [RESULT_FIELDS[field] for field in ("id", "model", "score", "timestamp")]
+            fetch_results_page(explain, columns + ["timestamp", "id"], where_sql, params, 101)
+        return run
+
+    def export(args):
+        def run(explain):
+            where_sql, params = build_result_filters(MultiDict(args))
+            explain.execute(export_query(["id", "model_name", "full_response"], where_sql), params)
+        return run
+
+    def rollup_refresh(explain):
+        cur.execute("SELECT MAX(timestamp) FROM benchmark_results")
+        high_water = cur.fetchone()[0]
+        explain.execute(BenchmarkRollup.REFRESH_SQL.format(since_clause="AND timestamp >= %s::date"),
+                        [high_water, high_water])
+        explain.execute(BenchmarkRollup.HISTOGRAM_REFRESH_SQL.format(since_clause="AND timestamp >= %s::date"),
+                        [RESPONSE_TIME_BUCKETS, high_water, high_water])
+
+    def percentiles(args, pairs):
+        return lambda explain: fetch_time_percentiles(explain, *build_benchmark_filters(MultiDict(args)), pairs)
+
+    return [
+        ("benchmarks: model filter", groups([("model", "model-1"), ("model", "model-2")])),
+        ("benchmarks: role + score filter", groups([("role", "role-3"), ("minScore", "7"), ("maxScore", "9")])),
+        ("benchmarks: unfiltered", groups([])),
+        ("benchmarks: matrix percentiles", percentiles([], {("role-1", "model-1"), ("role-2", "model-3")})),
+        ("dashboard window (rollup + raw tail)", lambda explain: rollup.window_groups(explain, ensure=False)),
+        ("response-time histograms (rollup + tail)", lambda explain: rollup.window_histograms(explain, ensure=False)),
+        ("trends: weekly, one model", lambda explain: rollup.trend_buckets(explain, "week", 180, ["model-1"], ensure=False)),
+        ("rollup incremental refresh", rollup_refresh),
+        ("rollup high-water MAX(timestamp)", lambda explain: explain.execute("SELECT MAX(timestamp) FROM benchmark_results")),
+        ("results: first page", results_page([("success", "all")])),
+        ("results: model filter, first page", results_page([("model", "model-3")])),
+        ("results: deep cursor", results_page([("success", "all")], deep=True)),
+        ("results: time range", results_page([("since", "2020-01-01T00:00:00"), ("until", "2020-02-01T00:00:00")])),
+        ("export: last week", export([("since", (datetime.now() - timedelta(days=7)).isoformat())])),
+        ("benchmark detail", lambda explain: explain.execute(
+            "SELECT id, full_response FROM benchmark_results WHERE id = %s", (42,))),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="synthetic rows to seed")
+    parser.add_argument("--existing", action="store_true", help="check the real benchmark_results without seeding")
+    parser.add_argument("--apply", action="store_true", help="apply the migrations to the real benchmark_results and exit")
+    parser.add_argument("--skip-migrations", action="store_true", help="seed without the migrations (shows what they fix)")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch schema afterwards")
+    args = parser.parse_args()
+
+    conn = get_db_connection()
+    conn.autocommit = True  # CREATE INDEX CONCURRENTLY cannot run in a transaction
+    cur = conn.cursor()
+
+    if args.apply:
+        for statement in migration_statements():
+            print(statement.splitlines()[0])
+            cur.execute(statement)
+        print("Migrations applied")
+        return 0
+
+    if not args.existing:
+        print(f"Seeding {args.rows:,} rows into {SCRATCH_SCHEMA}.benchmark_results...")
+        started = time.monotonic()
+        seed(cur, args.rows)
+        if not args.skip_migrations:
+            for statement in migration_statements():
+                cur.execute(statement)
+        cur.execute("VACUUM ANALYZE benchmark_results")
+        # Dashboard reads need the rollup tables next to the seeded data
+        rollup._ensure_schema(cur)
+        cur.execute("SELECT MAX(timestamp) FROM benchmark_results")
+        high_water = cur.fetchone()[0]
+        cur.execute(BenchmarkRollup.REFRESH_SQL.format(since_clause=""), [high_water])
+        cur.execute(BenchmarkRollup.HISTOGRAM_REFRESH_SQL.format(since_clause=""), [RESPONSE_TIME_BUCKETS, high_water])
+        cur.execute("INSERT INTO benchmark_rollup_state VALUES (1, %s, NOW())", (high_water,))
+        cur.execute("ANALYZE benchmark_daily_rollup")
+        cur.execute("ANALYZE benchmark_daily_time_histogram")
+        print(f"Seeded and indexed in {time.monotonic() - started:.1f}s\n")
+
+    failures = 0
+    for label, run in scenarios(cur):
+        explain = ExplainCursor(cur)
+        run(explain)
+        bad = [scan for plan in explain.plans for scan in seq_scans(plan)]
+        failures += bool(bad)
+        status = "FAIL" if bad else "ok"
+        print(f"[{status:>4}] {label:<40} {' | '.join(scan_summary(plan) for plan in explain.plans)}")
+
+    if not args.existing and not args.keep:
+        cur.execute(f"DROP SCHEMA {SCRATCH_SCHEMA} CASCADE")
+    cur.close()
+    conn.close()
+
+    if failures:
+        print(f"\n{failures} quer{'y' if failures == 1 else 'ies'} fell back to a sequential scan on benchmark_results")
+        return 1
+    print("\nAll route queries use indexes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
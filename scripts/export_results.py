@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Export benchmark_results as NDJSON, CSV or Parquet with bounded memory
+
+Straight from Postgres (uses DB_* env vars, server-side cursor):
+    python scripts/export_results.py --format parquet --out results.parquet --since 2025-01-01
+
+Or through a running trigger server (/api/results/export):
+    python scripts/export_results.py --server http://localhost:5000 --format csv --model phi:latest > phi.csv
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import time
+import urllib.request
+from urllib.parse import urlencode
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+
+def build_query(args):
+    """Same query args the /api/results and /api/benchmarks endpoints understand"""
+    query = [("format", args.format), ("success", args.success)]
+    query += [("model", model) for model in args.model]
+    query += [("role", role) for role in args.role]
+    for name, value in (("minScore", args.min_score), ("maxScore", args.max_score),
+                        ("since", args.since), ("until", args.until), ("fields", args.fields)):
+        if value is not None:
+            query.append((name, str(value)))
+    return query
+
+
+def export_via_server(server, query, out):
+    url = f"{server.rstrip('/')}/api/results/export?{urlencode(query)}"
+    with urllib.request.urlopen(url) as response:
+        shutil.copyfileobj(response, out, length=1024 * 1024)
+
+
+def export_direct(query, out):
+    from werkzeug.datastructures import MultiDict
+
+    from trigger_server import RESULT_FIELDS, build_result_filters, iter_export, parse_result_fields
+
+    args = MultiDict(query)
+    fields = parse_result_fields(args.get("fields") or ",".join(RESULT_FIELDS))
+    where_sql, params = build_result_filters(args)
+    for chunk in iter_export(args["format"], fields, where_sql, params):
+        out.write(chunk)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--format", choices=("ndjson", "csv", "parquet"), default="ndjson")
+    parser.add_argument("--out", help="output file (default: stdout)")
+    parser.add_argument("--server", help="trigger server base URL; omit to read Postgres directly")
+    parser.add_argument("--model", action="append", default=[])
+    parser.add_argument("--role", action="append", default=[])
+    parser.add_argument("--min-score", type=float)
+    parser.add_argument("--max-score", type=float)
+    parser.add_argument("--since", help="ISO timestamp (inclusive)")
+    parser.add_argument("--until", help="ISO timestamp (exclusive)")
+    parser.add_argument("--success", choices=("true", "false", "all"), default="true")
+    parser.add_argument("--fields", help="comma separated subset, e.g. id,model,score,response")
+    args = parser.parse_args()
+
+    query = build_query(args)
+    out = open(args.out, "wb") if args.out else sys.stdout.buffer
+    started = time.monotonic()
+    try:
+        if args.server:
+            export_via_server(args.server, query, out)
+        else:
+            export_direct(query, out)
+    finally:
+        if args.out:
+            out.close()
+    if args.out:
+        size = os.path.getsize(args.out)
+        print(f"Wrote {size / (1024 * 1024):.1f} MB to {args.out} in {time.monotonic() - started:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Load-test harness for the trigger server: requests/sec and tail latency per target
+Compare two running servers, e.g. the Flask dev server vs the production mode:
+
+    python trigger_server.py --dev            # SERVER_PORT=5001
+    python trigger_server.py                  # SERVER_PORT=5000
+    python scripts/loadtest_trigger_server.py dev=http://localhost:5001 prod=http://localhost:5000
+
+Pass --vary to rotate through filter combinations instead of hitting one cached URL.
+"""
+
+import argparse
+import http.client
+import itertools
+import threading
+import time
+from urllib.parse import urlsplit
+
+VARIED_QUERIES = [
+    "",
+    "?summary=true",
+    "?model=phi:latest",
+    "?role=coder",
+    "?minScore=6&maxScore=9",
+    "?model=mistral:latest&model=llama3.2:latest&role=writer",
+]
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def worker(base, paths, deadline, latencies, errors, cache_hits, lock):
+    """One keep-alive client issuing requests back to back until the deadline"""
+    parts = urlsplit(base)
+    connection_class = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+    conn = connection_class(parts.netloc, timeout=30)
+    local_latencies = []
+    local_errors = 0
+    local_hits = 0
+    for path in itertools.cycle(paths):
+        if time.monotonic() >= deadline:
+            break
+        started = time.perf_counter()
+        try:
+            conn.request("GET", path)
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                local_errors += 1
+                continue
+            if response.getheader("X-Cache") == "HIT":
+                local_hits += 1
+        except (OSError, http.client.HTTPException):
+            local_errors += 1
+            conn.close()
+            conn = connection_class(parts.netloc, timeout=30)
+            continue
+        local_latencies.append(time.perf_counter() - started)
+    conn.close()
+    with lock:
+        latencies.extend(local_latencies)
+        errors.append(local_errors)
+        cache_hits.append(local_hits)
+
+
+def run(label, base, path, concurrency, duration, vary):
+    paths = [path + query for query in VARIED_QUERIES] if vary else [path]
+    latencies, errors, cache_hits = [], [], []
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+    threads = [
+        threading.Thread(target=worker, args=(base, paths, deadline, latencies, errors, cache_hits, lock))
+        for _ in range(concurrency)
+    ]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+    latencies.sort()
+    ok = len(latencies)
+    return {
+        "label": label,
+        "requests": ok,
+        "errors": sum(errors),
+        "rps": ok / elapsed if elapsed else 0,
+        "p50": percentile(latencies, 0.50) * 1000,
+        "p90": percentile(latencies, 0.90) * 1000,
+        "p99": percentile(latencies, 0.99) * 1000,
+        "max": (latencies[-1] * 1000) if latencies else 0,
+        "cache_hit_rate": (sum(cache_hits) / ok * 100) if ok else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("targets", nargs="+", help="label=base_url (or just base_url)")
+    parser.add_argument("--path", default="/api/benchmarks")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=15)
+    parser.add_argument("--warmup", type=float, default=2)
+    parser.add_argument("--vary", action="store_true", help="rotate through filter query strings")
+    args = parser.parse_args()
+
+    results = []
+    for target in args.targets:
+        label, _, base = target.rpartition("=") if "=" in target.split("://")[0] else ("", "", target)
+        label = label or base
+        if args.warmup:
+            run(label, base, args.path, args.concurrency, args.warmup, args.vary)
+        results.append(run(label, base, args.path, args.concurrency, args.duration, args.vary))
+
+    print(f"\n{args.path}  concurrency={args.concurrency}  duration={args.duration}s  vary={args.vary}\n")
+    print(f"{'target':<12} {'req/s':>9} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9} {'errors':>7} {'cache hit':>10}")
+    for r in results:
+        print(
+            f"{r['label']:<12} {r['rps']:>9.1f} {r['p50']:>9.1f} {r['p90']:>9.1f} {r['p99']:>9.1f} "
+            f"{r['max']:>9.1f} {r['errors']:>7} {r['cache_hit_rate']:>9.0f}%"
+        )
+
+
+if __name__ == "__main__":
+    main()
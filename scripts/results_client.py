@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Client for POST /api/results/bulk: batches benchmark result rows and retries safely
+
+Rows are deduplicated server-side on (model, role, timestamp, prompt), so a
+batch can be re-sent after a timeout or a 5xx without creating duplicates.
+
+As a library (e.g. from benchmark_model.py):
+    from results_client import ResultsClient
+    with ResultsClient("http://localhost:5000") as client:
+        client.add(model="phi:latest", role="coder", score=8.2, time=12.4,
+                   prompt=prompt, response=response, breakdown={"accuracy": 0.9})
+
+From the command line, ingest NDJSON rows (e.g. an export_results.py export):
+    python scripts/results_client.py --server http://localhost:5000 results.ndjson
+"""
+
+import argparse
+import json
+import sys
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime, timezone
+
+
+class ResultsClient:
+    """Buffers rows and posts them in batches of batch_size"""
+
+    def __init__(self, server, batch_size=1000, retries=4, timeout=60):
+        self.url = f"{server.rstrip('/')}/api/results/bulk"
+        self.batch_size = batch_size
+        self.retries = retries
+        self.timeout = timeout
+        self.inserted = 0
+        self.duplicates = 0
+        self._rows = []
+
+    def add(self, **row):
+        """Queue one result; the timestamp defaults to now and is what makes retries idempotent"""
+        row.setdefault("timestamp", datetime.now(timezone.utc).isoformat())
+        self._rows.append(row)
+        if len(self._rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        while self._rows:
+            batch = self._rows[:self.batch_size]
+            result = self._post(batch)
+            del self._rows[:len(batch)]
+            self.inserted += result["inserted"]
+            self.duplicates += result["duplicates"]
+
+    def _post(self, rows):
+        body = json.dumps({"rows": rows}, default=str).encode()
+        for attempt in range(self.retries + 1):
+            request = urllib.request.Request(self.url, data=body, headers={"Content-Type": "application/json"})
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    return json.load(response)
+            except urllib.error.HTTPError as e:
+                if e.code < 500 and e.code != 429:
+                    raise ValueError(f"Server rejected batch: {e.code} {e.read().decode(errors='replace')}")
+                error = e
+            except (urllib.error.URLError, TimeoutError, ConnectionError) as e:
+                error = e
+            if attempt < self.retries:
+                time.sleep(min(2 ** attempt, 30))
+        raise ConnectionError(f"Giving up on batch of {len(rows)} rows after {self.retries + 1} attempts: {error}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--server", required=True, help="trigger server base URL")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("input", nargs="?", help="NDJSON file of result rows (default: stdin)")
+    args = parser.parse_args()
+
+    source = open(args.input) if args.input else sys.stdin
+    client = ResultsClient(args.server, batch_size=args.batch_size)
+    started = time.perf_counter()
+    rows = 0
+    with source, client:
+        for line in source:
+            if line.strip():
+                row = json.loads(line)
+                row.pop("id", None)  # exported rows carry their source id
+                client.add(**row)
+                rows += 1
+    elapsed = time.perf_counter() - started
+    print(
+        f"{rows:,} rows: {client.inserted:,} inserted, {client.duplicates:,} already stored "
+        f"in {elapsed:.1f}s ({rows / elapsed if elapsed else 0:,.0f} rows/s)",
+        file=sys.stderr
+    )
+
+
+if __name__ == "__main__":
+    main()
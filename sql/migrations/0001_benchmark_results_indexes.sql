@@ -0,0 +1,25 @@
+-- Indexes for the trigger_server.py hot queries on benchmark_results.
+-- Safe to re-run. CONCURRENTLY avoids blocking benchmark writes, so run each
+-- statement outside a transaction (psql -f does; see scripts/check_query_plans.py --apply).
+
+-- Time-window predicates (timestamp > NOW() - INTERVAL '30 days'), MAX(timestamp),
+-- rollup refreshes and the /api/results keyset (ORDER BY timestamp DESC, id DESC).
+CREATE INDEX CONCURRENTLY IF NOT EXISTS benchmark_results_timestamp_id_idx
+    ON benchmark_results (timestamp, id);
+-- A BRIN on timestamp would be smaller, but the keyset ORDER BY and MAX(timestamp)
+-- need an ordered index, and this one already serves the window predicates.
+
+-- /api/benchmarks: success = true, optional model_name IN (...) and quality_score range,
+-- grouped by (role_type, model_name). Covering, so the aggregate is an index-only scan.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS benchmark_results_success_model_idx
+    ON benchmark_results (model_name, role_type, quality_score)
+    INCLUDE (response_time)
+    WHERE success = true;
+
+-- Same, for role_type IN (...) filters without a model filter.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS benchmark_results_success_role_idx
+    ON benchmark_results (role_type, model_name, quality_score)
+    INCLUDE (response_time)
+    WHERE success = true;
+
+ANALYZE benchmark_results;
@@ -0,0 +1,13 @@
+-- Precomputed response previews for GET /api/benchmarks/<id>?preview=true.
+-- Generated columns stay correct for every writer without code changes. The
+-- preview length must match DETAIL_PREVIEW_CHARS in trigger_server.py.
+-- Adding a STORED generated column rewrites the table under an ACCESS EXCLUSIVE
+-- lock, so apply it while no benchmarks are being written.
+
+ALTER TABLE benchmark_results
+    ADD COLUMN IF NOT EXISTS response_preview TEXT
+        GENERATED ALWAYS AS (left(full_response, 2000)) STORED;
+
+ALTER TABLE benchmark_results
+    ADD COLUMN IF NOT EXISTS response_length INTEGER
+        GENERATED ALWAYS AS (char_length(full_response)) STORED;
@@ -4,11 +4,11 @@ const API_BASE_URL =
   process.env.NEXT_PUBLIC_API_BASE_URL || "https://ai-trigger.gtabhishek.com";
 
 export async function GET(
-  _request: NextRequest,
+  request: NextRequest,
   context: { params: Promise<{ id: string }> }
 ) {
   const { id } = await context.params;
-  const url = `${API_BASE_URL}/api/benchmarks/${id}`;
+  const url = `${API_BASE_URL}/api/benchmarks/${id}${request.nextUrl.search}`;
 
   try {
     const response = await fetch(url, {
@@ -15,12 +15,16 @@ export type SystemHealth = {
   status: string;
   recent_benchmarks: number;
   cpu_usage: number;
+  database_pool?: Record<string, number>;
+  job_queue?: Record<string, unknown>;
+  resource_scheduling?: Record<string, unknown>;
   last_check: string;
   timestamp: string;
   endpoints: Record<string, string>;
   configuration: {
     benchmark_script: string;
     working_directory: string;
+    role_sharding?: boolean;
   };
 };
 
@@ -45,6 +49,10 @@ export type BenchmarkMatrixItem = {
   score: number;
   time: number;
   test_count: number;
+  // Exact response-time percentiles (seconds)
+  p50?: number | null;
+  p90?: number | null;
+  p99?: number | null;
 };
 
 export type ChartData = {
@@ -73,6 +81,17 @@ export type BenchmarkDetail = {
   prompt: string;
   response: string;
   breakdown: Record<string, number>;
+  // Only with ?preview=true
+  response_length?: number;
+  response_truncated?: boolean;
+};
+
+export type BenchmarkResponseChunk = {
+  id: number;
+  offset: number;
+  text: string;
+  total_length: number;
+  next_offset: number | null;
 };
 
 export type RoleList = {
@@ -107,39 +126,146 @@ export type PerformanceMatrixItem = {
   test_count: number;
   success_rate: number;
   status: "YES" | "HYBRID" | "NO";
+  // Response-time percentiles estimated from the rollup histograms (seconds)
+  p50?: number | null;
+  p90?: number | null;
+  p99?: number | null;
 };
 
+export type TimeMetric = "mean" | "p50" | "p90" | "p99";
+
 export type PerformanceMatrixResponse = {
   data: PerformanceMatrixItem[];
+  time_metric?: TimeMetric;
   total_tasks: number;
   local_ready: number;
   hybrid: number;
   cloud_only: number;
 };
 
+export type ResponseTimeBucket = {
+  lower: number;
+  upper: number | null; // null: open-ended last bucket
+  count: number;
+};
+
+export type ResponseTimeDistribution = {
+  model: string;
+  role: string;
+  count: number;
+  mean: number;
+  p50: number | null;
+  p90: number | null;
+  p99: number | null;
+  buckets: ResponseTimeBucket[];
+};
+
+export type ResponseTimesResponse = {
+  days: number;
+  distributions: ResponseTimeDistribution[];
+  total: number;
+};
+
+export type TrendPoint = {
+  start: string; // bucket start date
+  test_count: number;
+  success_rate: number | null;
+  score: number | null;
+  score_std: number | null;
+  time: number | null;
+  time_std: number | null;
+};
+
+export type TrendRegression = {
+  start: string;
+  metric: "score" | "time";
+  baseline: number;
+  value: number;
+  change: number;
+  p_value: number;
+  samples: number;
+  baseline_samples: number;
+};
+
+export type TrendSeries = {
+  model: string;
+  role: string;
+  points: TrendPoint[];
+  regressions: TrendRegression[];
+};
+
+export type TrendsResponse = {
+  bucket: "day" | "week" | "month";
+  days: number;
+  baseline_buckets: number;
+  alpha: number;
+  series: TrendSeries[];
+  total_series: number;
+  regressions: number;
+};
+
 export type RunTestRequest = {
   model: string;
   role?: string;
   test_id?: string;
+  max_age_seconds?: number;
+  force?: boolean;
+};
+
+// One --role-test job of a role job that was split per test
+export type JobShard = {
+  job_id: string;
+  test_id: string;
+  state: string;
+  duration: number | null;
+  expected_seconds?: number | null; // historical mean, used to order shards
+  error?: string | null;
 };
 
 export type RunTestResponse = {
   status: string;
+  job_id?: string;
+  queue_position?: number | null;
+  coalesced?: boolean;
   model: string;
   role?: string;
   test_id?: string;
   test_type: string;
+  shards?: JobShard[]; // empty unless the role runs as per-test shards
   timestamp: string;
   message: string;
+  // status "fresh": an identical run inside the freshness window was reused
+  finished_at?: string;
+  age_seconds?: number;
+  results?: Array<{
+    id: number;
+    role: string;
+    score: number | null;
+    time: number | null;
+    success: boolean;
+    timestamp: string | null;
+  }>;
 };
 
 export type RunBatchRequest = {
   models: string[];
   roles: string[];
+  max_parallel?: number;
+  deadline_seconds?: number;
+  // true: resume the newest batch over the same models × roles; string: resume that batch id
+  resume?: boolean | string;
+  // Seconds: skip cells with a successful benchmark_results row at least this recent
+  skip_if_fresh?: number;
 };
 
 export type RunBatchResponse = {
   status: string;
+  batch_id?: string;
+  job_ids?: string[];
+  queue_position?: number | null;
+  resumed?: boolean;
+  carried_over?: number; // cells an earlier run of this batch already finished
+  skipped?: number; // cells with a fresh successful result
   models: string[];
   roles: string[];
   total_tests: number;
@@ -0,0 +1,17 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# trigger_server.py lives at the repository root, not in a package
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+@pytest.fixture
+def saved_jobs(monkeypatch):
+    """Jobs written to the job registry, captured instead of reaching Postgres"""
+    import trigger_server
+
+    saved = []
+    monkeypatch.setattr(trigger_server.job_store, "save_many", saved.extend)
+    return saved
@@ -0,0 +1,99 @@
+"""Resuming a batch: carried-over cells, fresh-result skips and the /run-batch resume checks"""
+
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+import trigger_server
+from trigger_server import BenchmarkBatch, JobScheduler, app
+
+
+def cell(model, role, state, batch_id="earlier"):
+    return {"id": f"{batch_id}-{model}-{role}", "model": model, "role": role, "state": state,
+            "finished_at": datetime.now().isoformat(), "duration": 12.0}
+
+
+def test_carried_cells_get_no_jobs():
+    batch = BenchmarkBatch(["m1", "m2"], ["coder", "analyst"], batch_id="earlier",
+                           carried=[cell("m1", "coder", "succeeded"), cell("m2", "analyst", "skipped")])
+    assert batch.id == "earlier"
+    assert [(job.model, job.role) for job in batch.runnable_jobs()] == [("m1", "analyst"), ("m2", "coder")]
+    progress = batch.progress()
+    assert (progress["total_tests"], progress["carried_over"], progress["completed"]) == (4, 2, 2)
+    assert progress["states"] == {"queued": 2, "succeeded": 1, "skipped": 1}
+    assert batch.finished_at is None
+
+
+def test_fresh_cells_are_skipped():
+    recent = datetime.now() - timedelta(minutes=5)
+    batch = BenchmarkBatch(["m1"], ["coder", "analyst"], fresh={("m1", "coder"): recent})
+    skipped = [job for job in batch.jobs if job.state == "skipped"]
+    assert [(job.model, job.role) for job in skipped] == [("m1", "coder")]
+    assert recent.isoformat() in skipped[0].error
+    assert [job.role for job in batch.runnable_jobs()] == ["analyst"]
+
+    everything_fresh = BenchmarkBatch(["m1"], ["coder"], fresh={("m1", "coder"): recent})
+    assert everything_fresh.runnable_jobs() == [] and everything_fresh.finished_at is not None
+
+
+@pytest.fixture
+def registry(monkeypatch, saved_jobs):
+    """An earlier m1/m2 × coder/analyst batch in the registry, and a scheduler that holds jobs"""
+    release = threading.Event()
+
+    def runner(job):
+        release.wait(timeout=5)
+        job.transition("succeeded", persist=False)
+
+    record = {"id": "earlier", "models": ["m1", "m2"], "roles": ["coder", "analyst"]}
+    cells = [
+        cell("m1", "coder", "succeeded"),
+        cell("m1", "analyst", "failed"),
+        cell("m2", "coder", "skipped"),
+        cell("m2", "analyst", "timeout"),
+    ]
+
+    def get_batch(batch_id=None, models=None, roles=None):
+        return record if batch_id in (None, "earlier") else None
+
+    monkeypatch.setattr(trigger_server, "scheduler", JobScheduler(runner, workers=1))
+    monkeypatch.setattr(trigger_server, "batches", {})
+    monkeypatch.setattr(trigger_server.job_store, "get_batch", get_batch)
+    monkeypatch.setattr(trigger_server.job_store, "batch_cells", lambda batch_id: cells)
+    monkeypatch.setattr(trigger_server.job_store, "save_batch", lambda batch: None)
+    yield record
+    release.set()
+
+
+def run_batch(**body):
+    response = app.test_client().post("/run-batch", json={"models": ["m1", "m2"], "roles": ["coder", "analyst"], **body})
+    return response.status_code, response.get_json()
+
+
+def test_resume_reruns_only_unfinished_cells(registry):
+    status, resumed = run_batch(resume=True)
+    assert status == 200
+    assert (resumed["batch_id"], resumed["resumed"], resumed["carried_over"]) == ("earlier", True, 2)
+    assert len(resumed["job_ids"]) == 2
+    cells = trigger_server.batches["earlier"].progress()["cells"]
+    rerun = {(c["model"], c["role"]) for c in cells if c["job_id"] in resumed["job_ids"]}
+    assert rerun == {("m1", "analyst"), ("m2", "analyst")}
+
+
+def test_resume_by_id_and_unknown_id(registry):
+    status, resumed = run_batch(resume="earlier", roles=["coder"])
+    # Only the requested cells are carried over, and both of them are done
+    assert status == 200 and resumed["status"] == "complete" and resumed["carried_over"] == 2
+    assert run_batch(resume="missing")[0] == 404
+
+
+def test_resume_of_a_running_batch_conflicts(registry):
+    assert run_batch(resume=True)[0] == 200
+    status, conflict = run_batch(resume=True)
+    assert status == 409 and conflict["batch_id"] == "earlier"
+
+
+@pytest.mark.parametrize("body", [{"resume": 1}, {"resume": None}, {"skip_if_fresh": -1}, {"skip_if_fresh": "60"}])
+def test_rejects_bad_resume_options(registry, body):
+    assert run_batch(**body)[0] == 400
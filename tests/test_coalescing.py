@@ -0,0 +1,94 @@
+"""/run-test merging identical requests onto a live job and reusing fresh results"""
+
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+import trigger_server
+from trigger_server import JobScheduler, app
+
+
+@pytest.fixture
+def scheduler(monkeypatch, saved_jobs):
+    release = threading.Event()
+
+    def runner(job):
+        release.wait(timeout=5)
+        job.transition("succeeded", persist=False)
+
+    scheduler = JobScheduler(runner, workers=1)
+    monkeypatch.setattr(trigger_server, "scheduler", scheduler)
+    monkeypatch.setattr(trigger_server.job_store, "latest_succeeded", lambda *args: None)
+    yield scheduler
+    release.set()
+
+
+@pytest.fixture
+def client():
+    return app.test_client()
+
+
+def run_test(client, **body):
+    response = client.post("/run-test", json=body)
+    return response.status_code, response.get_json()
+
+
+def test_identical_requests_join_the_live_job(client, scheduler):
+    _, first = run_test(client, model="m", role="coder")
+    status, second = run_test(client, model="m", role="coder")
+    assert status == 200
+    assert second["coalesced"] is True and second["job_id"] == first["job_id"]
+
+    _, other_role = run_test(client, model="m", role="analyst")
+    _, other_model = run_test(client, model="n", role="coder")
+    assert not other_role["coalesced"] and not other_model["coalesced"]
+    assert len({first["job_id"], other_role["job_id"], other_model["job_id"]}) == 3
+    assert scheduler.stats()["coalesced"] == 1
+
+
+def test_cancelled_jobs_are_not_joined(client, scheduler):
+    _, running = run_test(client, model="busy")
+    _, queued = run_test(client, model="m")
+    deadline = time.monotonic() + 5
+    while scheduler.position(running["job_id"]) != 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    for job in (running, queued):
+        client.post(f"/jobs/{job['job_id']}/cancel")
+        _, again = run_test(client, model=job["model"])
+        assert not again["coalesced"] and again["job_id"] != job["job_id"]
+
+
+def test_fresh_success_is_reused_unless_forced(client, scheduler, monkeypatch):
+    finished = datetime.now().isoformat()
+    lookups = []
+
+    def latest_succeeded(model, role, test_id, max_age):
+        lookups.append(max_age)
+        return {"id": "earlier", "finished_at": finished}
+
+    monkeypatch.setattr(trigger_server.job_store, "latest_succeeded", latest_succeeded)
+    monkeypatch.setattr(trigger_server, "fetch_run_results", lambda job: [{"quality_score": 8.0}])
+
+    _, fresh = run_test(client, model="m", max_age_seconds=600)
+    assert fresh["status"] == "fresh" and fresh["job_id"] == "earlier"
+    assert fresh["results"] == [{"quality_score": 8.0}]
+    assert lookups == [600]
+    assert scheduler.stats()["submitted"] == 0
+
+    _, forced = run_test(client, model="m", max_age_seconds=600, force=True)
+    _, no_window = run_test(client, model="n", max_age_seconds=0)
+    assert forced["status"] == no_window["status"] == "queued"
+    assert lookups == [600]
+
+
+@pytest.mark.parametrize("body, message", [
+    ({"force": "false"}, "force must be true or false"),
+    ({"max_age_seconds": -1}, "max_age_seconds must be a non-negative number"),
+    ({"max_age_seconds": "60"}, "max_age_seconds must be a non-negative number"),
+    ({"max_age_seconds": None}, "max_age_seconds must be a non-negative number"),
+])
+def test_rejects_bad_freshness_options(client, scheduler, body, message):
+    status, payload = run_test(client, model="m", **body)
+    assert status == 400 and payload["error"] == message
@@ -0,0 +1,60 @@
+"""ConnectionPool reuse, limits and cleanup, against fake connections (no database needed)"""
+
+import psycopg2
+import pytest
+
+from trigger_server import ConnectionPool
+
+
+class FakeConnection:
+    closed = False
+
+    def get_transaction_status(self):
+        return 0  # TRANSACTION_STATUS_IDLE
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+def test_pool_reuses_and_caps_connections():
+    pool = ConnectionPool(FakeConnection, min_size=0, max_size=2, timeout=0.05)
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        assert second is first
+    assert pool.stats()["connections_opened"] == 1
+
+    held = [pool.acquire(), pool.acquire()]
+    with pytest.raises(Exception, match="No database connection available"):
+        pool.acquire()
+    for conn in held:
+        pool.release(conn)
+    assert pool.stats()["in_use"] == 0
+
+
+def test_pool_releases_connection_of_closed_generator():
+    pool = ConnectionPool(FakeConnection, min_size=0, max_size=1, timeout=0.05)
+
+    def rows():
+        with pool.connection():
+            yield 1
+            yield 2
+
+    for _ in range(3):
+        stream = rows()
+        next(stream)
+        assert pool.stats()["in_use"] == 1
+        stream.close()  # client went away mid-stream
+        assert pool.stats()["in_use"] == 0
+
+
+def test_pool_discards_connection_after_connection_error():
+    pool = ConnectionPool(FakeConnection, min_size=0, max_size=1, timeout=0.05)
+    with pytest.raises(psycopg2.OperationalError):
+        with pool.connection():
+            raise psycopg2.OperationalError("server closed the connection")
+    stats = pool.stats()
+    assert (stats["in_use"], stats["idle"], stats["connections_discarded"]) == (0, 0, 1)
@@ -0,0 +1,24 @@
+"""Keyset pagination cursors for /api/results"""
+
+from datetime import datetime
+
+import pytest
+
+from trigger_server import InvalidRequest, decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    timestamp = datetime(2026, 3, 1, 12, 30, 15, 123456)
+    cursor = encode_cursor(timestamp, 42)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (timestamp.isoformat(), 42)
+
+
+def test_cursor_round_trip_without_timestamp():
+    assert decode_cursor(encode_cursor(None, 7)) == (None, 7)
+
+
+@pytest.mark.parametrize("cursor", ["", "not-base64!", encode_cursor(datetime(2026, 1, 1), 1)[:-3], "WyJ4IiwgMV0"])
+def test_cursor_rejects_garbage(cursor):
+    with pytest.raises(InvalidRequest):
+        decode_cursor(cursor)
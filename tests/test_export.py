@@ -0,0 +1,35 @@
+"""Encoding of /api/results/export streams"""
+
+import io
+from datetime import datetime
+
+import pytest
+
+from trigger_server import RESULT_FIELDS, RESULT_PARQUET_TYPES, _encode_export
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+
+def read_parquet(fields, batches):
+    return pq.read_table(io.BytesIO(b"".join(_encode_export("parquet", fields, iter(batches)))))
+
+
+def test_every_result_field_has_a_parquet_type():
+    assert set(RESULT_PARQUET_TYPES) == set(RESULT_FIELDS)
+
+
+def test_parquet_schema_does_not_depend_on_the_first_batch():
+    fields = ["id", "score", "success", "timestamp", "breakdown"]
+    first = [{"id": 1, "score": None, "success": None, "timestamp": None, "breakdown": None}]
+    second = [{"id": 2, "score": 7.5, "success": True, "timestamp": datetime(2026, 5, 1, 12), "breakdown": {"a": 1}}]
+    table = read_parquet(fields, [first, second])
+    assert table.schema.types == [pa.int64(), pa.float64(), pa.bool_(), pa.timestamp("us"), pa.string()]
+    assert table.column("score").to_pylist() == [None, 7.5]
+    assert table.column("breakdown").to_pylist() == [None, '{"a": 1}']
+
+
+def test_empty_parquet_export_keeps_the_column_types():
+    table = read_parquet(["id", "model", "time"], [])
+    assert table.num_rows == 0
+    assert table.schema.types == [pa.int64(), pa.string(), pa.float64()]
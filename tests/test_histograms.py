@@ -0,0 +1,49 @@
+"""Percentile estimates from the response-time histograms behind /api/response-times"""
+
+import bisect
+import math
+import statistics
+
+import pytest
+
+from trigger_server import RESPONSE_TIME_BUCKETS, histogram_percentiles, histogram_quantile
+
+
+def histogram(times):
+    """Bucket counts the way HISTOGRAM_REFRESH_SQL's width_bucket does"""
+    counts = [0] * (len(RESPONSE_TIME_BUCKETS) + 1)
+    for value in times:
+        counts[bisect.bisect_right(RESPONSE_TIME_BUCKETS, value)] += 1
+    return counts
+
+
+def test_histogram_quantile_empty():
+    assert histogram_quantile([0] * 10, 0.5) is None
+    assert histogram_percentiles([]) == {"p50": None, "p90": None, "p99": None}
+
+
+def test_histogram_quantile_stays_inside_the_target_bucket():
+    times = [0.5 + 0.37 * i for i in range(500)]
+    counts = histogram(times)
+    for q in (0.1, 0.5, 0.9, 0.99):
+        exact = statistics.quantiles(times, n=1000, method="inclusive")[round(q * 1000) - 1]
+        bucket = bisect.bisect_right(RESPONSE_TIME_BUCKETS, exact)
+        estimate = histogram_quantile(counts, q)
+        assert RESPONSE_TIME_BUCKETS[bucket - 1] <= estimate <= RESPONSE_TIME_BUCKETS[bucket]
+        # Buckets are 10^(1/16) (~15%) wide
+        assert estimate == pytest.approx(exact, rel=0.15)
+
+
+def test_histogram_quantile_interpolates_log_linearly():
+    counts = [0] * (len(RESPONSE_TIME_BUCKETS) + 1)
+    counts[10] = 4
+    lower, upper = RESPONSE_TIME_BUCKETS[9], RESPONSE_TIME_BUCKETS[10]
+    assert histogram_quantile(counts, 0.5) == pytest.approx(math.sqrt(lower * upper))
+    assert histogram_quantile(counts, 1.0) == pytest.approx(upper)
+
+
+def test_histogram_quantile_first_and_open_ended_buckets():
+    first = [2] + [0] * len(RESPONSE_TIME_BUCKETS)
+    assert histogram_quantile(first, 0.5) == pytest.approx(RESPONSE_TIME_BUCKETS[0] / 2)
+    last = [0] * len(RESPONSE_TIME_BUCKETS) + [3]
+    assert histogram_quantile(last, 0.99) == RESPONSE_TIME_BUCKETS[-1]
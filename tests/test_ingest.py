@@ -0,0 +1,40 @@
+"""Row validation for POST /api/results/bulk"""
+
+from datetime import datetime
+
+import pytest
+
+from trigger_server import InvalidRequest, parse_ingest_row
+
+
+def test_parse_ingest_row():
+    row = parse_ingest_row({
+        "model": " llama ",
+        "role": "coder",
+        "timestamp": "2026-02-03T04:05:06Z",
+        "score": 8,
+        "time": 1.25,
+        "breakdown": {"accuracy": 9}
+    })
+    assert row[:4] == ("llama", "coder", 8, 1.25)
+    assert row[4] is None and row[5] is None
+    assert row[6].adapted == {"accuracy": 9}
+    assert row[7] is True
+    assert row[8] == datetime.fromisoformat("2026-02-03T04:05:06+00:00")
+
+
+@pytest.mark.parametrize("row, message", [
+    ([], "row must be an object"),
+    ({"model": "m", "role": "r", "timestamp": "2026-01-01", "id": 1}, "Unknown field"),
+    ({"role": "r", "timestamp": "2026-01-01"}, "model is required"),
+    ({"model": "m", "role": " ", "timestamp": "2026-01-01"}, "role is required"),
+    ({"model": "m", "role": "r"}, "timestamp is required"),
+    ({"model": "m", "role": "r", "timestamp": "yesterday"}, "timestamp is required"),
+    ({"model": "m", "role": "r", "timestamp": "2026-01-01", "score": "8"}, "score must be a number"),
+    ({"model": "m", "role": "r", "timestamp": "2026-01-01", "time": True}, "time must be a number"),
+    ({"model": "m", "role": "r", "timestamp": "2026-01-01", "breakdown": [1]}, "breakdown must be an object"),
+    ({"model": "m", "role": "r", "timestamp": "2026-01-01", "success": "yes"}, "success must be true or false"),
+])
+def test_parse_ingest_row_rejects(row, message):
+    with pytest.raises(InvalidRequest, match=message):
+        parse_ingest_row(row)
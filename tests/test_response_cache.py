@@ -0,0 +1,53 @@
+"""ResponseCache TTL, LRU and size limits, invalidation, and cache key normalization"""
+
+import time
+
+from trigger_server import ResponseCache, _normalize_arg
+
+
+def test_hit_miss_and_ttl():
+    cache = ResponseCache(ttl=60)
+    assert cache.get("a") is None
+    cache.put("a", b"[1]", cache.generation)
+    cache.put("short", b"[2]", cache.generation, ttl=0.01)
+    assert cache.get("a") == b"[1]"
+    time.sleep(0.02)
+    assert cache.get("short") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["expired"], stats["entries"]) == (1, 2, 1, 1)
+
+
+def test_evicts_least_recently_used_by_count_and_bytes():
+    cache = ResponseCache(max_entries=2, max_bytes=10)
+    cache.put("a", b"aaa", cache.generation)
+    cache.put("b", b"bbb", cache.generation)
+    cache.get("a")  # "b" is now the least recently used
+    cache.put("c", b"ccc", cache.generation)
+    assert cache.get("b") is None
+    assert cache.get("a") == b"aaa" and cache.get("c") == b"ccc"
+
+    cache.put("big", b"x" * 8, cache.generation)
+    assert cache.get("a") is None and cache.get("c") is None
+    cache.put("huge", b"x" * 11, cache.generation)  # larger than the whole cache: never stored
+    assert cache.get("huge") is None and cache.get("big") == b"x" * 8
+    assert cache.stats()["bytes"] == 8
+
+
+def test_invalidate_drops_entries_and_stale_puts():
+    cache = ResponseCache()
+    cache.put("a", b"old", cache.generation)
+    generation = cache.generation  # a request starts computing its response...
+    cache.invalidate()  # ...and a job writes new results meanwhile
+    cache.put("a", b"stale", generation)
+    assert cache.get("a") is None
+    cache.put("a", b"new", cache.generation)
+    assert cache.get("a") == b"new"
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_normalized_args_share_a_cache_key():
+    assert _normalize_arg("model", ["b", " a", "b"]) == _normalize_arg("model", ["a", "b"])
+    assert _normalize_arg("minScore", ["7"]) == _normalize_arg("minScore", ["7.0"])
+    assert _normalize_arg("minScore", ["high"]) == ("high",)
+    assert _normalize_arg("summary", ["TRUE"]) == _normalize_arg("summary", ["true"])
+    assert _normalize_arg("role", ["Coder"]) != _normalize_arg("role", ["coder"])
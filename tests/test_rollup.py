@@ -0,0 +1,135 @@
+"""BenchmarkRollup reads against raw aggregation, in a scratch schema (needs Postgres, skipped without it)"""
+
+import functools
+
+import psycopg2
+import pytest
+
+from trigger_server import RESPONSE_TIME_BUCKETS, BenchmarkRollup, ConnectionPool, get_db_connection
+
+SCHEMA = "rollup_test"
+
+# Days ago, model, success, score, response time
+ROWS = [
+    (45.0, "m1", True, 9.0, 4.0),  # outside the window
+    (29.9, "m1", True, 5.0, 2.0),  # partial first day of the window
+    (29.9, "m2", False, None, 30.0),
+    (12.0, "m1", True, 7.5, 3.0),
+    (12.0, "m1", False, 2.0, None),
+    (1.0, "m2", True, 8.0, 11.0),
+    (0.01, "m1", True, 6.0, 0.4),
+]
+
+
+@pytest.fixture
+def pool():
+    try:
+        conn = get_db_connection(connect_timeout=3)
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"Postgres is not reachable: {e}")
+    cur = conn.cursor()
+    cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+    cur.execute(f"CREATE SCHEMA {SCHEMA}")
+    cur.execute(f"""
+        CREATE TABLE {SCHEMA}.benchmark_results (
+            id BIGSERIAL PRIMARY KEY,
+            model_name TEXT,
+            role_type TEXT,
+            quality_score DOUBLE PRECISION,
+            response_time DOUBLE PRECISION,
+            success BOOLEAN,
+            timestamp TIMESTAMP
+        )
+    """)
+    conn.commit()
+    pool = ConnectionPool(functools.partial(get_db_connection, options=f"-c search_path={SCHEMA}"),
+                          min_size=0, max_size=2)
+    yield pool
+    pool.close_all()
+    cur.execute(f"DROP SCHEMA {SCHEMA} CASCADE")
+    conn.commit()
+    conn.close()
+
+
+def insert(pool, rows):
+    with pool.connection() as conn:
+        cur = conn.cursor()
+        for days_ago, model, success, score, time in rows:
+            cur.execute("""
+                INSERT INTO benchmark_results (model_name, role_type, quality_score, response_time, success, timestamp)
+                VALUES (%s, 'coder', %s, %s, %s, LOCALTIMESTAMP - make_interval(secs => %s))
+            """, (model, score, time, success, days_ago * 86400))
+        conn.commit()
+
+
+def rounded(groups):
+    # Rollup and raw sums add the same values in a different order
+    return {key: tuple(round(value, 6) if isinstance(value, float) else value for value in values)
+            for key, values in groups.items()}
+
+
+def raw_groups(cur, days):
+    cur.execute("""
+        SELECT model_name, role_type, COUNT(*), COUNT(*) FILTER (WHERE success = true),
+               SUM(quality_score), COUNT(quality_score), SUM(response_time), COUNT(response_time), MAX(timestamp)
+        FROM benchmark_results
+        WHERE timestamp > NOW() - make_interval(days => %s)
+        GROUP BY 1, 2
+    """, (days,))
+    return rounded({row[0]: row[2:] for row in cur.fetchall()})
+
+
+def window_groups(rollup, cur, days):
+    return rounded({
+        group.model_name: (group.test_count, group.success_count, group.score_sum, group.score_count,
+                           group.time_sum, group.time_count, group.last_timestamp)
+        for group in rollup.window_groups(cur, days=days, ensure=False)
+    })
+
+
+def test_window_groups_match_raw_rows_before_and_after_refresh(pool):
+    rollup = BenchmarkRollup(pool)
+    insert(pool, ROWS)
+    rollup.refresh()
+    # Rows newer than the high-water mark are read raw until the next refresh
+    insert(pool, [(0.001, "m1", True, 3.0, 1.5), (0.001, "m3", True, 9.5, 2.5)])
+    with pool.connection() as conn:
+        cur = conn.cursor()
+        expected = raw_groups(cur, 30)
+        assert window_groups(rollup, cur, 30) == expected
+        assert set(expected) == {"m1", "m2", "m3"}
+
+        rollup.refresh()
+        assert window_groups(rollup, cur, 30) == expected
+        assert window_groups(rollup, cur, 7) == raw_groups(cur, 7)
+
+
+def test_window_histograms_match_raw_width_buckets(pool):
+    rollup = BenchmarkRollup(pool)
+    insert(pool, ROWS)
+    rollup.refresh()
+    insert(pool, [(0.001, "m1", True, 3.0, 120.0)])
+    with pool.connection() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT model_name, width_bucket(response_time, %s::float8[]), COUNT(*)
+            FROM benchmark_results
+            WHERE response_time IS NOT NULL AND timestamp > NOW() - INTERVAL '30 days'
+            GROUP BY 1, 2
+        """, (RESPONSE_TIME_BUCKETS,))
+        expected = {}
+        for model, bucket, count in cur.fetchall():
+            expected.setdefault((model, "coder"), [0] * (len(RESPONSE_TIME_BUCKETS) + 1))[bucket] = count
+        assert rollup.window_histograms(cur, days=30, ensure=False) == expected
+
+
+def test_rows_written_after_a_refresh_of_an_empty_table_are_visible(pool):
+    rollup = BenchmarkRollup(pool)
+    rollup.refresh()  # no rows yet: the high-water mark stays NULL
+    insert(pool, ROWS)
+    with pool.connection() as conn:
+        cur = conn.cursor()
+        assert window_groups(rollup, cur, 30) == raw_groups(cur, 30)
+        assert sum(sum(counts) for counts in rollup.window_histograms(cur, days=30, ensure=False).values()) == 5
+        trend = rollup.trend_buckets(cur, "day", 60, ensure=False)
+        assert sum(bucket.test_count for bucket in trend) == len(ROWS)
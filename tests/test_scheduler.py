@@ -0,0 +1,115 @@
+"""JobScheduler admission, priority order and per-model limits"""
+
+import threading
+
+import pytest
+
+from trigger_server import PRIORITY_BATCH, PRIORITY_TEST, BenchmarkJob, JobScheduler, QueueFull, SchedulerClosed
+
+
+def make_job(model, priority=PRIORITY_TEST):
+    return BenchmarkJob(model, ["python", "benchmark_model.py", "--model", model], model, priority=priority)
+
+
+class GatedRunner:
+    """Runs jobs only as fast as the test releases them, recording the start order"""
+
+    def __init__(self):
+        self.started = []
+        self.release = threading.Event()
+        self._cond = threading.Condition()
+
+    def __call__(self, job):
+        with self._cond:
+            self.started.append(job.model)
+            self._cond.notify_all()
+        self.release.wait(timeout=5)
+        job.transition("succeeded", persist=False)
+
+    def wait_started(self, count):
+        with self._cond:
+            assert self._cond.wait_for(lambda: len(self.started) >= count, timeout=5)
+
+
+@pytest.fixture
+def runner():
+    runner = GatedRunner()
+    yield runner
+    runner.release.set()
+
+
+def test_submit_is_all_or_nothing(saved_jobs, runner):
+    scheduler = JobScheduler(runner, workers=1, max_queue=3)
+    scheduler.submit([make_job("busy")])
+    runner.wait_started(1)
+
+    scheduler.submit([make_job("a"), make_job("b")])
+    with pytest.raises(QueueFull):
+        scheduler.submit([make_job("c"), make_job("d")])
+    stats = scheduler.stats()
+    assert (stats["queued"], stats["rejected"]) == (2, 2)
+
+
+def test_admission_counts_a_sharded_role_once(saved_jobs, runner):
+    scheduler = JobScheduler(runner, workers=1, max_queue=1)
+    role_job = make_job("m")
+    shards = [make_job("m") for _ in range(4)]
+    for shard in shards:
+        shard.parent = role_job
+    scheduler.submit(shards)
+    with pytest.raises(QueueFull):
+        scheduler.submit([make_job("other")])
+
+
+def test_higher_priority_jobs_overtake_queued_batch_cells(saved_jobs, runner):
+    scheduler = JobScheduler(runner, workers=1)
+    scheduler.submit([make_job("busy")])
+    runner.wait_started(1)
+
+    scheduler.submit([make_job("batch-1", PRIORITY_BATCH), make_job("batch-2", PRIORITY_BATCH)])
+    single = make_job("single")
+    scheduler.submit([single])
+    assert scheduler.position(single.id) == 1
+
+    runner.release.set()
+    runner.wait_started(4)
+    assert runner.started == ["busy", "single", "batch-1", "batch-2"]
+
+
+def test_per_model_limit_lets_other_models_through(saved_jobs, runner):
+    scheduler = JobScheduler(runner, workers=2, per_model_limit=1)
+    first, second, other = make_job("m"), make_job("m"), make_job("other")
+    scheduler.submit([first, second, other])
+    runner.wait_started(2)
+
+    assert sorted(runner.started) == ["m", "other"]
+    assert scheduler.position(second.id) == 1
+    assert scheduler.wait_reason(second.id) == "all 2 workers are busy"
+    assert second.wait_reason == "model m is already running (1 at a time)"
+
+
+def test_cancel_queued_job(saved_jobs, runner):
+    scheduler = JobScheduler(runner, workers=1)
+    scheduler.submit([make_job("busy")])
+    runner.wait_started(1)
+    queued = make_job("queued")
+    scheduler.submit([queued])
+
+    assert scheduler.cancel(queued.id) is queued
+    assert queued.state == "cancelled"
+    assert scheduler.position(queued.id) is None
+    assert queued in saved_jobs
+
+
+def test_shutdown_rejects_new_jobs_and_interrupts_queued_ones(saved_jobs, runner):
+    scheduler = JobScheduler(runner, workers=1)
+    scheduler.submit([make_job("busy")])
+    runner.wait_started(1)
+    queued = make_job("queued")
+    scheduler.submit([queued])
+
+    threading.Timer(0.2, runner.release.set).start()  # the running job finishes within the grace period
+    assert scheduler.shutdown(grace=5) == (1, 0)
+    assert queued.state == "interrupted"
+    with pytest.raises(SchedulerClosed):
+        scheduler.submit([make_job("late")])
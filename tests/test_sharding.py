@@ -0,0 +1,103 @@
+"""Splitting role jobs into --role-test shards and folding the shards back into the role job"""
+
+import threading
+
+import pytest
+
+import trigger_server
+from trigger_server import BenchmarkJob, JobScheduler, build_benchmark_command, shard_role_jobs
+
+TESTS = {"coder": ["c1", "c2", "c3"], "single": ["s1"], "unlabelled": ["u1", None]}
+
+
+def role_job(model, role, test_id=""):
+    cmd, test_type = build_benchmark_command(model, role, test_id)
+    return BenchmarkJob(model, cmd, test_type, role=role, test_id=test_id)
+
+
+@pytest.fixture
+def sharding(monkeypatch, saved_jobs):
+    durations = {("m", "coder", "c1"): 5.0, ("m", "coder", "c3"): 20.0, ("other", "coder", "c2"): 40.0}
+    monkeypatch.setattr(trigger_server, "ROLE_SHARDING", True)
+    monkeypatch.setattr(trigger_server, "role_test_ids", lambda: TESTS)
+    monkeypatch.setattr(trigger_server.job_store, "test_durations", lambda models, roles: durations)
+    return durations
+
+
+def test_shards_run_longest_expected_first(sharding):
+    job = role_job("m", "coder")
+    units = shard_role_jobs([job])
+    assert set(units) == set(job.shards) and len(units) == 3
+    # c2 has no history for this model: it gets the mean of the model's other coder tests
+    assert [(shard.test_id, shard.expected_seconds) for shard in units] == [("c3", 20.0), ("c2", 12.5), ("c1", 5.0)]
+    assert all(shard.parent is job and shard.cmd[-2:] == ["--role-test", shard.test_id] for shard in units)
+    assert job.expected_seconds == 37.5
+
+
+def test_only_multi_test_roles_are_split(sharding):
+    jobs = [role_job("m", "single"), role_job("m", "coder", "c1"), role_job("m", ""), role_job("m", "unlabelled")]
+    assert shard_role_jobs(jobs) == jobs
+    assert not any(job.shards for job in jobs)
+
+
+def test_sharding_off_or_without_history(sharding, monkeypatch):
+    monkeypatch.setattr(trigger_server, "ROLE_SHARDING", False)
+    job = role_job("m", "coder")
+    assert shard_role_jobs([job]) == [job]
+
+    def unavailable(models, roles):
+        raise RuntimeError("registry down")
+
+    monkeypatch.setattr(trigger_server, "ROLE_SHARDING", True)
+    monkeypatch.setattr(trigger_server.job_store, "test_durations", unavailable)
+    shards = shard_role_jobs([role_job("m", "coder")])
+    assert [shard.test_id for shard in shards] == ["c1", "c2", "c3"]
+
+
+def finish(job, state):
+    job.transition("running", persist=False)
+    job.transition(state, persist=False, returncode=0 if state == "succeeded" else 1)
+    return job.parent.on_shard_finished(job)
+
+
+@pytest.mark.parametrize("states, outcome", [
+    (["succeeded", "succeeded", "succeeded"], "succeeded"),
+    (["succeeded", "failed", "timeout"], "failed"),
+    (["cancelled", "cancelled", "cancelled"], "cancelled"),
+])
+def test_role_job_follows_its_shards(sharding, states, outcome):
+    job = role_job("m", "coder")
+    shard_role_jobs([job])
+    job.on_shard_started(job.shards[0])
+    job.on_shard_started(job.shards[1])
+    assert job.state == "running" and [t["state"] for t in job.transitions].count("running") == 1
+
+    done = [finish(shard, state) for shard, state in zip(job.shards, states)]
+    assert done == [False, False, True]
+    assert job.state == outcome
+    assert job.progress == {"current": 3, "total": 3}
+    if outcome == "failed":
+        assert job.error.startswith("2/3 tests did not succeed")
+
+
+def test_scheduler_addresses_shards_by_role_job_id(sharding):
+    release = threading.Event()
+    started = threading.Event()
+
+    def runner(job):
+        started.set()
+        release.wait(timeout=5)
+        job.transition("succeeded", persist=False)
+
+    scheduler = JobScheduler(runner, workers=1)
+    scheduler.submit([role_job("busy", "")])
+    assert started.wait(timeout=5)
+    job = role_job("m", "coder")
+    scheduler.submit(shard_role_jobs([job]))
+
+    assert scheduler.position(job.id) == 1
+    assert scheduler.cancel(job.id) is job
+    assert {shard.state for shard in job.shards} == {"cancelled"}
+    assert job.state == "cancelled"
+    assert scheduler.position(job.id) is None
+    release.set()
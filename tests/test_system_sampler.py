@@ -0,0 +1,40 @@
+"""SystemSampler's ring buffer of host samples"""
+
+import time
+
+import pytest
+
+from trigger_server import SystemSampler, psutil
+
+
+@pytest.fixture
+def sampler():
+    # A long interval keeps the background thread from adding samples during the test
+    return SystemSampler(interval=3600, history=5)
+
+
+def test_latest_and_series_read_the_ring_buffer(sampler):
+    assert sampler.latest() is None
+    for index in range(8):
+        sampler._samples.append({"index": index})
+    assert sampler.latest() == {"index": 7}
+    assert [sample["index"] for sample in sampler.series(3 * 3600)] == [5, 6, 7]
+    assert [sample["index"] for sample in sampler.series(100 * 3600)] == [3, 4, 5, 6, 7]
+    assert len(sampler.series(0)) == 1
+
+
+def test_start_is_idempotent(sampler):
+    sampler.start()
+    thread = sampler._thread
+    sampler.latest()
+    assert sampler._thread is thread and thread.daemon
+
+
+@pytest.mark.skipif(psutil is None, reason="psutil is not installed")
+def test_sample_does_not_block():
+    started = time.monotonic()
+    sample = SystemSampler().sample()
+    assert time.monotonic() - started < 0.5  # psutil.cpu_percent(interval=1) would take a second
+    assert 0 <= sample["cpu_percent"] <= 100
+    assert sample["memory_available_mb"] > 0
+    assert sample["jobs"] == []
@@ -0,0 +1,77 @@
+"""Regression detection and the rollup + raw-tail merge behind /api/trends"""
+
+import math
+import statistics
+from datetime import datetime
+from statistics import NormalDist
+
+import pytest
+
+from trigger_server import RegressionDetector, TrendBucket, build_trend_series
+
+
+def moments(values):
+    return len(values), sum(values), sum(value * value for value in values)
+
+
+def test_variance_from_moments_matches_statistics():
+    values = [3.5, 7.25, 8.0, 4.5, 9.75]
+    assert RegressionDetector.variance(*moments(values)) == pytest.approx(statistics.variance(values))
+    assert RegressionDetector.variance(1, 4.0, 16.0) == 0.0
+
+
+def test_welch_p_value():
+    baseline = [8.0, 8.2, 7.9, 8.1, 8.3, 7.8, 8.0, 8.2]
+    current = [7.1, 7.4, 7.0, 7.3, 7.2, 6.9, 7.5, 7.2]
+    detector = RegressionDetector(-1, 0.1, baseline=1, alpha=0.05, min_samples=5)
+    assert detector.update(*moments(baseline)) is None
+
+    flagged = detector.update(*moments(current))
+    stderr = math.sqrt(statistics.variance(current) / len(current) + statistics.variance(baseline) / len(baseline))
+    z = (statistics.mean(baseline) - statistics.mean(current)) / stderr
+    assert flagged["p_value"] == pytest.approx(1 - NormalDist().cdf(z), rel=1e-2)
+    assert flagged["change"] == pytest.approx(statistics.mean(current) - statistics.mean(baseline), abs=0.01)
+    assert flagged["samples"] == len(current)
+    assert flagged["baseline_samples"] == len(baseline)
+
+
+def test_regression_detector_ignores_improvements_small_samples_and_noise():
+    improving = RegressionDetector(-1, 0.1, baseline=1, min_samples=3)
+    improving.update(*moments([7.0, 7.1, 6.9]))
+    assert improving.update(*moments([8.0, 8.1, 7.9])) is None
+
+    small = RegressionDetector(-1, 0.1, baseline=1, min_samples=5)
+    small.update(*moments([8.0, 8.1, 7.9]))
+    assert small.update(*moments([6.0, 6.1, 5.9])) is None
+
+    noisy = RegressionDetector(-1, 0.1, baseline=1, min_samples=3, alpha=0.05)
+    noisy.update(*moments([2.0, 9.0, 5.0, 8.0]))
+    assert noisy.update(*moments([1.0, 9.5, 4.0, 7.0])) is None
+
+
+def test_regression_detector_window_slides():
+    detector = RegressionDetector(1, 0.1, relative=True, baseline=2, min_samples=3)
+    for values in ([10.0, 11.0, 9.0], [10.0, 10.5, 9.5], [30.0, 31.0, 29.0]):
+        detector.update(*moments(values))
+    # The 30s bucket is now part of the baseline, so 20s reads as faster, not a regression
+    assert detector.update(*moments([20.0, 21.0, 19.0])) is None
+
+
+def test_trend_series_merges_rollup_and_raw_tail_sums():
+    rolled_up = [7.0, 8.0, 9.0]  # days already in the rollup
+    tail = [6.0, 10.0]  # today's rows, aggregated from benchmark_results
+    times_rolled_up, times_tail = [1.5, 2.5, 3.0], [4.0, 1.0]
+    count, total, sq_total = (a + b for a, b in zip(moments(rolled_up), moments(tail)))
+    time_count, time_total, time_sq = (a + b for a, b in zip(moments(times_rolled_up), moments(times_tail)))
+    bucket = TrendBucket("m", "r", datetime(2026, 1, 5), 5, 4, total, count, sq_total, time_total, time_count, time_sq)
+
+    [series] = build_trend_series([bucket], baseline=4, alpha=0.05)
+    [point] = series["points"]
+    merged = rolled_up + tail
+    assert point["start"] == "2026-01-05"
+    assert point["test_count"] == 5
+    assert point["success_rate"] == 80.0
+    assert point["score"] == pytest.approx(statistics.mean(merged), abs=0.005)
+    assert point["score_std"] == pytest.approx(statistics.stdev(merged), abs=0.005)
+    assert point["time"] == pytest.approx(statistics.mean(times_rolled_up + times_tail), abs=0.005)
+    assert series["regressions"] == []
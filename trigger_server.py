@@ -2,88 +2,2888 @@
 """
 Lightweight Flask server to trigger benchmark tests
 Designed to work with existing benchmark_model.py system
+
+Run `python trigger_server.py` for the production server (waitress, one
+process with SERVER_THREADS threads; the job queue, event streams and caches
+live in-process, so don't fork multiple workers). `--dev` keeps the Flask
+development server.
+
+BENCHMARK_WORKER_MODE=warm runs benchmarks in pre-started interpreters
+(benchmark_worker.py) instead of a fresh `python benchmark_model.py` per job.
 """
 
-from flask import Flask, request, jsonify
-from flask_cors import CORS
-import subprocess
-import threading
-import os
-import logging
-import json
-from datetime import datetime
-from pathlib import Path
-import psycopg2
+from flask import Flask, request, jsonify, Response, stream_with_context, g
+from flask_cors import CORS
+import subprocess
+import threading
+import os
+import uuid
+import logging
+import json
+import csv
+import io
+import base64
+import hashlib
+import queue
+import functools
+import gzip
+import argparse
+import bisect
+import math
+import signal
+import socket
+import sys
+import re
+from datetime import datetime, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+from pathlib import Path
+import time
+from collections import deque, OrderedDict
+from contextlib import contextmanager
+import psycopg2
+from psycopg2.extras import Json, execute_values
+
+try:
+    import psutil
+except ImportError:  # metrics degrade to zeros without psutil
+    psutil = None
+
+try:
+    import brotli
+except ImportError:  # compressed responses fall back to gzip
+    brotli = None
+
+app = Flask(__name__)
+CORS(app, origins=["http://localhost:3000", "http://localhost:3001", "http://localhost:3002", "http://localhost:3003", "https://*.gtabhishek.com"], 
+     methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+     allow_headers=["Content-Type", "Authorization", "X-Requested-With"])
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Configuration for Docker environment
+BENCHMARK_SCRIPT_PATH = Path("/workspace/benchmark_model.py")
+WORKING_DIR = Path("/workspace")
+
+# Serving settings
+SERVER_HOST = os.environ.get("SERVER_HOST", "0.0.0.0")
+SERVER_PORT = int(os.environ.get("SERVER_PORT", "5000"))
+SERVER_THREADS = int(os.environ.get("SERVER_THREADS", "32"))  # request threads (SSE streams and exports hold one each)
+# Open /jobs/<id>/events streams beyond this answer 503, so streams never take the threads ordinary requests need
+SSE_MAX_SUBSCRIBERS = int(os.environ.get("SSE_MAX_SUBSCRIBERS", str(max(1, SERVER_THREADS // 2))))
+SHUTDOWN_GRACE = float(os.environ.get("SHUTDOWN_GRACE", "30"))  # seconds running jobs get to finish on SIGTERM
+
+# Job scheduler settings
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "2"))  # concurrent benchmark subprocesses
+JOB_QUEUE_MAX = int(os.environ.get("JOB_QUEUE_MAX", "50"))  # pending jobs (a sharded role counts once) before /run-* returns 429
+JOB_PER_MODEL_LIMIT = int(os.environ.get("JOB_PER_MODEL_LIMIT", "1"))  # concurrent runs per model
+JOB_TIMEOUT = float(os.environ.get("JOB_TIMEOUT", "600"))  # used when a model/role has too little history
+JOB_TIMEOUT_MULTIPLIER = float(os.environ.get("JOB_TIMEOUT_MULTIPLIER", "3"))  # safety factor over the expected run time
+JOB_TIMEOUT_FLOOR = float(os.environ.get("JOB_TIMEOUT_FLOOR", "120"))  # covers model load for short runs
+JOB_TIMEOUT_CEILING = float(os.environ.get("JOB_TIMEOUT_CEILING", "7200"))
+JOB_TIMEOUT_QUANTILE = 0.95  # per-test response_time quantile the expected run time is built from
+JOB_TIMEOUT_MIN_SAMPLES = 5  # results a (model, role) needs before its history is trusted
+JOB_KILL_GRACE = 5  # seconds a timed-out process group gets between SIGTERM and SIGKILL
+JOB_OUTPUT_DRAIN = 5  # seconds to finish reading output once the process has exited
+JOB_OUTPUT_LIMIT = 20000  # characters of stderr kept per job in the job registry
+JOB_EVENT_HISTORY = 500  # events replayed to late /jobs/<id>/events subscribers
+JOB_EVENT_JOBS_KEPT = 200  # finished jobs whose event history stays replayable
+
+# Resource-aware scheduling: hold launches back while the host lacks CPU/RAM headroom (needs psutil)
+RESOURCE_SCHEDULING = os.environ.get("RESOURCE_SCHEDULING", "1") != "0"
+RESOURCE_MAX_CPU_PERCENT = float(os.environ.get("RESOURCE_MAX_CPU_PERCENT", "90"))  # no new launch above this (0 = ignore CPU)
+RESOURCE_MIN_FREE_MB = float(os.environ.get("RESOURCE_MIN_FREE_MB", "1024"))  # RAM kept free after a launch's expected peak
+RESOURCE_DEFAULT_JOB_MB = float(os.environ.get("RESOURCE_DEFAULT_JOB_MB", "0"))  # expected peak for models with no history
+RESOURCE_STARVATION_SECONDS = float(os.environ.get("RESOURCE_STARVATION_SECONDS", "300"))  # then smaller jobs stop overtaking
+RESOURCE_MEMORY_HISTORY = 5  # recent peaks per model; the estimate is their maximum
+
+# Warm workers: run jobs in long-lived interpreters (benchmark_worker.py) instead of a fresh process each
+BENCHMARK_WORKER_MODE = os.environ.get("BENCHMARK_WORKER_MODE", "subprocess")  # "subprocess" or "warm"
+WARM_WORKER_MAX_JOBS = int(os.environ.get("WARM_WORKER_MAX_JOBS", "50"))  # recycle a worker after this many jobs
+WARM_WORKER_MAX_RSS_MB = float(os.environ.get("WARM_WORKER_MAX_RSS_MB", "2048"))  # ...or once it holds this much memory
+WORKER_SCRIPT_PATH = Path(__file__).resolve().with_name("benchmark_worker.py")
+SSE_KEEPALIVE = 15  # seconds between SSE keep-alive comments
+BATCH_MAX_PARALLEL = int(os.environ.get("BATCH_MAX_PARALLEL", str(JOB_WORKERS)))  # cells of one batch running at once
+BATCH_DEADLINE = float(os.environ.get("BATCH_DEADLINE", str(4 * 3600)))  # wall-clock cap for a whole batch (seconds)
+BATCHES_KEPT = 50  # finished batches kept in memory; older ones are rebuilt from the registry on request
+# Run a role's tests as separate --role-test jobs: "1", "0", or "auto" (default). Each shard pays its own
+# process start and model load, so "auto" only shards when a model's shards can overlap
+# (JOB_PER_MODEL_LIMIT > 1) or warm workers make the per-shard start cheap
+ROLE_SHARDING_MODE = os.environ.get("ROLE_SHARDING", "auto")
+ROLE_SHARDING = ROLE_SHARDING_MODE == "1" or (
+    ROLE_SHARDING_MODE == "auto" and (JOB_PER_MODEL_LIMIT > 1 or BENCHMARK_WORKER_MODE == "warm")
+)
+TEST_DURATION_HISTORY = int(os.environ.get("TEST_DURATION_HISTORY", "10"))  # recent shard runs averaged to order shards
+RUN_FRESHNESS_WINDOW = float(os.environ.get("RUN_FRESHNESS_WINDOW", "0"))  # reuse a succeeded identical run this recent (seconds, 0 = off)
+
+# Lower value runs first: interactive single tests jump ahead of batch fan-out
+PRIORITY_TEST = 0
+PRIORITY_BATCH = 10
+
+ACTIVE_STATES = ("queued", "running")
+TERMINAL_STATES = ("succeeded", "failed", "timeout", "cancelled", "rejected", "interrupted", "skipped")
+DONE_CELL_STATES = ("succeeded", "skipped")  # batch cells a resumed batch does not run again
+
+# Dashboard rollup settings
+DASHBOARD_WINDOW_DAYS = 30
+ROLLUP_REFRESH_INTERVAL = float(os.environ.get("ROLLUP_REFRESH_INTERVAL", "300"))  # seconds between scheduled refreshes
+
+# Response cache settings
+RESPONSE_CACHE_TTL = float(os.environ.get("RESPONSE_CACHE_TTL", "60"))  # seconds
+RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get("RESPONSE_CACHE_MAX_ENTRIES", "256"))
+RESPONSE_CACHE_MAX_BYTES = int(os.environ.get("RESPONSE_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+# System metrics sampler settings
+SYSTEM_SAMPLE_INTERVAL = float(os.environ.get("SYSTEM_SAMPLE_INTERVAL", "2"))  # seconds between samples
+SYSTEM_SAMPLE_HISTORY = int(os.environ.get("SYSTEM_SAMPLE_HISTORY", "300"))  # samples kept (10 min at 2s)
+
+# Bulk export settings
+EXPORT_BATCH_ROWS = int(os.environ.get("EXPORT_BATCH_ROWS", "500"))  # rows per server-side cursor fetch / output chunk
+
+# Benchmark detail payloads
+DETAIL_PREVIEW_CHARS = 2000  # must match response_preview in sql/migrations/0002_benchmark_results_preview.sql
+DETAIL_CHUNK_CHARS = int(os.environ.get("DETAIL_CHUNK_CHARS", "50000"))  # default "load more" chunk
+DETAIL_CHUNK_MAX = int(os.environ.get("DETAIL_CHUNK_MAX", "500000"))
+COMPRESS_MIN_BYTES = int(os.environ.get("COMPRESS_MIN_BYTES", "1024"))  # smaller bodies aren't worth compressing
+
+# Bulk result ingestion
+BULK_INGEST_MAX_ROWS = int(os.environ.get("BULK_INGEST_MAX_ROWS", "10000"))  # rows accepted per /api/results/bulk request
+BULK_INGEST_PAGE_ROWS = 1000  # rows per multi-row INSERT statement
+
+# Local-readiness thresholds used by the performance matrix
+LOCAL_READY_SCORE = 7.5
+LOCAL_READY_TIME = 15
+HYBRID_SCORE = 7.0
+HYBRID_TIME = 30
+READINESS_TIME_METRIC = os.environ.get("READINESS_TIME_METRIC", "mean")  # "mean" or "p90" response time
+READINESS_TIME_METRICS = ("mean", "p50", "p90", "p99")
+
+# Response-time histogram buckets (upper bounds, seconds): log-spaced 0.1s..~1h, ~15% wide,
+# so percentiles read back from merged daily histograms are within a few percent.
+# Changing them requires rebuilding the rollup (DELETE FROM benchmark_rollup_state).
+RESPONSE_TIME_BUCKETS = [round(0.1 * 10 ** (k / 16), 4) for k in range(74)]
+PERCENTILES = (0.5, 0.9, 0.99)
+
+# Trend and regression detection settings
+TREND_BUCKETS = ("day", "week", "month")
+TREND_DEFAULT_DAYS = 180
+TREND_BASELINE_BUCKETS = int(os.environ.get("TREND_BASELINE_BUCKETS", "4"))  # previous buckets pooled as the baseline
+TREND_ALPHA = float(os.environ.get("TREND_ALPHA", "0.01"))  # one-sided significance level
+TREND_MIN_SAMPLES = int(os.environ.get("TREND_MIN_SAMPLES", "5"))  # per bucket and per baseline
+TREND_MIN_SCORE_DROP = float(os.environ.get("TREND_MIN_SCORE_DROP", "0.5"))  # score points
+TREND_MIN_TIME_INCREASE = float(os.environ.get("TREND_MIN_TIME_INCREASE", "0.2"))  # fraction of the baseline time
+
+# Database settings (defaults match the Docker compose services)
+DB_HOST = os.environ.get("DB_HOST", "postgres")  # Docker service name
+DB_NAME = os.environ.get("DB_NAME", "db")
+DB_USER = os.environ.get("DB_USER", "user")
+DB_PASSWORD = os.environ.get("DB_PASSWORD", "password")
+DB_PORT = int(os.environ.get("DB_PORT", "5432"))
+
+# Connection pool settings
+DB_POOL_MIN = int(os.environ.get("DB_POOL_MIN", "1"))
+DB_POOL_MAX = int(os.environ.get("DB_POOL_MAX", "10"))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "10"))  # seconds to wait for a free connection
+DB_POOL_HEALTHCHECK_IDLE = float(os.environ.get("DB_POOL_HEALTHCHECK_IDLE", "30"))  # ping connections idle longer than this
+
+# Prometheus metrics (served as text on /metrics)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)  # seconds
+JOB_TIME_BUCKETS = (0.1, 0.5, 1, 5, 10, 30, 60, 120, 300, 600, 1200, 1800, 3600, 7200)  # seconds
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter per label combination"""
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for labels, value in values:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """Fixed-bucket histogram per label combination; observe() is a bisect and a locked add"""
+
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [per-bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)  # first bound >= value, i.e. le semantics
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self):
+        with self._lock:
+            snapshot = sorted((labels, list(series)) for labels, series in self._series.items())
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, series in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = (("le", _format_value(float(bound))),)
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """Point-in-time values read from `collect()` (returning {labels tuple: value}) at scrape time"""
+
+    def __init__(self, name, help_text, labelnames, collect):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._collect = collect
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge"]
+        for labels, value in sorted(self._collect().items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collects metrics and renders them in the Prometheus text exposition format"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                logging.error(f"Metrics collection failed for {metric.name}: {e}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+http_request_seconds = metrics.register(Histogram(
+    "trigger_http_request_duration_seconds",
+    "Time to produce a response (to first byte for streamed responses)",
+    ("route", "method", "status")
+))
+db_query_seconds = metrics.register(Histogram(
+    "trigger_db_query_duration_seconds",
+    "Postgres statement execution time by calling function",
+    ("site",)
+))
+job_queue_wait_seconds = metrics.register(Histogram(
+    "trigger_job_queue_wait_seconds",
+    "Time benchmark jobs spent queued before a worker started them",
+    ("kind",),
+    JOB_TIME_BUCKETS
+))
+job_run_seconds = metrics.register(Histogram(
+    "trigger_job_run_seconds",
+    "Benchmark subprocess run time by outcome",
+    ("kind", "outcome"),
+    JOB_TIME_BUCKETS
+))
+jobs_finished_total = metrics.register(Counter(
+    "trigger_jobs_finished_total",
+    "Benchmark jobs reaching a terminal state",
+    ("kind", "outcome")
+))
+
+
+def query_site(frame):
+    """Name of the function that issued a query, skipping psycopg2 helpers like execute_values"""
+    while frame is not None and frame.f_globals.get("__name__", "").startswith("psycopg2"):
+        frame = frame.f_back
+    if frame is None:
+        return "unknown"
+    code = frame.f_code
+    return getattr(code, "co_qualname", code.co_name)  # co_qualname is Python 3.11+
+
+
+class TimedCursor(psycopg2.extensions.cursor):
+    """Cursor recording each execute() in db_query_seconds, labelled by its call site"""
+
+    def execute(self, query, vars=None):
+        started = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            db_query_seconds.observe(time.perf_counter() - started, query_site(sys._getframe(1)))
+
+    def executemany(self, query, vars_list):
+        started = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            db_query_seconds.observe(time.perf_counter() - started, query_site(sys._getframe(1)))
+
+
+# Database connection helper
+def get_db_connection(**options):
+    """Connect to Postgres database"""
+    return psycopg2.connect(
+        host=DB_HOST,
+        database=DB_NAME,
+        user=DB_USER,
+        password=DB_PASSWORD,
+        port=DB_PORT,
+        **options
+    )
+
+
+class PoolTimeout(Exception):
+    """Raised when no pooled connection frees up within DB_POOL_TIMEOUT"""
+
+
+class ConnectionPool:
+    """Thread-safe Postgres connection pool with checkout health checks and stats"""
+
+    def __init__(self, connect, min_size=1, max_size=10, timeout=10.0, healthcheck_idle=30.0):
+        self._connect = connect
+        self.min_size = max(0, min_size)
+        self.max_size = max(1, max_size, self.min_size)
+        self.timeout = timeout
+        self.healthcheck_idle = healthcheck_idle
+        self._idle = deque()  # (connection, returned_at)
+        self._in_use = 0
+        self._cond = threading.Condition()
+        self._stats = {
+            "connections_opened": 0,
+            "connections_discarded": 0,
+            "checkouts": 0,
+            "waits": 0,
+            "wait_timeouts": 0,
+            "healthcheck_failures": 0,
+        }
+        self._checkout_total_ms = 0.0
+        self._checkout_max_ms = 0.0
+
+    def _open(self):
+        conn = self._connect()
+        with self._cond:
+            self._stats["connections_opened"] += 1
+        return conn
+
+    def _is_healthy(self, conn, idle_for):
+        """Cheap liveness check; only pings connections that sat idle for a while"""
+        if conn.closed:
+            return False
+        if idle_for < self.healthcheck_idle:
+            return True
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT 1")
+            cur.fetchone()
+            cur.close()
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _close_quietly(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def warm(self):
+        """Open connections up to min_size so the first requests skip the handshake"""
+        while True:
+            with self._cond:
+                if len(self._idle) + self._in_use >= self.min_size:
+                    return
+                self._in_use += 1
+            try:
+                conn = self._open()
+            except Exception:
+                with self._cond:
+                    self._in_use -= 1
+                    self._cond.notify()
+                raise
+            self.release(conn)
+
+    def acquire(self):
+        """Check out a healthy connection, opening or waiting for one as needed"""
+        started = time.monotonic()
+        deadline = started + self.timeout
+        waited = False
+        while True:
+            conn = None
+            with self._cond:
+                while not self._idle and self._in_use >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["wait_timeouts"] += 1
+                        raise PoolTimeout(f"No database connection available within {self.timeout}s")
+                    if not waited:
+                        waited = True
+                        self._stats["waits"] += 1
+                    self._cond.wait(remaining)
+                if self._idle:
+                    conn, returned_at = self._idle.pop()
+                else:
+                    returned_at = None
+                self._in_use += 1
+
+            try:
+                if conn is None:
+                    conn = self._open()
+                elif not self._is_healthy(conn, time.monotonic() - returned_at):
+                    # Stale socket (e.g. Postgres restarted): drop it and reconnect
+                    with self._cond:
+                        self._stats["healthcheck_failures"] += 1
+                        self._stats["connections_discarded"] += 1
+                    self._close_quietly(conn)
+                    conn = self._open()
+            except Exception:
+                with self._cond:
+                    self._in_use -= 1
+                    self._cond.notify()
+                raise
+
+            elapsed_ms = (time.monotonic() - started) * 1000
+            with self._cond:
+                self._stats["checkouts"] += 1
+                self._checkout_total_ms += elapsed_ms
+                self._checkout_max_ms = max(self._checkout_max_ms, elapsed_ms)
+            return conn
+
+    def release(self, conn, discard=False):
+        """Return a connection to the pool, dropping it if it is broken"""
+        if not discard and not conn.closed:
+            try:
+                # Never hand the next caller an open (or aborted) transaction
+                if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except psycopg2.Error:
+                discard = True
+        discard = discard or conn.closed
+        with self._cond:
+            self._in_use -= 1
+            if discard:
+                self._stats["connections_discarded"] += 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+        if discard:
+            self._close_quietly(conn)
+
+    @contextmanager
+    def connection(self):
+        """Context manager: check out a connection and always give it back.
+
+        Released in `finally` so a generator closed mid-iteration (GeneratorExit,
+        e.g. a client dropping a streamed export) still returns its connection.
+        """
+        conn = self.acquire()
+        discard = False
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            # Connection-level failure; don't put a dead socket back in the pool
+            discard = True
+            raise
+        finally:
+            self.release(conn, discard=discard)
+
+    def close_all(self):
+        """Close every idle connection (checked-out ones are closed on release)"""
+        with self._cond:
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+        for conn in idle:
+            self._close_quietly(conn)
+
+    def stats(self):
+        """Snapshot of pool usage for /api/system-health"""
+        with self._cond:
+            checkouts = self._stats["checkouts"]
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                **self._stats,
+                "avg_checkout_ms": round(self._checkout_total_ms / checkouts, 2) if checkouts else 0,
+                "max_checkout_ms": round(self._checkout_max_ms, 2),
+            }
+
+
+db_pool = ConnectionPool(
+    functools.partial(get_db_connection, cursor_factory=TimedCursor),
+    min_size=DB_POOL_MIN,
+    max_size=DB_POOL_MAX,
+    timeout=DB_POOL_TIMEOUT,
+    healthcheck_idle=DB_POOL_HEALTHCHECK_IDLE
+)
+
+
+def db_connection():
+    """Borrow a pooled connection: `with db_connection() as conn: ...`"""
+    return db_pool.connection()
+
+# Benchmark job scheduler
+class QueueFull(Exception):
+    """Raised when the scheduler cannot admit more jobs"""
+
+
+class SchedulerClosed(Exception):
+    """Raised when jobs are submitted while the server is shutting down"""
+
+
+class BenchmarkJob:
+    """One benchmark_model.py invocation tracked by the scheduler.
+
+    A role job split by shard_role_jobs() runs nothing itself: its `shards`
+    (one --role-test job each) are scheduled instead, and its state follows
+    theirs.
+    """
+
+    def __init__(self, model, cmd, test_type, role="", test_id="", kind="test", priority=PRIORITY_TEST):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.model = model
+        self.role = role
+        self.test_id = test_id
+        self.cmd = cmd
+        self.test_type = test_type
+        self.priority = priority
+        self.state = "queued"
+        self.created_at = datetime.now()
+        self.started_at = None
+        self.finished_at = None
+        self.returncode = None
+        self.error = None
+        self.stderr = None
+        self.batch = None
+        self.process = None
+        self.cancel_requested = False
+        self.progress = None
+        self.coalesced = 0  # identical /run-test requests merged onto this job
+        self.wait_reason = None  # why the scheduler last passed over this queued job
+        self.resource_wait_since = None  # monotonic time it started waiting on CPU/RAM headroom
+        self.memory_baseline_mb = None  # host available RAM at launch, when it started alone
+        self.peak_memory_mb = None  # highest memory use seen while running
+        self.timeout = None  # seconds, set when the job starts
+        self.timeout_basis = None
+        self.parent = None  # role job this shard belongs to
+        self.shards = []
+        self.expected_seconds = None  # historical mean run time, used to balance shards
+        self._shard_lock = threading.Lock()
+        self.transitions = [{"state": "queued", "at": self.created_at.isoformat()}]
+
+    def transition(self, state, persist=True, **fields):
+        """Move the job to a new state, stamping timings and recording it in the job registry"""
+        now = datetime.now()
+        for name, value in fields.items():
+            setattr(self, name, value)
+        self.state = state
+        # Job metrics count what actually ran: a sharded role job's shards, not the role job
+        if state == "running":
+            self.started_at = now
+            if not self.shards:
+                job_queue_wait_seconds.observe((now - self.created_at).total_seconds(), self.kind)
+        elif state in TERMINAL_STATES:
+            self.finished_at = now
+            if not self.shards:
+                jobs_finished_total.inc(self.kind, state)
+                if self.started_at:
+                    job_run_seconds.observe((now - self.started_at).total_seconds(), self.kind, state)
+        self.transitions.append({"state": state, "at": now.isoformat()})
+        job_events.publish(self.id, "state", {"state": state, "at": now.isoformat(), "error": self.error})
+        if state in TERMINAL_STATES:
+            job_events.close(self.id)
+        if persist:
+            job_store.save(self)
+
+    @property
+    def duration(self):
+        """Seconds the subprocess ran, None until the job has started and finished"""
+        if self.started_at and self.finished_at:
+            return (self.finished_at - self.started_at).total_seconds()
+        return None
+
+    def units(self):
+        """Jobs the scheduler actually runs for this one: its shards, or itself"""
+        return self.shards or [self]
+
+    def on_shard_started(self, shard):
+        """First shard to start moves the role job to running"""
+        with self._shard_lock:
+            if self.state != "queued":
+                return
+            self.transition("running")
+
+    def on_shard_finished(self, shard):
+        """Fold a finished shard into the role job; True once that finished the role job too"""
+        with self._shard_lock:
+            if self.state in TERMINAL_STATES:
+                return False
+            finished = [job for job in self.shards if job.state in TERMINAL_STATES]
+            self.progress = {"current": len(finished), "total": len(self.shards)}
+            job_events.publish(self.id, "shard", {"job_id": shard.id, "test_id": shard.test_id, "state": shard.state})
+            job_events.publish(self.id, "progress", self.progress)
+            if len(finished) < len(self.shards):
+                return False
+            unsuccessful = [job for job in self.shards if job.state != "succeeded"]
+            peaks = [job.peak_memory_mb for job in self.shards if job.peak_memory_mb]
+            self.peak_memory_mb = max(peaks) if peaks else None
+            if not unsuccessful:
+                self.transition("succeeded", returncode=0)
+                return True
+            # One shared outcome (e.g. all cancelled) is kept; a mix counts as failed
+            states = {job.state for job in unsuccessful}
+            self.transition(
+                states.pop() if len(states) == 1 else "failed",
+                returncode=next((job.returncode for job in unsuccessful if job.returncode), None),
+                stderr="\n".join(
+                    f"[{job.test_id}] {job.stderr}" for job in unsuccessful if job.stderr
+                )[-JOB_OUTPUT_LIMIT:] or None,
+                error=f"{len(unsuccessful)}/{len(self.shards)} tests did not succeed: "
+                      + ", ".join(f"{job.test_id} {job.state}" for job in unsuccessful)
+            )
+            return True
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "batch_id": self.batch.id if self.batch else None,
+            "model": self.model,
+            "role": self.role,
+            "test_id": self.test_id,
+            "test_type": self.test_type,
+            "priority": self.priority,
+            "state": self.state,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "duration": self.duration,
+            "returncode": self.returncode,
+            "error": self.error,
+            "progress": self.progress,
+            "coalesced": self.coalesced,
+            "wait_reason": self.wait_reason if self.state == "queued" else None,
+            "timeout": self.timeout,
+            "timeout_basis": self.timeout_basis,
+            "peak_memory_mb": self.peak_memory_mb,
+            "parent_id": self.parent.id if self.parent else None,
+            "shards": [shard.shard_summary() for shard in self.shards],
+            "command": self.cmd,
+            "transitions": self.transitions
+        }
+
+    def shard_summary(self):
+        return {
+            "job_id": self.id,
+            "test_id": self.test_id,
+            "state": self.state,
+            "duration": self.duration,
+            "expected_seconds": self.expected_seconds
+        }
+
+
+class BenchmarkBatch:
+    """A models × roles fan-out whose cells run in parallel under one deadline.
+
+    A resumed batch keeps its id: `carried` are the registry rows of cells an
+    earlier run already finished, and only the remaining cells get jobs.
+    `fresh` maps cells that already have a recent successful result to that
+    result's timestamp; they are recorded as skipped instead of run.
+    """
+
+    def __init__(self, models, roles, max_parallel=BATCH_MAX_PARALLEL, deadline_seconds=BATCH_DEADLINE,
+                 batch_id=None, carried=(), fresh=None):
+        self.id = batch_id or uuid.uuid4().hex
+        self.models = models
+        self.roles = roles
+        self.max_parallel = max(1, max_parallel)
+        self.deadline_seconds = deadline_seconds
+        self.created_at = datetime.now()
+        self.deadline = time.monotonic() + deadline_seconds
+        self.finished_at = None
+        self.carried = list(carried)
+        self.jobs = []
+        done = {(cell["model"], cell["role"]) for cell in self.carried}
+        fresh = fresh or {}
+        # Cells are created model-major so a worker can keep one model warm across its roles
+        for model in models:
+            for role in roles:
+                if (model, role) in done:
+                    continue
+                cmd, test_type = build_benchmark_command(model, role)
+                job = BenchmarkJob(model, cmd, test_type, role=role, kind="batch", priority=PRIORITY_BATCH)
+                job.batch = self
+                if (model, role) in fresh:
+                    job.transition(
+                        "skipped", persist=False,
+                        error=f"Skipped: successful result from {fresh[(model, role)].isoformat()} is fresh enough"
+                    )
+                self.jobs.append(job)
+        self._lock = threading.Lock()
+        if not self.runnable_jobs():
+            self.finished_at = datetime.now()
+
+    def runnable_jobs(self):
+        """Cells this run still has to execute"""
+        return [job for job in self.jobs if job.state not in TERMINAL_STATES]
+
+    def remaining(self):
+        """Seconds left before the batch deadline"""
+        return self.deadline - time.monotonic()
+
+    def on_job_finished(self, job):
+        """Log per-cell progress and the batch summary once every cell is done"""
+        with self._lock:
+            done = [j for j in self.jobs if j.finished_at]
+            logging.info(f"Batch {self.id[:8]}: {job.model} - {job.role} {job.state} ({len(done)}/{len(self.jobs)})")
+            if len(done) < len(self.jobs) or self.finished_at:
+                return
+            self.finished_at = datetime.now()
+        job_store.finish_batch(self)
+        progress = self.progress()
+        if progress["speedup"] is None:
+            logging.info(f"Batch benchmark completed: 0/{progress['total_tests']} tests ran ({progress['states']})")
+            return
+        logging.info(
+            f"Batch benchmark completed: {progress['succeeded']}/{progress['total_tests']} tests succeeded "
+            f"in {progress['wall_seconds']}s (speedup {progress['speedup']}x vs serial)"
+        )
+
+    def progress(self):
+        """Per-cell states plus wall-clock vs serial time for the batch (this run's cells only)"""
+        counts = {}
+        for state in [job.state for job in self.jobs] + [cell["state"] for cell in self.carried]:
+            counts[state] = counts.get(state, 0) + 1
+        serial_seconds = sum(unit.duration or 0 for job in self.jobs for unit in job.units())
+        started = [job.started_at for job in self.jobs if job.started_at]
+        wall_seconds = None
+        if started:
+            end = self.finished_at or datetime.now()
+            wall_seconds = (end - min(started)).total_seconds()
+        return {
+            "batch_id": self.id,
+            "models": self.models,
+            "roles": self.roles,
+            "max_parallel": self.max_parallel,
+            "deadline_seconds": self.deadline_seconds,
+            "created_at": self.created_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "total_tests": len(self.jobs) + len(self.carried),
+            "completed": sum(1 for job in self.jobs if job.finished_at) + sum(1 for cell in self.carried if cell["finished_at"]),
+            "succeeded": counts.get("succeeded", 0),
+            "carried_over": len(self.carried),
+            "skipped": counts.get("skipped", 0),
+            "states": counts,
+            # Serial baseline = sum of cell run times, i.e. what the old one-at-a-time loop would take
+            "serial_seconds": round(serial_seconds, 1),
+            "wall_seconds": round(wall_seconds, 1) if wall_seconds is not None else None,
+            "speedup": round(serial_seconds / wall_seconds, 2) if wall_seconds else None,
+            "cells": [
+                {
+                    "job_id": job.id,
+                    "model": job.model,
+                    "role": job.role,
+                    "state": job.state,
+                    "duration": job.duration
+                }
+                for job in self.jobs
+            ] + [
+                {
+                    "job_id": cell["id"],
+                    "model": cell["model"],
+                    "role": cell["role"],
+                    "state": cell["state"],
+                    "duration": cell["duration"]
+                }
+                for cell in self.carried
+            ]
+        }
+
+    @classmethod
+    def from_registry(cls, record, cells):
+        """Read-only view of a batch that is no longer in memory (e.g. after a restart)"""
+        batch = cls([], [], max_parallel=record["max_parallel"], deadline_seconds=record["deadline_seconds"],
+                    batch_id=record["id"], carried=cells)
+        batch.models = record["models"]
+        batch.roles = record["roles"]
+        batch.created_at = record["created_at"]
+        batch.finished_at = record["finished_at"]
+        return batch
+
+
+# Batches kept in memory for progress reporting
+batches = {}
+batches_lock = threading.Lock()
+
+
+def remember_batch(batch):
+    """Register a batch for progress reporting, forgetting the oldest finished ones past BATCHES_KEPT"""
+    with batches_lock:
+        batches.pop(batch.id, None)  # a resumed batch moves to the newest end
+        batches[batch.id] = batch
+        finished = [batch_id for batch_id, kept in batches.items() if kept.finished_at]
+        for batch_id in finished[:max(0, len(finished) - BATCHES_KEPT)]:
+            del batches[batch_id]
+
+
+class JobStore:
+    """Postgres-backed registry of every benchmark job and its state transitions, and of batches"""
+
+    COLUMNS = (
+        "id", "kind", "batch_id", "model", "role", "test_id", "test_type", "command", "priority",
+        "state", "created_at", "started_at", "finished_at", "returncode", "error", "stderr", "transitions",
+        "peak_memory_mb", "parent_id"
+    )
+
+    def __init__(self, pool):
+        self._pool = pool
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+
+    def ensure_schema(self):
+        """Create the benchmark_jobs table and its lookup indexes once per process"""
+        if self._schema_ready:
+            return
+        with self._schema_lock:
+            if self._schema_ready:
+                return
+            with self._pool.connection() as conn:
+                cur = conn.cursor()
+                cur.execute("""
+                    CREATE TABLE IF NOT EXISTS benchmark_jobs (
+                        id TEXT PRIMARY KEY,
+                        kind TEXT NOT NULL,
+                        batch_id TEXT,
+                        model TEXT NOT NULL,
+                        role TEXT,
+                        test_id TEXT,
+                        test_type TEXT,
+                        command JSONB NOT NULL,
+                        priority INTEGER NOT NULL,
+                        state TEXT NOT NULL,
+                        created_at TIMESTAMP NOT NULL,
+                        started_at TIMESTAMP,
+                        finished_at TIMESTAMP,
+                        returncode INTEGER,
+                        error TEXT,
+                        stderr TEXT,
+                        transitions JSONB NOT NULL DEFAULT '[]',
+                        peak_memory_mb DOUBLE PRECISION,
+                        parent_id TEXT
+                    )
+                """)
+                cur.execute("ALTER TABLE benchmark_jobs ADD COLUMN IF NOT EXISTS peak_memory_mb DOUBLE PRECISION")
+                cur.execute("ALTER TABLE benchmark_jobs ADD COLUMN IF NOT EXISTS parent_id TEXT")
+                cur.execute("""
+                    CREATE TABLE IF NOT EXISTS benchmark_batches (
+                        id TEXT PRIMARY KEY,
+                        models JSONB NOT NULL,
+                        roles JSONB NOT NULL,
+                        max_parallel INTEGER NOT NULL,
+                        deadline_seconds DOUBLE PRECISION NOT NULL,
+                        created_at TIMESTAMP NOT NULL,
+                        finished_at TIMESTAMP,
+                        runs INTEGER NOT NULL DEFAULT 1
+                    )
+                """)
+                cur.execute("CREATE INDEX IF NOT EXISTS benchmark_jobs_created_idx ON benchmark_jobs (created_at DESC)")
+                cur.execute("CREATE INDEX IF NOT EXISTS benchmark_jobs_state_idx ON benchmark_jobs (state, created_at DESC)")
+                cur.execute("CREATE INDEX IF NOT EXISTS benchmark_jobs_batch_idx ON benchmark_jobs (batch_id) WHERE batch_id IS NOT NULL")
+                cur.execute("CREATE INDEX IF NOT EXISTS benchmark_jobs_parent_idx ON benchmark_jobs (parent_id) WHERE parent_id IS NOT NULL")
+                cur.execute("""
+                    CREATE INDEX IF NOT EXISTS benchmark_jobs_succeeded_idx
+                    ON benchmark_jobs (model, role, test_id, finished_at DESC) WHERE state = 'succeeded'
+                """)
+                conn.commit()
+                cur.close()
+            self._schema_ready = True
+
+    def _row(self, job):
+        return (
+            job.id, job.kind, job.batch.id if job.batch else None, job.model, job.role, job.test_id,
+            job.test_type, Json(job.cmd), job.priority, job.state, job.created_at, job.started_at,
+            job.finished_at, job.returncode, job.error, job.stderr, Json(job.transitions), job.peak_memory_mb,
+            job.parent.id if job.parent else None
+        )
+
+    def save_many(self, jobs):
+        """Upsert jobs in one transaction; failures are logged, never raised to the runner"""
+        placeholders = ", ".join(["%s"] * len(self.COLUMNS))
+        updates = ", ".join(f"{column} = EXCLUDED.{column}" for column in self.COLUMNS if column != "id")
+        try:
+            self.ensure_schema()
+            with self._pool.connection() as conn:
+                cur = conn.cursor()
+                for job in jobs:
+                    cur.execute(
+                        f"INSERT INTO benchmark_jobs ({', '.join(self.COLUMNS)}) VALUES ({placeholders}) "
+                        f"ON CONFLICT (id) DO UPDATE SET {updates}",
+                        self._row(job)
+                    )
+                conn.commit()
+                cur.close()
+        except Exception as e:
+            logging.warning(f"Could not record {len(jobs)} job(s) in job registry: {e}")
+
+    def save(self, job):
+        self.save_many([job])
+
+    def _format(self, columns, row):
+        job = dict(zip(columns, row))
+        job["duration"] = None
+        if job["started_at"] and job["finished_at"]:
+            job["duration"] = (job["finished_at"] - job["started_at"]).total_seconds()
+        for column in ("created_at", "started_at", "finished_at"):
+            job[column] = job[column].isoformat() if job[column] else None
+        return job
+
+    def get(self, job_id):
+        """Single job by primary key, or None"""
+        self.ensure_schema()
+        with self._pool.connection() as conn:
+            cur = conn.cursor()
+            cur.execute(f"SELECT {', '.join(self.COLUMNS)} FROM benchmark_jobs WHERE id = %s", (job_id,))
+            row = cur.fetchone()
+            cur.close()
+        return self._format(self.COLUMNS, row) if row else None
+
+    def list(self, state=None, model=None, kind=None, batch_id=None, parent_id=None, limit=50):
+        """Most recent jobs first, optionally filtered"""
+        where_clauses = []
+        params = []
+        for column, value in (("state", state), ("model", model), ("kind", kind), ("batch_id", batch_id),
+                              ("parent_id", parent_id)):
+            if value:
+                where_clauses.append(f"{column} = %s")
+                params.append(value)
+        where_sql = f"WHERE {' AND '.join(where_clauses)}" if where_clauses else ""
+        # Listing omits the bulky stderr/transitions columns; fetch /jobs/<id> for those
+        columns = [column for column in self.COLUMNS if column not in ("stderr", "transitions")]
+        self.ensure_schema()
+        with self._pool.connection() as conn:
+            cur = conn.cursor()
+            cur.execute(f"""
+                SELECT {', '.join(columns)}
+                FROM benchmark_jobs
+                {where_sql}
+                ORDER BY created_at DESC
+                LIMIT %s
+            """, params + [limit])
+            rows = cur.fetchall()
+            cur.close()
+        return [self._format(columns, row) for row in rows]
+
+    def latest_succeeded(self, model, role, test_id, max_age):
+        """Most recent succeeded run of this (model, role, test_id) that finished within max_age seconds, or None"""
+        self.ensure_schema()
+        columns = [column for column in self.COLUMNS if column not in ("stderr", "transitions")]
+        with self._pool.connection() as conn:
+            cur = conn.cursor()
+            cur.execute(f"""
+                SELECT {', '.join(columns)}
+                FROM benchmark_jobs
+                WHERE state = 'succeeded' AND model = %s AND role = %s AND test_id = %s AND finished_at >= %s
+                ORDER BY finished_at DESC
+                LIMIT 1
+            """, (model, role, test_id, datetime.now() - timedelta(seconds=max_age)))
+            row = cur.fetchone()
+            cur.close()
+        return self._format(columns, row) if row else None
+
+    def test_durations(self, models, roles, recent=TEST_DURATION_HISTORY):
+        """{(model, role, test_id): mean run seconds of the last `recent` succeeded single-test jobs}"""
+        self.ensure_schema()
+        with self._pool.connection() as conn:
+            cur = conn.cursor()
+            cur.execute("""
+                SELECT model, role, test_id, AVG(seconds)
+                FROM (
+                    SELECT model, role, test_id, EXTRACT(EPOCH FROM finished_at - started_at) AS seconds,
+                           ROW_NUMBER() OVER (PARTITION BY model, role, test_id ORDER BY finished_at DESC) AS age
+                    FROM benchmark_jobs
+                    WHERE state = 'succeeded' AND model = ANY(%s) AND role = ANY(%s)
+                        AND test_id <> '' AND started_at IS NOT NULL
+                ) runs
+                WHERE age <= %s
+                GROUP BY model, role, test_id
+            """, (list(models), list(roles), recent))
+            rows = cur.fetchall()
+            cur.close()
+        return {(model, role, test_id): float(seconds) for model, role, test_id, seconds in rows}
+
+    def save_batch(self, batch):
+        """Record a batch run; resuming an existing batch bumps its run count and reopens it.
+        Failures are logged, never raised: the batch still runs, it just cannot be resumed"""
+        try:
+            self._save_batch(batch)
+        except Exception as e:
+            logging.warning(f"Could not record batch {batch.id[:8]} in job registry: {e}")
+
+    def _save_batch(self, batch):
+        self.ensure_schema()
+        with self._pool.connection() as conn:
+            cur = conn.cursor()
+            cur.execute("""
+                INSERT INTO benchmark_batches (id, models, roles, max_parallel, deadline_seconds, created_at, finished_at)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+                ON CONFLICT (id) DO UPDATE SET
+                    max_parallel = EXCLUDED.max_parallel,
+                    deadline_seconds = EXCLUDED.deadline_seconds,
+                    finished_at = EXCLUDED.finished_at,
+                    runs = benchmark_batches.runs + 1
+            """, (batch.id, Json(batch.models), Json(batch.roles), batch.max_parallel, batch.deadline_seconds,
+                  batch.created_at, batch.finished_at))
+            conn.commit()
+            cur.close()
+
+    def finish_batch(self, batch):
+        """Stamp a batch run as finished; failures are logged, never raised to the runner"""
+        try:
+            self.ensure_schema()
+            with self._pool.connection() as conn:
+                cur = conn.cursor()
+                cur.execute("UPDATE benchmark_batches SET finished_at = %s WHERE id = %s", (batch.finished_at, batch.id))
+                conn.commit()
+                cur.close()
+        except Exception as e:
+            logging.warning(f"Could not record batch {batch.id[:8]} as finished: {e}")
+
+    def get_batch(self, batch_id=None, models=None, roles=None):
+        """A batch by id, or the newest batch over exactly these models and roles; None if there is none"""
+        self.ensure_schema()
+        columns = ("id", "models", "roles", "max_parallel", "deadline_seconds", "created_at", "finished_at", "runs")
+        if batch_id:
+            where_sql, params = "id = %s", (batch_id,)
+        else:
+            # Containment both ways: same sets regardless of order
+            where_sql = "models @> %s AND models <@ %s AND roles @> %s AND roles <@ %s"
+            params = (Json(models), Json(models), Json(roles), Json(roles))
+        with self._pool.connection() as conn:
+            cur = conn.cursor()
+            cur.execute(f"""
+                SELECT {', '.join(columns)}
+                FROM benchmark_batches
+                WHERE {where_sql}
+                ORDER BY created_at DESC
+                LIMIT 1
+            """, params)
+            row = cur.fetchone()
+            cur.close()
+        return dict(zip(columns, row)) if row else None
+
+    def batch_cells(self, batch_id):
+        """Latest job of each (model, role) cell of a batch, across all of its runs (role jobs, not their shards)"""
+        self.ensure_schema()
+        columns = [column for column in self.COLUMNS if column not in ("stderr", "transitions")]
+        with self._pool.connection() as conn:
+            cur = conn.cursor()
+            cur.execute(f"""
+                SELECT DISTINCT ON (model, role) {', '.join(columns)}
+                FROM benchmark_jobs
+                WHERE batch_id = %s AND parent_id IS NULL
+                ORDER BY model, role, created_at DESC
+            """, (batch_id,))
+            rows = cur.fetchall()
+            cur.close()
+        return [self._format(columns, row) for row in rows]
+
+    def memory_peaks(self, per_model=RESOURCE_MEMORY_HISTORY):
+        """[(model, peak_memory_mb)] for each model's most recent finished jobs that recorded a peak"""
+        self.ensure_schema()
+        with self._pool.connection() as conn:
+            cur = conn.cursor()
+            cur.execute("""
+                SELECT model, peak_memory_mb
+                FROM (
+                    SELECT model, peak_memory_mb, finished_at,
+                           row_number() OVER (PARTITION BY model ORDER BY finished_at DESC) AS recency
+                    FROM benchmark_jobs
+                    WHERE peak_memory_mb IS NOT NULL AND finished_at IS NOT NULL
+                ) recent
+                WHERE recency <= %s
+                ORDER BY finished_at
+            """, (per_model,))
+            rows = cur.fetchall()
+            cur.close()
+        return rows
+
+    def mark_interrupted(self, before):
+        """Flag jobs left queued/running by a previous server process (created before `before`)"""
+        self.ensure_schema()
+        with self._pool.connection() as conn:
+            cur = conn.cursor()
+            cur.execute("""
+                UPDATE benchmark_jobs
+                SET state = 'interrupted',
+                    finished_at = NOW(),
+                    error = 'Server restarted before the job finished',
+                    transitions = transitions || jsonb_build_array(
+                        jsonb_build_object('state', 'interrupted', 'at', to_char(NOW(), 'YYYY-MM-DD"T"HH24:MI:SS'))
+                    )
+                WHERE state IN ('queued', 'running') AND created_at < %s
+            """, (before,))
+            count = cur.rowcount
+            conn.commit()
+            cur.close()
+        return count
+
+
+job_store = JobStore(db_pool)
+
+
+class BenchmarkRollup:
+    """Daily (day, model_name, role_type) rollup of benchmark_results.
+
+    Holds sums and counts rather than averages so any window can be recombined
+    exactly. A refresh rebuilds only the days since the previous high-water mark;
+    it runs when a benchmark job finishes and every ROLLUP_REFRESH_INTERVAL
+    seconds. Reads merge the rollup with the raw rows of the partial first day
+    of the window and anything newer than the high-water mark, so answers stay
+    exact between refreshes.
+    """
+
+    REFRESH_SQL = """
+        INSERT INTO benchmark_daily_rollup
+        SELECT
+            timestamp::date,
+            model_name,
+            role_type,
+            COUNT(*),
+            COUNT(*) FILTER (WHERE success = true),
+            SUM(quality_score),
+            COUNT(quality_score),
+            SUM(quality_score) FILTER (WHERE success = true),
+            COUNT(quality_score) FILTER (WHERE success = true),
+            SUM(response_time),
+            COUNT(response_time),
+            MAX(timestamp),
+            SUM(quality_score * quality_score) FILTER (WHERE success = true),
+            SUM(response_time * response_time)
+        FROM benchmark_results
+        WHERE timestamp <= %s {since_clause}
+        GROUP BY 1, 2, 3
+    """
+
+    HISTOGRAM_REFRESH_SQL = """
+        INSERT INTO benchmark_daily_time_histogram
+        SELECT
+            timestamp::date,
+            model_name,
+            role_type,
+            width_bucket(response_time, %s::float8[]),
+            COUNT(*)
+        FROM benchmark_results
+        WHERE response_time IS NOT NULL AND timestamp <= %s {since_clause}
+        GROUP BY 1, 2, 3, 4
+    """
+
+    # Reads combine whole rollup days inside the window with these raw rows:
+    # the partial first day, plus anything newer than the last refresh. The
+    # high-water mark is NULL when the table was empty at the last refresh (or
+    # before the first one); read as -infinity, every row counts as newer
+    WINDOW_BOUNDS = """
+        bounds AS (
+            SELECT
+                NOW() - make_interval(days => %s) AS since,
+                COALESCE((SELECT high_water FROM benchmark_rollup_state WHERE id = 1), '-infinity') AS high_water
+        )
+    """
+    RAW_TAIL = """
+        (timestamp > b.since AND timestamp < b.since::date + 1 AND timestamp <= b.high_water)
+        OR (timestamp > b.high_water AND timestamp > b.since)
+    """
+
+    def __init__(self, pool, interval=300.0):
+        self._pool = pool
+        self.interval = interval
+        self._ready = False
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._stats = {"refreshes": 0, "refresh_errors": 0, "last_refresh": None, "last_refresh_ms": None}
+
+    def _ensure_schema(self, cur):
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS benchmark_daily_rollup (
+                day DATE NOT NULL,
+                model_name TEXT,
+                role_type TEXT,
+                test_count BIGINT NOT NULL,
+                success_count BIGINT NOT NULL,
+                score_sum DOUBLE PRECISION,
+                score_count BIGINT NOT NULL,
+                success_score_sum DOUBLE PRECISION,
+                success_score_count BIGINT NOT NULL,
+                time_sum DOUBLE PRECISION,
+                time_count BIGINT NOT NULL,
+                last_timestamp TIMESTAMP,
+                success_score_sq_sum DOUBLE PRECISION,
+                time_sq_sum DOUBLE PRECISION
+            )
+        """)
+        cur.execute("CREATE INDEX IF NOT EXISTS benchmark_daily_rollup_day_idx ON benchmark_daily_rollup (day)")
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS benchmark_daily_time_histogram (
+                day DATE NOT NULL,
+                model_name TEXT,
+                role_type TEXT,
+                bucket SMALLINT NOT NULL,
+                count BIGINT NOT NULL
+            )
+        """)
+        cur.execute("CREATE INDEX IF NOT EXISTS benchmark_daily_time_histogram_day_idx ON benchmark_daily_time_histogram (day)")
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS benchmark_rollup_state (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                high_water TIMESTAMP,
+                refreshed_at TIMESTAMP NOT NULL
+            )
+        """)
+
+    def ensure_ready(self):
+        """Create the rollup on first use and start the scheduled refresher"""
+        if self._ready:
+            return
+        with self._lock:
+            if self._ready:
+                return
+            with self._pool.connection() as conn:
+                cur = conn.cursor()
+                cur.execute("""
+                    SELECT
+                        to_regclass('benchmark_daily_time_histogram') IS NOT NULL,
+                        EXISTS (
+                            SELECT 1 FROM pg_attribute
+                            WHERE attrelid = to_regclass('benchmark_daily_rollup') AND attname = 'time_sq_sum'
+                        )
+                """)
+                had_histogram, had_squares = cur.fetchone()
+                self._ensure_schema(cur)
+                if not had_squares:
+                    # Sums of squares (for trend variances) were added after the table first shipped.
+                    # Only here, once: ALTER TABLE takes an ACCESS EXCLUSIVE lock even when it is a no-op,
+                    # and _ensure_schema runs inside every refresh and ingest transaction
+                    cur.execute("""
+                        ALTER TABLE benchmark_daily_rollup
+                            ADD COLUMN IF NOT EXISTS success_score_sq_sum DOUBLE PRECISION,
+                            ADD COLUMN IF NOT EXISTS time_sq_sum DOUBLE PRECISION
+                    """)
+                if not had_histogram or not had_squares:
+                    # Rollup built before response-time histograms or sums of squares existed: rebuild it once
+                    cur.execute("DELETE FROM benchmark_rollup_state")
+                conn.commit()
+                cur.execute("SELECT 1 FROM benchmark_rollup_state WHERE id = 1")
+                initialized = cur.fetchone() is not None
+                cur.close()
+            if not initialized:
+                self.refresh()
+            self._ready = True
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="rollup-refresher", daemon=True)
+                self._thread.start()
+
+    def refresh(self):
+        """Rebuild rollup days from the previous high-water mark's day onward"""
+        started = time.monotonic()
+        try:
+            with self._pool.connection() as conn:
+                cur = conn.cursor()
+                self._ensure_schema(cur)
+                # Serialize refreshes across server processes
+                cur.execute("SELECT pg_advisory_xact_lock(hashtext('benchmark_daily_rollup'))")
+                cur.execute("SELECT high_water FROM benchmark_rollup_state WHERE id = 1")
+                row = cur.fetchone()
+                previous = row[0] if row else None
+                cur.execute("SELECT MAX(timestamp) FROM benchmark_results")
+                high_water = cur.fetchone()[0]
+                if previous is None:
+                    cur.execute("DELETE FROM benchmark_daily_rollup")
+                    cur.execute("DELETE FROM benchmark_daily_time_histogram")
+                    since_clause, params = "", [high_water]
+                else:
+                    # Whole-day granularity: the previous high-water day is recomputed in full
+                    cur.execute("DELETE FROM benchmark_daily_rollup WHERE day >= %s::date", (previous,))
+                    cur.execute("DELETE FROM benchmark_daily_time_histogram WHERE day >= %s::date", (previous,))
+                    since_clause, params = "AND timestamp >= %s::date", [high_water, previous]
+                if high_water is not None:
+                    cur.execute(self.REFRESH_SQL.format(since_clause=since_clause), params)
+                    cur.execute(self.HISTOGRAM_REFRESH_SQL.format(since_clause=since_clause),
+                                [RESPONSE_TIME_BUCKETS] + params)
+                cur.execute("""
+                    INSERT INTO benchmark_rollup_state (id, high_water, refreshed_at)
+                    VALUES (1, %s, NOW())
+                    ON CONFLICT (id) DO UPDATE SET high_water = EXCLUDED.high_water, refreshed_at = EXCLUDED.refreshed_at
+                """, (high_water if high_water is not None else previous,))
+                conn.commit()
+                cur.close()
+        except Exception:
+            self._stats["refresh_errors"] += 1
+            raise
+        self._stats["refreshes"] += 1
+        self._stats["last_refresh"] = datetime.now().isoformat()
+        self._stats["last_refresh_ms"] = round((time.monotonic() - started) * 1000, 1)
+
+    def invalidate_from(self, cur, since):
+        """Hand the days from `since` onward back to raw reads, in the caller's transaction.
+
+        For rows written below the high-water mark (backfills): their days leave
+        the rollup and the mark moves to just before them, so reads stay exact
+        and the next refresh rebuilds those days.
+        """
+        self._ensure_schema(cur)
+        cur.execute("SELECT pg_advisory_xact_lock(hashtext('benchmark_daily_rollup'))")
+        cur.execute("""
+            UPDATE benchmark_rollup_state
+            SET high_water = %s::date - INTERVAL '1 microsecond'
+            WHERE id = 1 AND high_water >= %s
+        """, (since, since))
+        if cur.rowcount:
+            cur.execute("DELETE FROM benchmark_daily_rollup WHERE day >= %s::date", (since,))
+            cur.execute("DELETE FROM benchmark_daily_time_histogram WHERE day >= %s::date", (since,))
+
+    def request_refresh(self):
+        """Ask the background refresher to run now (e.g. after a job wrote results)"""
+        self._wake.set()
+
+    def _loop(self):
+        while True:
+            self._wake.wait(timeout=self.interval)
+            self._wake.clear()
+            try:
+                self.refresh()
+            except Exception as e:
+                logging.warning(f"Rollup refresh failed: {e}")
+
+    def window_groups(self, cur, days=DASHBOARD_WINDOW_DAYS, ensure=True):
+        """Per (model_name, role_type) sums and counts over the last `days` days"""
+        if ensure:
+            self.ensure_ready()
+        cur.execute(f"""
+            WITH {self.WINDOW_BOUNDS},
+            parts AS (
+                -- Whole days inside the window come from the rollup
+                SELECT r.model_name, r.role_type, r.test_count, r.success_count, r.score_sum, r.score_count,
+                       r.success_score_sum, r.success_score_count, r.time_sum, r.time_count, r.last_timestamp
+                FROM benchmark_daily_rollup r, bounds b
+                WHERE r.day > b.since::date
+                UNION ALL
+                -- Raw rows: the partial first day, plus anything newer than the last refresh
+                SELECT
+                    model_name,
+                    role_type,
+                    COUNT(*),
+                    COUNT(*) FILTER (WHERE success = true),
+                    SUM(quality_score),
+                    COUNT(quality_score),
+                    SUM(quality_score) FILTER (WHERE success = true),
+                    COUNT(quality_score) FILTER (WHERE success = true),
+                    SUM(response_time),
+                    COUNT(response_time),
+                    MAX(timestamp)
+                FROM benchmark_results, bounds b
+                WHERE {self.RAW_TAIL}
+                GROUP BY model_name, role_type
+            )
+            SELECT
+                model_name,
+                role_type,
+                SUM(test_count),
+                SUM(success_count),
+                SUM(score_sum),
+                SUM(score_count),
+                SUM(success_score_sum),
+                SUM(success_score_count),
+                SUM(time_sum),
+                SUM(time_count),
+                MAX(last_timestamp)
+            FROM parts
+            GROUP BY model_name, role_type
+        """, (days,))
+        return [WindowGroup(*row) for row in cur.fetchall()]
+
+    def window_histograms(self, cur, days=DASHBOARD_WINDOW_DAYS, ensure=True):
+        """Response-time bucket counts per (model_name, role_type) over the last `days` days.
+
+        Returns {(model, role): counts} where counts[i] is the number of times in
+        [RESPONSE_TIME_BUCKETS[i-1], RESPONSE_TIME_BUCKETS[i]) (see width_bucket).
+        """
+        if ensure:
+            self.ensure_ready()
+        cur.execute(f"""
+            WITH {self.WINDOW_BOUNDS},
+            parts AS (
+                SELECT h.model_name, h.role_type, h.bucket, h.count
+                FROM benchmark_daily_time_histogram h, bounds b
+                WHERE h.day > b.since::date
+                UNION ALL
+                SELECT model_name, role_type, width_bucket(response_time, %s::float8[]), COUNT(*)
+                FROM benchmark_results, bounds b
+                WHERE response_time IS NOT NULL AND ({self.RAW_TAIL})
+                GROUP BY 1, 2, 3
+            )
+            SELECT model_name, role_type, bucket, SUM(count)
+            FROM parts
+            GROUP BY 1, 2, 3
+        """, (days, RESPONSE_TIME_BUCKETS))
+        histograms = {}
+        for model, role, bucket, count in cur.fetchall():
+            counts = histograms.setdefault((model, role), [0] * (len(RESPONSE_TIME_BUCKETS) + 1))
+            counts[bucket] += int(count)
+        return histograms
+
+    def trend_buckets(self, cur, bucket, days, models=(), roles=(), ensure=True):
+        """Per (model_name, role_type, bucket start) sums, counts and sums of squares.
+
+        Buckets are date_trunc(bucket) periods covering the last `days` days
+        (the first one in full). Reads rollup days plus raw rows newer than the
+        last refresh, so the cost follows the number of buckets, not raw rows.
+        """
+        if ensure:
+            self.ensure_ready()
+        filter_sql, filter_params = "", []
+        if models:
+            filter_sql += " AND model_name = ANY(%s)"
+            filter_params.append(list(models))
+        if roles:
+            filter_sql += " AND role_type = ANY(%s)"
+            filter_params.append(list(roles))
+        cur.execute(f"""
+            WITH bounds AS (
+                SELECT
+                    date_trunc(%s, LOCALTIMESTAMP - make_interval(days => %s)) AS since,
+                    COALESCE((SELECT high_water FROM benchmark_rollup_state WHERE id = 1), '-infinity') AS high_water
+            ),
+            parts AS (
+                SELECT date_trunc(%s, day::timestamp) AS start, model_name, role_type, test_count, success_count,
+                       success_score_sum, success_score_count, success_score_sq_sum, time_sum, time_count, time_sq_sum
+                FROM benchmark_daily_rollup, bounds b
+                WHERE day >= b.since::date {filter_sql}
+                UNION ALL
+                SELECT
+                    date_trunc(%s, timestamp),
+                    model_name,
+                    role_type,
+                    COUNT(*),
+                    COUNT(*) FILTER (WHERE success = true),
+                    SUM(quality_score) FILTER (WHERE success = true),
+                    COUNT(quality_score) FILTER (WHERE success = true),
+                    SUM(quality_score * quality_score) FILTER (WHERE success = true),
+                    SUM(response_time),
+                    COUNT(response_time),
+                    SUM(response_time * response_time)
+                FROM benchmark_results
+                -- Scalar subqueries, not a join against bounds, so these are index conditions. The
+                -- high-water mark is unknown at plan time; with the (always true) upper bound the
+                -- planner estimates a narrow range and uses the timestamp index instead of a seq scan
+                WHERE timestamp > (SELECT high_water FROM bounds) AND timestamp <= 'infinity'
+                    AND timestamp >= (SELECT since FROM bounds) {filter_sql}
+                GROUP BY 1, 2, 3
+            )
+            SELECT
+                model_name,
+                role_type,
+                start,
+                SUM(test_count),
+                SUM(success_count),
+                SUM(success_score_sum),
+                SUM(success_score_count),
+                SUM(success_score_sq_sum),
+                SUM(time_sum),
+                SUM(time_count),
+                SUM(time_sq_sum)
+            FROM parts
+            GROUP BY 1, 2, 3
+            ORDER BY 1, 2, 3
+        """, [bucket, days, bucket] + filter_params + [bucket] + filter_params)
+        return [TrendBucket(*row) for row in cur.fetchall()]
+
+    def stats(self):
+        return dict(self._stats)
+
+
+class TrendBucket:
+    """Sums, counts and sums of squares for one (model_name, role_type) bucket of a trend"""
+
+    __slots__ = (
+        "model_name", "role_type", "start", "test_count", "success_count", "score_sum", "score_count",
+        "score_sq_sum", "time_sum", "time_count", "time_sq_sum"
+    )
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            # SUM() over BIGINT comes back as Decimal
+            setattr(self, name, float(value) if isinstance(value, Decimal) else value)
+
+
+class WindowGroup:
+    """Sums and counts for one (model_name, role_type) over a time window"""
+
+    __slots__ = (
+        "model_name", "role_type", "test_count", "success_count", "score_sum", "score_count",
+        "success_score_sum", "success_score_count", "time_sum", "time_count", "last_timestamp"
+    )
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            # SUM() over BIGINT comes back as Decimal
+            setattr(self, name, float(value) if isinstance(value, Decimal) else value)
+
+
+rollup = BenchmarkRollup(db_pool, interval=ROLLUP_REFRESH_INTERVAL)
+
+
+class ResponseCache:
+    """LRU cache of rendered JSON responses with TTLs and a total size cap.
+
+    Keys are the route plus its normalized query args. invalidate() bumps a
+    generation counter so a response computed before the invalidation is not
+    stored after it.
+    """
+
+    def __init__(self, ttl=60.0, max_entries=256, max_bytes=32 * 1024 * 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (expires_at, body, size)
+        self._bytes = 0
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0, "invalidations": 0}
+
+    @property
+    def generation(self):
+        return self._generation
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            if entry[0] <= time.monotonic():
+                self._remove(key)
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry[1]
+
+    def put(self, key, body, generation, ttl=None):
+        size = len(body)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if generation != self._generation:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + (ttl or self.ttl), body, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+
+    def _remove(self, key):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def invalidate(self):
+        """Drop everything, e.g. when a benchmark job wrote new results"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._generation += 1
+            self._stats["invalidations"] += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                **self._stats
+            }
+
+
+response_cache = ResponseCache(
+    ttl=RESPONSE_CACHE_TTL,
+    max_entries=RESPONSE_CACHE_MAX_ENTRIES,
+    max_bytes=RESPONSE_CACHE_MAX_BYTES
+)
+
+
+def _normalize_arg(name, values):
+    """Order-insensitive lists; numbers compared by value so 7 and 7.0 share an entry"""
+    normalized = []
+    for value in values:
+        value = value.strip()
+        if name in ("minScore", "maxScore"):
+            try:
+                value = repr(float(value))
+            except ValueError:
+                pass
+        elif name == "summary":
+            value = value.lower()
+        normalized.append(value)
+    return tuple(sorted(set(normalized)))
+
+
+def cached_response(args=(), ttl=None):
+    """Cache a JSON route's successful responses keyed by path and the listed query args"""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*view_args, **view_kwargs):
+            key = (request.path,) + tuple(
+                (name, _normalize_arg(name, request.args.getlist(name)))
+                for name in args
+                if name in request.args
+            )
+            body = response_cache.get(key)
+            if body is not None:
+                response = Response(body, mimetype='application/json')
+                response.headers["X-Cache"] = "HIT"
+                return response
+            generation = response_cache.generation
+            response = app.make_response(view(*view_args, **view_kwargs))
+            if response.status_code == 200 and response.mimetype == 'application/json':
+                response_cache.put(key, response.get_data(), generation, ttl)
+            response.headers["X-Cache"] = "MISS"
+            return response
+        return wrapper
+    return decorator
+
+
+def negotiate_encoding():
+    """Best response encoding the client accepts: br, then gzip, else None"""
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+
+def compressed(view):
+    """Compress a route's buffered responses with brotli or gzip when the client accepts it"""
+    @functools.wraps(view)
+    def wrapper(*view_args, **view_kwargs):
+        response = app.make_response(view(*view_args, **view_kwargs))
+        response.vary.add('Accept-Encoding')
+        if (response.status_code != 200 or response.is_streamed or response.direct_passthrough
+                or 'Content-Encoding' in response.headers):
+            return response
+        body = response.get_data()
+        encoding = negotiate_encoding() if len(body) >= COMPRESS_MIN_BYTES else None
+        if encoding == 'br':
+            response.set_data(brotli.compress(body, quality=5))
+        elif encoding == 'gzip':
+            response.set_data(gzip.compress(body, compresslevel=6))
+        else:
+            return response
+        response.headers['Content-Encoding'] = encoding
+        return response
+    return wrapper
+
+
+def build_benchmark_command(model, role="", test_id=""):
+    """Build the benchmark_model.py command line and a human readable label"""
+    if role and test_id:
+        # Specific test
+        return ['python', str(BENCHMARK_SCRIPT_PATH), model, '--role-test', test_id], f"specific test {test_id}"
+    if role:
+        # All tests for role
+        return ['python', str(BENCHMARK_SCRIPT_PATH), model, '--role', role], f"all {role} tests"
+    # Default benchmark
+    return ['python', str(BENCHMARK_SCRIPT_PATH), model], "default benchmark"
+
+
+def role_test_ids():
+    """{role: [test ids]} from role_prompts.json, empty when it cannot be read"""
+    try:
+        snapshot = role_prompts.get()
+    except Exception:
+        return {}
+    if snapshot is None:
+        return {}
+    return {
+        role: [test.get("id") for test in tests if isinstance(test, dict)] if isinstance(tests, list) else []
+        for role, tests in snapshot["data"].items()
+    }
+
+
+def shard_role_jobs(jobs):
+    """Split role jobs into one --role-test shard per test and return what to submit.
+
+    Shards are ordered longest expected run first (mean run time of the
+    test's recent succeeded jobs; a test without history gets its role's
+    mean for that model, or the longest known time), so slow tests start
+    early and short ones fill the gaps across workers. Jobs that are not
+    split keep their place at the end.
+    """
+    tests = role_test_ids()
+    candidates = [
+        job for job in jobs
+        if ROLE_SHARDING and job.role and not job.test_id and len(set(tests.get(job.role, ()))) > 1
+        and None not in tests[job.role]
+    ]
+    if not candidates:
+        return list(jobs)
+    try:
+        durations = job_store.test_durations({job.model for job in candidates}, {job.role for job in candidates})
+    except Exception as e:
+        logging.warning(f"Could not read per-test history, shards will run in file order: {e}")
+        durations = {}
+    longest = max(durations.values(), default=0.0)
+    shards = []
+    for job in candidates:
+        known = [seconds for (model, role, _), seconds in durations.items() if (model, role) == (job.model, job.role)]
+        fallback = sum(known) / len(known) if known else longest
+        for test_id in dict.fromkeys(tests[job.role]):
+            cmd, test_type = build_benchmark_command(job.model, job.role, test_id)
+            shard = BenchmarkJob(job.model, cmd, test_type, role=job.role, test_id=test_id,
+                                 kind=job.kind, priority=job.priority)
+            shard.parent = job
+            shard.batch = job.batch
+            shard.expected_seconds = round(durations.get((job.model, job.role, test_id), fallback), 2)
+            job.shards.append(shard)
+        shards.extend(job.shards)
+        job.expected_seconds = round(sum(shard.expected_seconds for shard in job.shards), 2)
+    shards.sort(key=lambda shard: -shard.expected_seconds)  # stable: ties keep model-major order
+    return shards + [job for job in jobs if not job.shards]
+
+
+class TooManySubscribers(Exception):
+    """Raised when a live event stream is requested while max_subscribers are open"""
+
+
+class JobEventBroker:
+    """Fan-out of job events to a bounded number of SSE subscribers.
+
+    Each job keeps a bounded history so a tab that subscribes mid-run (or just
+    after the job finished) replays what it missed instead of polling Postgres.
+    Every live subscriber pins a server thread, hence max_subscribers.
+    """
+
+    def __init__(self, history=500, jobs_kept=200, max_subscribers=8):
+        self._history_size = history
+        self._jobs_kept = jobs_kept
+        self.max_subscribers = max_subscribers
+        self._lock = threading.Lock()
+        self._history = OrderedDict()  # job id -> deque of (seq, event, data)
+        self._subscribers = {}  # job id -> set of queue.Queue
+        self._closed = set()
+        self._seq = 0
+
+    def publish(self, job_id, event, data):
+        with self._lock:
+            self._seq += 1
+            entry = (self._seq, event, data)
+            history = self._history.get(job_id)
+            if history is None:
+                history = self._history[job_id] = deque(maxlen=self._history_size)
+            history.append(entry)
+            for subscriber in list(self._subscribers.get(job_id, ())):
+                try:
+                    subscriber.put_nowait(entry)
+                except queue.Full:
+                    # Slow consumer: drop it rather than buffer without bound
+                    self._subscribers[job_id].discard(subscriber)
+
+    def close(self, job_id):
+        """Mark a job's stream finished and trim histories of old finished jobs"""
+        self.publish(job_id, "end", {})
+        with self._lock:
+            self._closed.add(job_id)
+            finished = [key for key in self._history if key in self._closed]
+            for key in finished[:max(0, len(finished) - self._jobs_kept)]:
+                del self._history[key]
+                self._closed.discard(key)
+
+    def subscribe(self, job_id):
+        """Returns (queue, replayed events, finished) for a job"""
+        subscriber = queue.Queue(maxsize=1000)
+        with self._lock:
+            replay = list(self._history.get(job_id, ()))
+            finished = job_id in self._closed
+            if not finished:
+                # A finished job's replay is sent and closed at once; only live streams hold a thread
+                if sum(len(subscribers) for subscribers in self._subscribers.values()) >= self.max_subscribers:
+                    raise TooManySubscribers(f"{self.max_subscribers} event streams already open, try again later")
+                self._subscribers.setdefault(job_id, set()).add(subscriber)
+        return subscriber, replay, finished
+
+    def unsubscribe(self, job_id, subscriber):
+        with self._lock:
+            subscribers = self._subscribers.get(job_id)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[job_id]
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+
+job_events = JobEventBroker(history=JOB_EVENT_HISTORY, jobs_kept=JOB_EVENT_JOBS_KEPT, max_subscribers=SSE_MAX_SUBSCRIBERS)
+
+PROGRESS_PATTERN = re.compile(r"(\d+)\s*/\s*(\d+)")
+
+
+def _pump_output(job, stream, name, tail=None):
+    """Forward a subprocess pipe line by line as job events"""
+    for line in stream:
+        line = line.rstrip("\n")
+        if tail is not None:
+            tail.append(line)
+        job_events.publish(job.id, "output", {"stream": name, "line": line})
+        if job.parent is not None:
+            job_events.publish(job.parent.id, "output", {"stream": name, "line": line, "test_id": job.test_id})
+        match = PROGRESS_PATTERN.search(line) if name == "stdout" else None
+        if match and 0 < int(match.group(2)) and int(match.group(1)) <= int(match.group(2)):
+            job.progress = {"current": int(match.group(1)), "total": int(match.group(2))}
+            job_events.publish(job.id, "progress", job.progress)
+    stream.close()
+
+
+def signal_process_group(pid, sig):
+    """Signal every process in the group `pid` leads (benchmarks start in their own session)"""
+    try:
+        os.killpg(pid, sig)
+    except ProcessLookupError:
+        pass
+
+
+class BenchmarkProcess(subprocess.Popen):
+    """Popen that starts the benchmark in its own session and signals its whole process group,
+    so terminate()/kill() also reach anything the script spawned"""
+
+    def __init__(self, cmd, **kwargs):
+        super().__init__(cmd, start_new_session=True, **kwargs)
+
+    def send_signal(self, sig):
+        # Even after the leader exits, children left in the group still get the signal
+        signal_process_group(self.pid, sig)
+
+
+class WarmWorker:
+    """One long-lived benchmark_worker.py process and the socket the server talks to it over"""
+
+    def __init__(self, python, script):
+        self.python = python
+        self.script = script
+        self.jobs = 0
+        server_end, worker_end = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        try:
+            self.process = subprocess.Popen(
+                [python, str(WORKER_SCRIPT_PATH), "--fd", str(worker_end.fileno()), str(script)],
+                pass_fds=(worker_end.fileno(),),
+                stdin=subprocess.DEVNULL,
+                cwd=str(WORKING_DIR),
+                start_new_session=True  # jobs are stopped by signalling the worker's process group
+            )
+        except Exception:
+            server_end.close()
+            raise
+        finally:
+            worker_end.close()
+        self.sock = server_end
+
+    @property
+    def pid(self):
+        return self.process.pid
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def rss_mb(self):
+        if psutil is None:
+            return None
+        try:
+            return psutil.Process(self.pid).memory_info().rss / (1024 * 1024)
+        except psutil.Error:
+            return None
+
+    def stop(self):
+        """Ask the worker to exit (closing its socket), killing it if it doesn't"""
+        self.sock.close()
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+
+
+class WarmRun:
+    """Popen-like handle for one job running inside a warm worker.
+
+    stdout/stderr are the read ends of pipes whose write ends the worker puts on
+    fds 1/2 for the job, so execute_benchmark streams them exactly like a
+    subprocess. terminate()/kill() take the whole worker down; it is replaced.
+    """
+
+    def __init__(self, pool, worker, cmd):
+        self._pool = pool
+        self._worker = worker
+        self._lock = threading.Lock()
+        self._signalled = False
+        self.pid = worker.pid
+        self.returncode = None
+        out_read, out_write = os.pipe()
+        err_read, err_write = os.pipe()
+        try:
+            request = {"argv": [str(arg) for arg in cmd[1:]], "cwd": str(WORKING_DIR)}
+            socket.send_fds(worker.sock, [json.dumps(request).encode()], [out_write, err_write])
+        except Exception:
+            os.close(out_read)
+            os.close(err_read)
+            raise
+        finally:
+            os.close(out_write)
+            os.close(err_write)
+        self.stdout = open(out_read, "r")
+        self.stderr = open(err_read, "r")
+
+    def poll(self):
+        return self.returncode
+
+    def wait(self):
+        if self.returncode is not None:
+            return self.returncode
+        try:
+            reply = self._worker.sock.recv(4096)  # unblocks with b"" if the worker dies
+        except OSError:
+            reply = b""
+        with self._lock:
+            if reply and not self._signalled:
+                self.returncode = json.loads(reply)["returncode"]
+                self._pool.release(self._worker)
+            else:
+                # Crash, timeout or cancel: the worker is gone (or going) and only this job is affected
+                self.returncode = json.loads(reply)["returncode"] if reply else self._worker.process.wait()
+                self._pool.discard(self._worker, crashed=not self._signalled)
+        return self.returncode
+
+    def send_signal(self, sig):
+        with self._lock:
+            if self.returncode is None:
+                self._signalled = True
+                signal_process_group(self._worker.pid, sig)
+
+    def terminate(self):
+        self.send_signal(signal.SIGTERM)
+
+    def kill(self):
+        self.send_signal(signal.SIGKILL)
+
+
+class WarmWorkerPool:
+    """Pre-started benchmark_worker.py interpreters that each run one job at a time.
+
+    Idle workers are reused across jobs and recycled after max_jobs jobs or once
+    their RSS passes max_rss_mb; a replacement is started in the background so
+    the next job doesn't pay interpreter startup either.
+    """
+
+    def __init__(self, size=2, max_jobs=50, max_rss_mb=2048):
+        self.size = max(1, size)
+        self.max_jobs = max(1, max_jobs)
+        self.max_rss_mb = max_rss_mb
+        self._lock = threading.Lock()
+        self._idle = []
+        self._busy = set()
+        self._closed = False
+        self._stats = {"spawned": 0, "jobs": 0, "recycled": 0, "crashed": 0, "killed": 0, "spawn_errors": 0}
+
+    def _spawn(self, python, script):
+        worker = WarmWorker(python, script)
+        with self._lock:
+            self._stats["spawned"] += 1
+        return worker
+
+    def _replenish(self, python, script):
+        """Top the idle list back up to `size` warm workers"""
+        while True:
+            with self._lock:
+                if self._closed or len(self._idle) + len(self._busy) >= self.size:
+                    return
+            try:
+                worker = self._spawn(python, script)
+            except Exception as e:
+                with self._lock:
+                    self._stats["spawn_errors"] += 1
+                logging.warning(f"Could not start warm benchmark worker: {e}")
+                return
+            with self._lock:
+                if self._closed:
+                    closed = True
+                else:
+                    closed = False
+                    self._idle.append(worker)
+            if closed:
+                worker.stop()
+                return
+
+    def start(self, python="python", script=None):
+        """Pre-start the workers in the background"""
+        threading.Thread(
+            target=self._replenish, args=(python, str(script or BENCHMARK_SCRIPT_PATH)),
+            name="warm-worker-spawner", daemon=True
+        ).start()
+
+    def run(self, cmd):
+        """Send cmd to an idle worker (starting one if none is idle) and return its WarmRun"""
+        python, script = cmd[0], str(cmd[1])
+        worker = None
+        with self._lock:
+            while self._idle:
+                candidate = self._idle.pop()
+                if candidate.alive() and (candidate.python, candidate.script) == (python, script):
+                    worker = candidate
+                    break
+                threading.Thread(target=candidate.stop, daemon=True).start()
+        if worker is None:
+            worker = self._spawn(python, script)
+        with self._lock:
+            self._busy.add(worker)
+            self._stats["jobs"] += 1
+        worker.jobs += 1
+        try:
+            return WarmRun(self, worker, cmd)
+        except Exception:
+            self.discard(worker)
+            raise
+
+    def release(self, worker):
+        """Job finished normally: keep the worker warm, or recycle it"""
+        rss = worker.rss_mb()
+        recycle = worker.jobs >= self.max_jobs or (rss is not None and rss > self.max_rss_mb)
+        with self._lock:
+            self._busy.discard(worker)
+            if not recycle and not self._closed:
+                self._idle.append(worker)
+                return
+            if recycle:
+                self._stats["recycled"] += 1
+        if recycle:
+            logging.info(f"Recycling warm benchmark worker {worker.pid} after {worker.jobs} job(s)"
+                         + (f", {rss:.0f} MB" if rss is not None else ""))
+        worker.stop()
+        self._after_loss(worker)
+
+    def discard(self, worker, crashed=True):
+        """The worker died or was killed mid-job: drop it and start a replacement"""
+        with self._lock:
+            self._busy.discard(worker)
+            self._stats["crashed" if crashed else "killed"] += 1
+        worker.sock.close()
+        if worker.alive():
+            worker.process.kill()
+        worker.process.wait()
+        self._after_loss(worker)
+
+    def _after_loss(self, worker):
+        if not self._closed:
+            threading.Thread(
+                target=self._replenish, args=(worker.python, worker.script),
+                name="warm-worker-spawner", daemon=True
+            ).start()
+
+    def close(self):
+        """Stop idle workers; busy ones exit when their job's WarmRun releases them"""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            worker.stop()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "mode": "warm",
+                "size": self.size,
+                "idle": len(self._idle),
+                "busy": len(self._busy),
+                "max_jobs": self.max_jobs,
+                "max_rss_mb": self.max_rss_mb,
+                **self._stats
+            }
+
+
+warm_workers = (
+    WarmWorkerPool(JOB_WORKERS, WARM_WORKER_MAX_JOBS, WARM_WORKER_MAX_RSS_MB)
+    if BENCHMARK_WORKER_MODE == "warm" else None
+)
+
+
+def start_benchmark_process(cmd):
+    """Start a benchmark command in a warm worker when enabled, otherwise as a fresh subprocess"""
+    if warm_workers is not None:
+        return warm_workers.run(cmd)
+    return BenchmarkProcess(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        bufsize=1,  # line buffered so events go out as lines arrive
+        cwd=str(WORKING_DIR)
+    )
+
+
+class JobTimeoutPolicy:
+    """Per-job subprocess timeouts from historical response_time in benchmark_results.
+
+    Expected run time is the JOB_TIMEOUT_QUANTILE per-test response time of the
+    (model, role) times the number of tests the command runs; the timeout is
+    that times `multiplier`, clamped to [floor, ceiling]. Roles without enough
+    history borrow the model's slowest known role; a model without any falls
+    back to `fallback`.
+    """
+
+    def __init__(self, pool, multiplier=3.0, floor=120.0, ceiling=7200.0, fallback=600.0,
+                 quantile=JOB_TIMEOUT_QUANTILE, min_samples=JOB_TIMEOUT_MIN_SAMPLES):
+        self._pool = pool
+        self.multiplier = multiplier
+        self.floor = floor
+        self.ceiling = max(ceiling, floor)
+        self.fallback = fallback
+        self.quantile = quantile
+        self.min_samples = min_samples
+
+    def _clamp(self, seconds):
+        return min(max(seconds, self.floor), self.ceiling)
+
+    def per_test_times(self, model):
+        """{role: per-test response_time quantile} for roles of `model` with enough successful results"""
+        with self._pool.connection() as conn:
+            cur = conn.cursor()
+            cur.execute("""
+                SELECT role_type, percentile_cont(%s) WITHIN GROUP (ORDER BY response_time), COUNT(*)
+                FROM benchmark_results
+                WHERE success = true AND model_name = %s AND response_time IS NOT NULL
+                GROUP BY role_type
+            """, (self.quantile, model))
+            rows = cur.fetchall()
+            cur.close()
+        return {role: seconds for role, seconds, count in rows if count >= self.min_samples and seconds is not None}
+
+    def timeout_for(self, job):
+        """(timeout seconds, human-readable basis) for a job's run"""
+        try:
+            times = self.per_test_times(job.model)
+        except Exception as e:
+            logging.warning(f"Could not read response-time history for {job.model}, using the default timeout: {e}")
+            times = {}
+        if not times:
+            return self._clamp(self.fallback), "default (no response-time history)"
+        slowest = max(times.values())
+        role_tests = role_test_ids()
+        if job.test_id:
+            role = job.role or next((r for r, ids in role_tests.items() if job.test_id in ids), None)
+            runs = {role: 1}
+        elif job.role:
+            runs = {job.role: max(1, len(role_tests.get(job.role, ())))}
+        else:
+            runs = {role: len(ids) for role, ids in role_tests.items() if ids} or {None: 1}
+        expected = sum(count * times.get(role, slowest) for role, count in runs.items())
+        tests = sum(runs.values())
+        basis = f"{tests} test(s) x p{round(self.quantile * 100)} {expected / tests:.1f}s x {self.multiplier:g}"
+        return self._clamp(expected * self.multiplier), basis
+
+
+job_timeouts = JobTimeoutPolicy(
+    db_pool,
+    multiplier=JOB_TIMEOUT_MULTIPLIER,
+    floor=JOB_TIMEOUT_FLOOR,
+    ceiling=JOB_TIMEOUT_CEILING,
+    fallback=JOB_TIMEOUT
+)
+
+
+def execute_benchmark(job):
+    """Run a job's subprocess, streaming its output as events, and record the outcome"""
+    timeout, job.timeout_basis = job_timeouts.timeout_for(job)
+    if job.batch:
+        # Never let a cell run past its batch's wall-clock deadline
+        timeout = max(1, min(timeout, job.batch.remaining()))
+    job.timeout = round(timeout, 1)
+    timed_out = threading.Event()
+    if job.cancel_requested:
+        # Cancelled while it was being picked up, before there was a process to signal
+        job.transition("cancelled", error="Cancelled before it started")
+        logging.info(f"🛑 Benchmark cancelled: {job.model} - {job.test_type}")
+        return
+    try:
+        logging.info(f"Starting benchmark: {job.model} - {job.test_type} (timeout {job.timeout}s: {job.timeout_basis})")
+        
+        job.process = start_benchmark_process(job.cmd)
+        process = job.process
+        if job.cancel_requested:
+            # cancel() ran between the check above and job.process being set, so it had nothing to signal
+            process.terminate()
+        
+        def kill_on_timeout():
+            # SIGTERM the whole process group, then SIGKILL whatever is left after the grace period
+            timed_out.set()
+            logging.warning(f"Benchmark exceeded {job.timeout}s, stopping its process group: {job.model} - {job.test_type}")
+            process.terminate()
+            deadline = time.monotonic() + JOB_KILL_GRACE
+            while process.poll() is None and time.monotonic() < deadline:
+                time.sleep(0.1)
+            process.kill()
+        
+        timer = threading.Timer(timeout, kill_on_timeout)
+        timer.daemon = True
+        timer.start()
+        stderr_tail = deque(maxlen=500)
+        pumps = [
+            threading.Thread(target=_pump_output, args=(job, process.stdout, "stdout"), daemon=True),
+            threading.Thread(target=_pump_output, args=(job, process.stderr, "stderr", stderr_tail), daemon=True)
+        ]
+        for pump in pumps:
+            pump.start()
+        try:
+            process.wait()
+        finally:
+            timer.cancel()
+        # Give the slot back promptly even if an escaped child still holds a pipe open
+        for pump in pumps:
+            pump.join(timeout=JOB_OUTPUT_DRAIN)
+        if any(pump.is_alive() for pump in pumps):
+            logging.warning(f"Output pipes still open {JOB_OUTPUT_DRAIN}s after exit, not waiting: {job.model} - {job.test_type}")
+        
+        stderr = "\n".join(stderr_tail)[-JOB_OUTPUT_LIMIT:]
+        returncode = process.returncode
+        if timed_out.is_set():
+            job.transition("timeout", returncode=returncode, stderr=stderr, error=f"Timed out after {round(timeout)}s ({job.timeout_basis})")
+            logging.error(f"⏰ Benchmark timeout: {job.model} - {job.test_type}")
+        elif job.cancel_requested:
+            job.transition("cancelled", returncode=returncode, stderr=stderr, error="Cancelled while running")
+            logging.info(f"🛑 Benchmark cancelled: {job.model} - {job.test_type}")
+        elif returncode == 0:
+            job.transition("succeeded", returncode=returncode, stderr=stderr)
+            logging.info(f"✅ Benchmark completed successfully: {job.model} - {job.test_type}")
+        else:
+            job.transition("failed", returncode=returncode, stderr=stderr, error=f"Exited with code {returncode}")
+            logging.error(f"❌ Benchmark failed: {job.model} - {job.test_type}")
+            logging.error(f"Error output: {stderr}")
+        
+    except Exception as e:
+        job.transition("failed", error=str(e))
+        logging.error(f"💥 Benchmark exception: {job.model} - {job.test_type} - {e}")
+    finally:
+        if job.process is not None:
+            # Whatever the outcome, the run may have written results before it stopped
+            rollup.request_refresh()
+            response_cache.invalidate()
+        job.process = None
+
+
+class JobScheduler:
+    """Bounded priority queue drained by a fixed pool of worker threads.
+
+    Workers always take the highest priority queued job whose model is below
+    the per-model concurrency limit, so one model is never loaded twice at once
+    while other models can still make progress. Batch cells additionally honour
+    their batch's max_parallel and deadline, and a worker prefers the model it
+    just ran so the model stays loaded across that model's roles. Shards of a
+    role job are queued as ordinary jobs; lookups by the role job's id
+    (position, cancel, wait reason) cover all of its shards.
+    """
+
+    def __init__(self, runner, workers=2, max_queue=50, per_model_limit=1, governor=None):
+        self._runner = runner
+        self.governor = governor
+        self.workers = max(1, workers)
+        self.max_queue = max(1, max_queue)
+        self.per_model_limit = max(1, per_model_limit)
+        self._pending = []  # (priority, seq, job), kept sorted
+        self._seq = 0
+        self._running = {}  # job id -> job
+        self._running_per_model = {}
+        self._running_per_batch = {}
+        self._cond = threading.Condition()
+        self._threads = []
+        self._accepting = True
+        self._stats = {"submitted": 0, "rejected": 0, "completed": 0, "coalesced": 0}
+
+    def _ensure_started(self):
+        if self._threads:
+            return
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker_loop, name=f"benchmark-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    @staticmethod
+    def _admission_units(jobs):
+        """Requests counted against max_queue: shards of one role job count once, as that role job"""
+        return {job.parent.id if job.parent is not None else job.id for job in jobs}
+
+    def submit(self, jobs):
+        """Admit a list of jobs atomically; raises QueueFull if they don't all fit"""
+        with self._cond:
+            if not self._accepting:
+                raise SchedulerClosed("Server is shutting down")
+            pending = len(self._admission_units(entry[2] for entry in self._pending))
+            if pending + len(self._admission_units(jobs)) > self.max_queue:
+                self._stats["rejected"] += len(jobs)
+                raise QueueFull(
+                    f"Job queue is full ({pending}/{self.max_queue} pending)"
+                )
+            for job in jobs:
+                self._seq += 1
+                self._pending.append((job.priority, self._seq, job))
+            self._pending.sort(key=lambda entry: entry[:2])
+            self._stats["submitted"] += len(jobs)
+            self._ensure_started()
+            self._cond.notify_all()
+
+    def join(self, cmd):
+        """The queued or running job with exactly this command line, counted as a merged request; None if there is none"""
+        with self._cond:
+            live = list(self._running.values()) + [entry[2] for entry in self._pending]
+            for job in live:
+                if job.cancel_requested:
+                    continue
+                for candidate in (job, job.parent):
+                    if candidate is not None and candidate.cmd == cmd:
+                        candidate.coalesced += 1
+                        self._stats["coalesced"] += 1
+                        return candidate
+            return None
+
+    @staticmethod
+    def _matches(job, job_id):
+        return job.id == job_id or (job.parent is not None and job.parent.id == job_id)
+
+    def position(self, job_id):
+        """1-based position among queued jobs, 0 if running, None if unknown"""
+        with self._cond:
+            if any(self._matches(job, job_id) for job in self._running.values()):
+                return 0
+            for index, (_, _, job) in enumerate(self._pending):
+                if self._matches(job, job_id):
+                    return index + 1
+            return None
+
+    def cancel(self, job_id):
+        """Cancel a queued job or signal a running one; returns the job or None if not live"""
+        owner = None
+        dequeued = []
+        with self._cond:
+            for entry in [entry for entry in self._pending if self._matches(entry[2], job_id)]:
+                self._pending.remove(entry)
+                job = entry[2]
+                job.transition("cancelled", persist=False, error="Cancelled before it started")
+                dequeued.append(job)
+                owner = job if job.id == job_id else job.parent
+            for job in self._running.values():
+                if self._matches(job, job_id):
+                    job.cancel_requested = True
+                    if job.process is not None:
+                        job.process.terminate()
+                    owner = job if job.id == job_id else job.parent
+        for job in dequeued:
+            job_store.save(job)
+            self._on_finished(job)
+        return owner
+
+    def _on_finished(self, job):
+        """Report a finished job to its role job, and the role job (once done) or the job to its batch"""
+        if job.parent is not None:
+            if not job.parent.on_shard_finished(job):
+                return
+            job = job.parent
+        if job.batch:
+            job.batch.on_job_finished(job)
+
+    def _expire_batch_jobs(self):
+        """Drop queued cells whose batch deadline has passed"""
+        expired = [entry for entry in self._pending if entry[2].batch and entry[2].batch.remaining() <= 0]
+        for entry in expired:
+            self._pending.remove(entry)
+            entry[2].transition("cancelled", persist=False, error="Batch deadline exceeded before the test started")
+        return [entry[2] for entry in expired]
 
-app = Flask(__name__)
-CORS(app, origins=["http://localhost:3000", "http://localhost:3001", "http://localhost:3002", "http://localhost:3003", "https://*.gtabhishek.com"], 
-     methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-     allow_headers=["Content-Type", "Authorization", "X-Requested-With"])
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    def _limit_reason(self, job):
+        """Why a concurrency limit keeps this job waiting, or None"""
+        if self._running_per_model.get(job.model, 0) >= self.per_model_limit:
+            return f"model {job.model} is already running ({self.per_model_limit} at a time)"
+        if job.batch and self._running_per_batch.get(job.batch.id, 0) >= job.batch.max_parallel:
+            return f"batch {job.batch.id} is at max_parallel ({job.batch.max_parallel})"
+        return None
 
-# Configuration for Docker environment
-BENCHMARK_SCRIPT_PATH = Path("/workspace/benchmark_model.py")
-WORKING_DIR = Path("/workspace")
+    def _resource_reason(self, job, held_for, now):
+        """Why host headroom keeps this job waiting, or None; tracks how long it has been starved"""
+        if held_for is not None:
+            return f"held for job {held_for.id} ({held_for.model}), which has waited longest for resources"
+        reason = self.governor.check(job, list(self._running.values()))
+        if reason is None:
+            job.resource_wait_since = None
+        elif job.resource_wait_since is None:
+            job.resource_wait_since = now
+        return reason
 
-# Database connection helper
-def get_db_connection():
-    """Connect to Postgres database"""
-    return psycopg2.connect(
-        host="postgres",  # Docker service name
-        database="db",
-        user="user",
-        password="password",
-        port=5432
+    def _take_runnable(self, last_model=None):
+        chosen = None
+        held_for = None  # a job starved of headroom for too long: later jobs may not overtake it
+        now = time.monotonic()
+        for index, (priority, _, job) in enumerate(self._pending):
+            if chosen is not None and priority != self._pending[chosen][0]:
+                break
+            job.wait_reason = self._limit_reason(job)
+            if job.wait_reason is None and self.governor is not None:
+                job.wait_reason = self._resource_reason(job, held_for, now)
+                if (held_for is None and job.resource_wait_since is not None
+                        and now - job.resource_wait_since >= self.governor.starvation_seconds):
+                    held_for = job
+            if job.wait_reason is not None:
+                continue
+            if chosen is None:
+                chosen = index
+            if job.model == last_model:
+                # Same priority and the model is already warm on this worker
+                chosen = index
+                break
+        if chosen is None:
+            return None
+        job = self._pending.pop(chosen)[2]
+        job.wait_reason = None
+        job.resource_wait_since = None
+        return job
+
+    def _worker_loop(self):
+        last_model = None
+        while True:
+            with self._cond:
+                expired = self._expire_batch_jobs()
+                job = None if expired else self._take_runnable(last_model)
+                while job is None and not expired:
+                    # Wake up periodically so batch deadlines expire queued cells
+                    self._cond.wait(timeout=5)
+                    expired = self._expire_batch_jobs()
+                    job = None if expired else self._take_runnable(last_model)
+                if job is not None:
+                    if self.governor is not None:
+                        self.governor.on_start(job, list(self._running.values()))
+                    self._running[job.id] = job
+                    self._running_per_model[job.model] = self._running_per_model.get(job.model, 0) + 1
+                    if job.batch:
+                        self._running_per_batch[job.batch.id] = self._running_per_batch.get(job.batch.id, 0) + 1
+                    job.transition("running", persist=False)
+            for cancelled in expired:
+                job_store.save(cancelled)
+                self._on_finished(cancelled)
+            if job is None:
+                continue
+            last_model = job.model
+            job_store.save(job)
+            if job.parent is not None:
+                job.parent.on_shard_started(job)
+            try:
+                self._runner(job)
+            finally:
+                if job.state not in TERMINAL_STATES:
+                    job.transition("failed", error="Runner exited without recording an outcome")
+                if self.governor is not None and job.peak_memory_mb:
+                    self.governor.learn(job.model, job.peak_memory_mb)
+                with self._cond:
+                    del self._running[job.id]
+                    self._running_per_model[job.model] -= 1
+                    if not self._running_per_model[job.model]:
+                        del self._running_per_model[job.model]
+                    if job.batch:
+                        self._running_per_batch[job.batch.id] -= 1
+                        if not self._running_per_batch[job.batch.id]:
+                            del self._running_per_batch[job.batch.id]
+                    self._stats["completed"] += 1
+                    self._cond.notify_all()
+                self._on_finished(job)
+
+    def shutdown(self, grace):
+        """Stop admitting jobs, let running ones finish for `grace` seconds, then stop them"""
+        with self._cond:
+            self._accepting = False
+            pending = [entry[2] for entry in self._pending]
+            self._pending.clear()
+            self._cond.notify_all()
+        for job in pending:
+            job.transition("interrupted", error="Server shut down before the job started")
+            if job.parent is not None:
+                job.parent.on_shard_finished(job)
+        deadline = time.monotonic() + grace
+        with self._cond:
+            while self._running and time.monotonic() < deadline:
+                self._cond.wait(timeout=max(0.1, deadline - time.monotonic()))
+            leftover = list(self._running.values())
+        for job in leftover:
+            logging.warning(f"Stopping running benchmark on shutdown: {job.model} - {job.test_type}")
+            job.cancel_requested = True
+            if job.process is not None:
+                job.process.terminate()
+        with self._cond:
+            while self._running and time.monotonic() < deadline + 10:
+                self._cond.wait(timeout=1)
+        return len(pending), len(leftover)
+
+    def wake(self):
+        """Re-check queued jobs now, e.g. after a fresh resource sample"""
+        with self._cond:
+            if self._pending:
+                self._cond.notify_all()
+
+    def wait_reason(self, job_id):
+        """Why a queued job is not running yet, None if it is not queued here"""
+        with self._cond:
+            if any(self._matches(job, job_id) for job in self._running.values()):
+                return None
+            for _, _, job in self._pending:
+                if self._matches(job, job_id):
+                    if len(self._running) >= self.workers:
+                        return f"all {self.workers} workers are busy"
+                    return job.wait_reason or "waiting for a worker"
+            return None
+
+    def running_jobs(self):
+        """Jobs currently executing"""
+        with self._cond:
+            return list(self._running.values())
+
+    def stats(self):
+        """Snapshot of queue depth and worker usage"""
+        with self._cond:
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "per_model_limit": self.per_model_limit,
+                "queued": len(self._pending),
+                "running": len(self._running),
+                "running_models": dict(self._running_per_model),
+                "waiting": [
+                    {"job_id": job.id, "model": job.model, "reason": job.wait_reason}
+                    for _, _, job in self._pending
+                    if job.wait_reason
+                ],
+                **self._stats
+            }
+
+
+class SystemSampler:
+    """Background sampler keeping a ring buffer of host and benchmark subprocess usage.
+
+    Health checks read the latest sample instead of blocking on
+    psutil.cpu_percent(interval=1).
+    """
+
+    def __init__(self, interval=2.0, history=300):
+        self.interval = interval
+        self._samples = deque(maxlen=history)
+        self._processes = {}  # pid -> psutil.Process, kept so cpu_percent() has a baseline
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._loop, name="system-sampler", daemon=True)
+            self._thread.start()
+
+    def _loop(self):
+        if psutil is not None:
+            psutil.cpu_percent(interval=None)  # prime the CPU counter
+        while True:
+            time.sleep(self.interval)
+            try:
+                sample = self.sample()
+            except Exception as e:
+                logging.warning(f"System sample failed: {e}")
+                continue
+            with self._lock:
+                self._samples.append(sample)
+            if resource_governor is not None:
+                scheduler.wake()
+
+    def _job_usage(self, job, live_pids):
+        root = psutil.Process(job.process.pid)
+        cpu = 0.0
+        rss = 0
+        tree = [root] + root.children(recursive=True)
+        for proc in tree:
+            # Reuse Process objects so cpu_percent() measures since the previous sample
+            proc = self._processes.setdefault(proc.pid, proc)
+            live_pids.add(proc.pid)
+            try:
+                cpu += proc.cpu_percent(interval=None)
+                rss += proc.memory_info().rss
+            except psutil.Error:
+                continue
+        return {
+            "job_id": job.id,
+            "model": job.model,
+            "pid": job.process.pid,
+            "cpu_percent": round(cpu, 1),
+            "rss_mb": round(rss / (1024 * 1024), 1),
+            "processes": len(tree)
+        }
+
+    def sample(self):
+        """Take one sample now (non-blocking)"""
+        sample = {
+            "timestamp": datetime.now().isoformat(),
+            "cpu_percent": 0.0,
+            "memory_percent": 0.0,
+            "memory_available_mb": None,
+            "load_avg": list(os.getloadavg()) if hasattr(os, "getloadavg") else None,
+            "disk_percent": None,
+            "jobs": []
+        }
+        if psutil is None:
+            return sample
+        memory = psutil.virtual_memory()
+        sample["cpu_percent"] = psutil.cpu_percent(interval=None)
+        sample["memory_percent"] = memory.percent
+        sample["memory_available_mb"] = round(memory.available / (1024 * 1024), 1)
+        disk_path = WORKING_DIR if WORKING_DIR.exists() else Path("/")
+        sample["disk_percent"] = psutil.disk_usage(str(disk_path)).percent
+        live_pids = set()
+        running = scheduler.running_jobs()
+        for job in running:
+            if job.process is None:
+                continue
+            try:
+                sample["jobs"].append(self._job_usage(job, live_pids))
+            except (psutil.Error, AttributeError):
+                continue
+        for pid in list(self._processes):
+            if pid not in live_pids:
+                del self._processes[pid]
+        if resource_governor is not None:
+            resource_governor.observe(sample, running)
+        return sample
+
+    def latest(self):
+        """Most recent sample; starts the sampler if it is not running yet"""
+        self.start()
+        with self._lock:
+            if self._samples:
+                return self._samples[-1]
+        return None
+
+    def series(self, seconds):
+        """Samples from the last `seconds` seconds, oldest first"""
+        self.start()
+        count = max(1, int(seconds / self.interval))
+        with self._lock:
+            return list(self._samples)[-count:]
+
+
+system_sampler = SystemSampler(interval=SYSTEM_SAMPLE_INTERVAL, history=SYSTEM_SAMPLE_HISTORY)
+
+
+class ResourceGovernor:
+    """Admission check for benchmark launches from live CPU/RAM samples and learned per-model memory.
+
+    A model's expected peak is the largest of its last few recorded peaks. The
+    peak is the job's process tree RSS, or, when the job ran alone, the drop in
+    host available memory since launch, so memory held by a model server on
+    the same host is counted too. One job may always run, so a busy host
+    delays the queue but never stalls it.
+    """
+
+    def __init__(self, sampler, max_cpu_percent=90.0, min_free_mb=1024.0, default_job_mb=0.0,
+                 starvation_seconds=300.0, history=RESOURCE_MEMORY_HISTORY):
+        self._sampler = sampler
+        self.max_cpu_percent = max_cpu_percent
+        self.min_free_mb = min_free_mb
+        self.default_job_mb = default_job_mb
+        self.starvation_seconds = starvation_seconds
+        self.history = history
+        self._peaks = {}  # model -> deque of recent peak MB
+        self._lock = threading.Lock()
+        self._stats = {"checks": 0, "delays": 0, "last_delay": None}
+
+    def load(self, store):
+        """Seed per-model estimates from peaks recorded in the job registry"""
+        for model, peak in store.memory_peaks(self.history):
+            self.learn(model, peak)
+
+    def learn(self, model, peak_mb):
+        with self._lock:
+            self._peaks.setdefault(model, deque(maxlen=self.history)).append(float(peak_mb))
+
+    def estimate(self, model):
+        """Expected peak memory (MB) of a run of this model"""
+        with self._lock:
+            peaks = self._peaks.get(model)
+            return max(peaks) if peaks else self.default_job_mb
+
+    def on_start(self, job, running):
+        """Remember host free memory at launch so a job running alone can be measured by the drop"""
+        sample = self._sampler.latest()
+        job.memory_baseline_mb = sample["memory_available_mb"] if sample and not running else None
+        job.peak_memory_mb = None
+
+    def observe(self, sample, running):
+        """Fold one system sample into the running jobs' peak memory"""
+        usage = {job_usage["job_id"]: job_usage["rss_mb"] for job_usage in sample["jobs"]}
+        available = sample["memory_available_mb"]
+        for job in running:
+            peak = usage.get(job.id, 0.0)
+            if len(running) == 1 and job.memory_baseline_mb is not None and available is not None:
+                peak = max(peak, job.memory_baseline_mb - available)
+            if peak > (job.peak_memory_mb or 0):
+                job.peak_memory_mb = round(peak, 1)
+
+    def _delay(self, job, reason):
+        self._stats["delays"] += 1
+        self._stats["last_delay"] = {"job_id": job.id, "model": job.model, "reason": reason, "at": datetime.now().isoformat()}
+        return reason
+
+    def check(self, job, running):
+        """None if `job` may launch next to `running`, otherwise why it has to wait"""
+        self._stats["checks"] += 1
+        if not running:
+            return None
+        sample = self._sampler.latest()
+        if sample is None:
+            return self._delay(job, "waiting for the first system sample")
+        if self.max_cpu_percent:
+            if sample["cpu_percent"] >= self.max_cpu_percent:
+                return self._delay(job, f"CPU at {sample['cpu_percent']:.0f}% (launch limit {self.max_cpu_percent:.0f}%)")
+            sampled_at = datetime.fromisoformat(sample["timestamp"])
+            if any(other.started_at and other.started_at > sampled_at for other in running):
+                return self._delay(job, "waiting for a system sample taken after the last launch")
+        available = sample["memory_available_mb"]
+        if available is None:
+            return None
+        # Running jobs still growing towards their expected peak will take more
+        usage = {job_usage["job_id"]: job_usage["rss_mb"] for job_usage in sample["jobs"]}
+        reserved = sum(max(0.0, self.estimate(other.model) - usage.get(other.id, 0.0)) for other in running)
+        needed = self.estimate(job.model)
+        headroom = available - reserved
+        if headroom - needed < self.min_free_mb:
+            return self._delay(
+                job,
+                f"needs ~{needed:.0f} MB; {headroom:.0f} MB is free once running jobs reach their expected peak "
+                f"and {self.min_free_mb:.0f} MB must stay free"
+            )
+        return None
+
+    def stats(self):
+        with self._lock:
+            estimates = {model: max(peaks) for model, peaks in self._peaks.items()}
+        return {
+            "max_cpu_percent": self.max_cpu_percent,
+            "min_free_mb": self.min_free_mb,
+            "default_job_mb": self.default_job_mb,
+            "starvation_seconds": self.starvation_seconds,
+            "model_memory_mb": estimates,
+            **self._stats
+        }
+
+
+resource_governor = (
+    ResourceGovernor(
+        system_sampler,
+        max_cpu_percent=RESOURCE_MAX_CPU_PERCENT,
+        min_free_mb=RESOURCE_MIN_FREE_MB,
+        default_job_mb=RESOURCE_DEFAULT_JOB_MB,
+        starvation_seconds=RESOURCE_STARVATION_SECONDS
     )
+    if RESOURCE_SCHEDULING and psutil is not None
+    else None
+)
+
+
+scheduler = JobScheduler(
+    execute_benchmark,
+    workers=JOB_WORKERS,
+    max_queue=JOB_QUEUE_MAX,
+    per_model_limit=JOB_PER_MODEL_LIMIT,
+    governor=resource_governor
+)
 
 @app.route('/api/dashboard-summary')
+@cached_response()
 def dashboard_summary():
     """Main dashboard summary widget"""
     try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-        
-        # Debug: Check total records and recent records
-        cur.execute("SELECT COUNT(*) FROM benchmark_results")
-        total_records = cur.fetchone()[0]
-        
-        cur.execute("SELECT COUNT(*) FROM benchmark_results WHERE timestamp > NOW() - INTERVAL '30 days'")
-        recent_30d = cur.fetchone()[0]
-        
-        cur.execute("SELECT MAX(timestamp) FROM benchmark_results")
-        latest_timestamp = cur.fetchone()[0]
+        with db_connection() as conn:
+            cur = conn.cursor()
+            groups = rollup.window_groups(cur)
+            cur.close()
         
-        # Get summary stats from last 30 days
-        cur.execute("""
-            WITH recent_stats AS (
-                SELECT 
-                    COUNT(*) as total_tests,
-                    AVG(quality_score) as avg_score,
-                    COUNT(*) FILTER (WHERE success = true) * 100.0 / NULLIF(COUNT(*), 0) as success_rate,
-                    MAX(timestamp) as last_run
-                FROM benchmark_results 
-                WHERE timestamp > NOW() - INTERVAL '30 days'
-            ),
-            best_model AS (
-                SELECT model_name, AVG(quality_score) as score
-                FROM benchmark_results 
-                WHERE timestamp > NOW() - INTERVAL '30 days' AND success = true
-                GROUP BY model_name ORDER BY score DESC LIMIT 1
+        # Summary stats from last 30 days
+        result = None
+        total_tests = sum(g.test_count for g in groups)
+        if total_tests:
+            score_sum = sum(g.score_sum or 0 for g in groups)
+            score_count = sum(g.score_count for g in groups)
+            best_model = {}
+            for g in groups:
+                totals = best_model.setdefault(g.model_name, [0.0, 0])
+                totals[0] += g.success_score_sum or 0
+                totals[1] += g.success_score_count
+            best = max(
+                ((model, t[0] / t[1]) for model, t in best_model.items() if t[1]),
+                key=lambda item: item[1],
+                default=("No data", 0)
+            )
+            result = (
+                total_tests,
+                score_sum / score_count if score_count else 0,
+                sum(g.success_count for g in groups) * 100.0 / total_tests,
+                max(g.last_timestamp for g in groups),
+                best[0],
+                best[1]
             )
-            SELECT 
-                COALESCE(r.total_tests, 0) as total_tests,
-                COALESCE(r.avg_score, 0) as avg_score,
-                COALESCE(r.success_rate, 0) as success_rate,
-                r.last_run,
-                COALESCE(b.model_name, 'No data') as best_model,
-                COALESCE(b.score, 0) as best_score
-            FROM recent_stats r
-            LEFT JOIN best_model b ON true
-        """)
-        
-        result = cur.fetchone()
-        cur.close()
-        conn.close()
         
         if result:
             return jsonify({
@@ -118,27 +2918,17 @@ def dashboard_summary():
 def system_health():
     """System health check with recent benchmark info and server status"""
     try:
-        conn = get_db_connection()
-        cur = conn.cursor()
+        with db_connection() as conn:
+            cur = conn.cursor()
         
-        # Check recent benchmarks
-        cur.execute("""
-            SELECT COUNT(*) 
-            FROM benchmark_results 
-            WHERE timestamp > NOW() - INTERVAL '30 days' 
-              AND success = true
-        """)
-        recent_benchmarks = cur.fetchone()[0]
+            # Check recent benchmarks
+            recent_benchmarks = int(sum(g.success_count for g in rollup.window_groups(cur)))
         
-        cur.close()
-        conn.close()
+            cur.close()
         
-        # Get system CPU usage
-        try:
-            import psutil
-            cpu_usage = psutil.cpu_percent(interval=1)
-        except:
-            cpu_usage = 0
+        # Latest background sample (never blocks the request)
+        system = system_sampler.latest()
+        cpu_usage = system["cpu_percent"] if system else 0
         
         # Determine health status
         if recent_benchmarks > 0:
@@ -152,24 +2942,48 @@ def system_health():
             "status": status,
             "recent_benchmarks": recent_benchmarks,
             "cpu_usage": round(cpu_usage, 1),
+            "system": system,
+            "database_pool": db_pool.stats(),
+            "job_queue": scheduler.stats(),
+            "benchmark_workers": warm_workers.stats() if warm_workers is not None else {"mode": "subprocess"},
+            "resource_scheduling": resource_governor.stats() if resource_governor is not None else {"enabled": False},
+            "event_subscribers": job_events.subscriber_count(),
+            "event_subscriber_limit": job_events.max_subscribers,
+            "role_prompts_cache": role_prompts.stats(),
+            "rollup": rollup.stats(),
+            "response_cache": response_cache.stats(),
             "last_check": datetime.now().strftime("%H:%M:%S"),
             "timestamp": datetime.now().isoformat(),
             "endpoints": {
                 "run_test": "POST /run-test",
                 "run_batch": "POST /run-batch", 
+                "batch_progress": "GET /batches/<batch_id>",
+                "jobs": "GET /jobs",
+                "job_detail": "GET /jobs/<job_id>",
+                "job_events": "GET /jobs/<job_id>/events (SSE)",
+                "cancel_job": "POST /jobs/<job_id>/cancel",
                 "list_roles": "GET /list-roles",
                 "get_roles": "GET /api/roles",
                 "get_role_detail": "GET /api/roles/<role_name>",
                 "health": "GET /health",
                 "system_health": "GET /api/system-health",
+                "system_metrics": "GET /api/system-metrics",
+                "metrics": "GET /metrics (Prometheus)",
                 "dashboard_summary": "GET /api/dashboard-summary",
-                "performance_matrix": "GET /api/performance-matrix",
+                "performance_matrix": "GET /api/performance-matrix?time_metric=mean|p50|p90|p99",
+                "response_times": "GET /api/response-times?model=&role=&days=",
+                "trends": "GET /api/trends?model=&role=&bucket=day|week|month&days=&baseline=&alpha=",
                 "benchmarks": "GET /api/benchmarks",
-                "benchmark_detail": "GET /api/benchmarks/<id>"
+                "benchmark_detail": "GET /api/benchmarks/<id>?fields=prompt,response,breakdown&preview=true",
+                "benchmark_response": "GET /api/benchmarks/<id>/response?offset=&limit=",
+                "results": "GET /api/results",
+                "results_export": "GET /api/results/export?format=ndjson|csv|parquet",
+                "results_bulk": "POST /api/results/bulk"
             },
             "configuration": {
                 "benchmark_script": str(BENCHMARK_SCRIPT_PATH),
-                "working_directory": str(WORKING_DIR)
+                "working_directory": str(WORKING_DIR),
+                "role_sharding": ROLE_SHARDING
             }
         })
     except Exception as e:
@@ -179,89 +2993,166 @@ def system_health():
             "status": "🔴 Error",
             "recent_benchmarks": 0,
             "cpu_usage": 0,
+            "database_pool": db_pool.stats(),
             "error": str(e),
             "timestamp": datetime.now().isoformat()
         }), 500
 
+# Serializes /run-test's join-or-submit so two identical requests can't both miss each other
+run_test_lock = threading.Lock()
+# ...and /run-batch's resume check through batch registration, so a batch can't be resumed twice at once
+run_batch_lock = threading.Lock()
+
+
+def fetch_run_results(job):
+    """benchmark_results rows written while a finished job (as stored in benchmark_jobs) was running"""
+    where_clauses = ["model_name = %s", "timestamp BETWEEN %s AND %s"]
+    params = [job["model"], job["started_at"], job["finished_at"]]
+    if job["role"]:
+        where_clauses.append("role_type = %s")
+        params.append(job["role"])
+    with db_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(f"""
+            SELECT id, role_type, quality_score, response_time, success, timestamp
+            FROM benchmark_results
+            WHERE {' AND '.join(where_clauses)}
+            ORDER BY timestamp, id
+        """, params)
+        rows = cur.fetchall()
+        cur.close()
+    return [
+        {
+            "id": row[0],
+            "role": row[1],
+            "score": float(row[2]) if row[2] is not None else None,
+            "time": float(row[3]) if row[3] is not None else None,
+            "success": row[4],
+            "timestamp": row[5].isoformat() if row[5] else None
+        }
+        for row in rows
+    ]
+
+
 @app.route('/run-test', methods=['POST'])
 def run_test():
-    """Trigger a benchmark test"""
+    """Queue a benchmark test.
+
+    An identical test that is already queued or running is joined instead of
+    started again, and with a freshness window (RUN_FRESHNESS_WINDOW or
+    max_age_seconds) a recent successful identical run is returned instead.
+    force=true skips the freshness check.
+    """
     try:
         data = request.json
         model = data.get('model', '').strip()
         role = data.get('role', '').strip()
         test_id = data.get('test_id', '').strip()
+        force = data.get('force', False)
+        if not isinstance(force, bool):
+            raise InvalidRequest("force must be true or false")
+        max_age = data.get('max_age_seconds', RUN_FRESHNESS_WINDOW)
+        if isinstance(max_age, bool) or not isinstance(max_age, (int, float)) or not 0 <= max_age < math.inf:
+            raise InvalidRequest("max_age_seconds must be a non-negative number")
         
         if not model:
             return jsonify({"error": "Missing required field: model"}), 400
         
-        # Determine the command to run
-        if role and test_id:
-            # Specific test
-            cmd = [
-                'python', str(BENCHMARK_SCRIPT_PATH),
-                model, '--role-test', test_id
-            ]
-            test_type = f"specific test {test_id}"
-        elif role:
-            # All tests for role
-            cmd = [
-                'python', str(BENCHMARK_SCRIPT_PATH),
-                model, '--role', role
-            ]
-            test_type = f"all {role} tests"
-        else:
-            # Default benchmark
-            cmd = [
-                'python', str(BENCHMARK_SCRIPT_PATH),
-                model
-            ]
-            test_type = "default benchmark"
+        cmd, test_type = build_benchmark_command(model, role, test_id)
         
-        def run_benchmark():
+        if max_age > 0 and not force:
             try:
-                logging.info(f"Starting benchmark: {model} - {test_type}")
-                
-                result = subprocess.run(
-                    cmd, 
-                    capture_output=True, 
-                    text=True, 
-                    timeout=600,  # 10 min timeout
-                    cwd=str(WORKING_DIR)
-                )
-                
-                if result.returncode == 0:
-                    logging.info(f"✅ Benchmark completed successfully: {model} - {test_type}")
-                else:
-                    logging.error(f"❌ Benchmark failed: {model} - {test_type}")
-                    logging.error(f"Error output: {result.stderr}")
-                
-            except subprocess.TimeoutExpired:
-                logging.error(f"⏰ Benchmark timeout: {model} - {test_type}")
+                fresh = job_store.latest_succeeded(model, role, test_id, max_age)
             except Exception as e:
-                logging.error(f"💥 Benchmark exception: {model} - {test_type} - {e}")
+                logging.warning(f"Freshness lookup failed, running anyway: {e}")
+                fresh = None
+            if fresh:
+                age = (datetime.now() - datetime.fromisoformat(fresh["finished_at"])).total_seconds()
+                logging.info(f"Reusing {model} - {test_type} from job {fresh['id']} ({age:.0f}s old)")
+                return jsonify({
+                    "status": "fresh",
+                    "job_id": fresh["id"],
+                    "model": model,
+                    "role": role,
+                    "test_id": test_id,
+                    "test_type": test_type,
+                    "finished_at": fresh["finished_at"],
+                    "age_seconds": round(age, 1),
+                    "results": fetch_run_results(fresh),
+                    "timestamp": datetime.now().isoformat(),
+                    "message": f"Reused an identical run from {age:.0f}s ago; send force=true to run again"
+                })
         
-        # Run in background thread
-        thread = threading.Thread(target=run_benchmark, daemon=True)
-        thread.start()
+        with run_test_lock:
+            job = scheduler.join(cmd)
+            if job is not None:
+                logging.info(f"Merged duplicate request onto job {job.id}: {model} - {test_type}")
+                return jsonify({
+                    "status": job.state,
+                    "job_id": job.id,
+                    "coalesced": True,
+                    "queue_position": scheduler.position(job.id),
+                    "model": model,
+                    "role": role,
+                    "test_id": test_id,
+                    "test_type": test_type,
+                    "timestamp": datetime.now().isoformat(),
+                    "message": f"Joined the identical benchmark already {job.state} for {model} - {test_type}"
+                })
+            
+            job = BenchmarkJob(model, cmd, test_type, role=role, test_id=test_id)
+            units = shard_role_jobs([job])
+            job_store.save_many([job] + job.shards)
+            
+            try:
+                scheduler.submit(units)
+            except (SchedulerClosed, QueueFull) as e:
+                for rejected in job.shards + [job]:
+                    rejected.transition("rejected", persist=False, error=str(e))
+                job_store.save_many(job.shards + [job])
+                if isinstance(e, SchedulerClosed):
+                    return jsonify({"error": str(e), "job_id": job.id}), 503
+                logging.warning(f"Rejected benchmark: {model} - {test_type} ({e})")
+                return jsonify({"error": str(e), "job_id": job.id, "queue": scheduler.stats()}), 429
         
         return jsonify({
-            "status": "started",
+            "status": "queued",
+            "job_id": job.id,
+            "coalesced": False,
+            "queue_position": scheduler.position(job.id),
             "model": model,
             "role": role,
             "test_id": test_id,
             "test_type": test_type,
+            "shards": [shard.shard_summary() for shard in job.shards],
             "timestamp": datetime.now().isoformat(),
-            "message": f"Benchmark started for {model} - {test_type}"
+            "message": f"Benchmark queued for {model} - {test_type}"
+            + (f" as {len(job.shards)} separately scheduled tests" if job.shards else "")
         })
         
+    except InvalidRequest as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         logging.error(f"Request processing error: {e}")
         return jsonify({"error": f"Internal server error: {str(e)}"}), 500
 
+def latest_successful_results(models, roles, since):
+    """{(model, role): newest successful result timestamp} for cells with a success at or after `since`"""
+    with db_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT model_name, role_type, MAX(timestamp)
+            FROM benchmark_results
+            WHERE success = true AND model_name = ANY(%s) AND role_type = ANY(%s) AND timestamp >= %s
+            GROUP BY model_name, role_type
+        """, (list(models), list(roles), since))
+        rows = cur.fetchall()
+        cur.close()
+    return {(model, role): timestamp for model, role, timestamp in rows}
+
 @app.route('/run-batch', methods=['POST'])
 def run_batch():
-    """Trigger batch benchmark for multiple models/roles"""
+    """Queue batch benchmark for multiple models/roles"""
     try:
         data = request.json
         models = data.get('models', [])
@@ -273,93 +3164,357 @@ def run_batch():
         if not roles:
             return jsonify({"error": "Missing required field: roles"}), 400
         
-        def run_batch_benchmarks():
-            total_tests = len(models) * len(roles)
-            completed = 0
-            
-            logging.info(f"Starting batch benchmark: {total_tests} tests")
-            
-            for model in models:
-                for role in roles:
-                    try:
-                        cmd = [
-                            'python', str(BENCHMARK_SCRIPT_PATH),
-                            model, '--role', role
-                        ]
-                        
-                        logging.info(f"Running: {model} - {role} ({completed + 1}/{total_tests})")
-                        
-                        result = subprocess.run(
-                            cmd, 
-                            capture_output=True, 
-                            text=True, 
-                            timeout=600,
-                            cwd=str(WORKING_DIR)
-                        )
-                        
-                        completed += 1
-                        
-                        if result.returncode == 0:
-                            logging.info(f"✅ Completed: {model} - {role}")
-                        else:
-                            logging.error(f"❌ Failed: {model} - {role}")
-                            
-                    except subprocess.TimeoutExpired:
-                        logging.error(f"⏰ Timeout: {model} - {role}")
-                        completed += 1
-                    except Exception as e:
-                        logging.error(f"💥 Error: {model} - {role} - {e}")
-                        completed += 1
-            
-            logging.info(f"Batch benchmark completed: {completed}/{total_tests} tests")
+        max_parallel = data.get('max_parallel', BATCH_MAX_PARALLEL)
+        if isinstance(max_parallel, bool) or not isinstance(max_parallel, int) or max_parallel < 1:
+            raise InvalidRequest("max_parallel must be a positive integer")
+        deadline_seconds = data.get('deadline_seconds', BATCH_DEADLINE)
+        if isinstance(deadline_seconds, bool) or not isinstance(deadline_seconds, (int, float)) or not 0 < deadline_seconds < math.inf:
+            raise InvalidRequest("deadline_seconds must be a positive number")
+        resume = data.get('resume', False)  # true: newest batch over the same models × roles, or a batch id
+        if not isinstance(resume, (bool, str)):
+            raise InvalidRequest("resume must be true, false or a batch id")
+        skip_if_fresh = data.get('skip_if_fresh')  # seconds: skip cells with a successful result this recent
+        if skip_if_fresh is not None and (
+            isinstance(skip_if_fresh, bool) or not isinstance(skip_if_fresh, (int, float)) or not 0 <= skip_if_fresh < math.inf
+        ):
+            raise InvalidRequest("skip_if_fresh must be a non-negative number of seconds")
+        
+        # Resume check through registration is one step: two requests must not both resume a batch
+        with run_batch_lock:
+            previous = None
+            carried = []
+            if resume:
+                previous = job_store.get_batch(
+                    batch_id=resume if isinstance(resume, str) else None, models=models, roles=roles
+                )
+                if previous is None and isinstance(resume, str):
+                    return jsonify({"error": f"Batch '{resume}' not found"}), 404
+            if previous is not None:
+                with batches_lock:
+                    live = batches.get(previous["id"])
+                if live is not None and not live.finished_at:
+                    return jsonify({"error": f"Batch '{previous['id']}' is still running", "batch_id": previous["id"]}), 409
+                wanted = {(model, role) for model in models for role in roles}
+                carried = [
+                    cell for cell in job_store.batch_cells(previous["id"])
+                    if cell["state"] in DONE_CELL_STATES and (cell["model"], cell["role"]) in wanted
+                ]
+            fresh = {}
+            if skip_if_fresh is not None:
+                fresh = latest_successful_results(models, roles, datetime.now() - timedelta(seconds=skip_if_fresh))
         
-        # Run in background thread
-        thread = threading.Thread(target=run_batch_benchmarks, daemon=True)
-        thread.start()
+            batch = BenchmarkBatch(
+                models, roles, max_parallel=max_parallel, deadline_seconds=deadline_seconds,
+                batch_id=previous["id"] if previous else None, carried=carried, fresh=fresh
+            )
+            jobs = batch.runnable_jobs()
+            units = shard_role_jobs(jobs)
+            job_store.save_batch(batch)
+            job_store.save_many(batch.jobs + [shard for job in jobs for shard in job.shards])
+            summary = {
+                "batch_id": batch.id,
+                "resumed": previous is not None,
+                "carried_over": len(batch.carried),
+                "skipped": len(batch.jobs) - len(jobs),
+                "models": models,
+                "roles": roles,
+                "total_tests": len(batch.jobs) + len(batch.carried),
+                "max_parallel": batch.max_parallel,
+                "deadline_seconds": batch.deadline_seconds,
+                "timestamp": datetime.now().isoformat()
+            }
+            if not jobs:
+                return jsonify({
+                    "status": "complete",
+                    "job_ids": [],
+                    **summary,
+                    "message": "Every cell already succeeded or has a fresh successful result; nothing to run"
+                })
+        
+            try:
+                scheduler.submit(units)
+            except (SchedulerClosed, QueueFull) as e:
+                rejected = [shard for job in jobs for shard in job.shards] + jobs
+                for job in rejected:
+                    job.transition("rejected", persist=False, error=str(e))
+                job_store.save_many(rejected)
+                if isinstance(e, SchedulerClosed):
+                    return jsonify({"error": str(e)}), 503
+                logging.warning(f"Rejected batch benchmark: {len(units)} tests ({e})")
+                return jsonify({"error": str(e), "queue": scheduler.stats()}), 429
+        
+            remember_batch(batch)
+        
+        logging.info(
+            f"Queued batch benchmark {batch.id[:8]}: {len(jobs)} cells as {len(units)} jobs, up to {batch.max_parallel} in parallel"
+            + (f" (resumed, {summary['carried_over']} cells already done)" if previous else "")
+            + (f", {summary['skipped']} skipped as fresh" if summary["skipped"] else "")
+        )
         
         return jsonify({
-            "status": "started",
-            "models": models,
-            "roles": roles,
-            "total_tests": len(models) * len(roles),
-            "timestamp": datetime.now().isoformat(),
-            "message": f"Batch benchmark started for {len(models)} models × {len(roles)} roles"
+            "status": "queued",
+            "job_ids": [job.id for job in jobs],
+            "queue_position": scheduler.position(jobs[0].id),
+            **summary,
+            "message": f"Batch benchmark queued for {len(models)} models × {len(roles)} roles"
         })
         
+    except InvalidRequest as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         logging.error(f"Batch request error: {e}")
         return jsonify({"error": f"Internal server error: {str(e)}"}), 500
 
+@app.route('/jobs', methods=['GET'])
+def list_jobs():
+    """Recent jobs from the job registry, newest first"""
+    try:
+        limit = min(max(request.args.get('limit', 50, type=int), 1), 500)
+        jobs = job_store.list(
+            state=request.args.get('state'),
+            model=request.args.get('model'),
+            kind=request.args.get('kind'),
+            batch_id=request.args.get('batch_id'),
+            parent_id=request.args.get('parent_id'),
+            limit=limit
+        )
+        for job in jobs:
+            if job["state"] in ACTIVE_STATES:
+                job["queue_position"] = scheduler.position(job["id"])
+                job["wait_reason"] = scheduler.wait_reason(job["id"])
+        return jsonify({"jobs": jobs, "count": len(jobs), "queue": scheduler.stats()})
+    except Exception as e:
+        logging.error(f"List jobs error: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Status, timings, exit code and stderr for one job"""
+    try:
+        job = job_store.get(job_id)
+        if job is None:
+            return jsonify({"error": f"Job '{job_id}' not found"}), 404
+        if job["state"] in ACTIVE_STATES:
+            job["queue_position"] = scheduler.position(job_id)
+            job["wait_reason"] = scheduler.wait_reason(job_id)
+        shards = job_store.list(parent_id=job_id, limit=500)
+        if shards:
+            # Role job run as per-test shards: the merged view lists each test's job
+            job["shards"] = [
+                {"job_id": shard["id"], **{key: shard[key] for key in ("test_id", "state", "duration", "error")}}
+                for shard in sorted(shards, key=lambda shard: shard["created_at"])
+            ]
+        return jsonify(job)
+    except Exception as e:
+        logging.error(f"Get job error: {e}")
+        return jsonify({"error": str(e)}), 500
+
+def _sse(event, data, event_id=None):
+    """Format one Server-Sent Events message"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+@app.route('/jobs/<job_id>/events', methods=['GET'])
+def job_event_stream(job_id):
+    """Server-Sent Events stream of a job's state changes, progress and output lines"""
+    last_seen = request.headers.get('Last-Event-ID', type=int) or 0
+    try:
+        subscriber, replay, finished = job_events.subscribe(job_id)
+    
+        if not replay and scheduler.position(job_id) is None:
+            # Not live in this process: answer from the registry and end the stream
+            try:
+                job = job_store.get(job_id)
+            except Exception as e:
+                job_events.unsubscribe(job_id, subscriber)
+                return jsonify({"error": str(e)}), 500
+            job_events.unsubscribe(job_id, subscriber)
+            if job is None:
+                return jsonify({"error": f"Job '{job_id}' not found"}), 404
+            if job["state"] in TERMINAL_STATES:
+                body = _sse("state", {"state": job["state"], "at": job["finished_at"], "error": job["error"]}) + _sse("end", {})
+                return Response(body, mimetype='text/event-stream', headers={"Cache-Control": "no-cache"})
+            subscriber, replay, finished = job_events.subscribe(job_id)
+    except TooManySubscribers as e:
+        # Poll GET /jobs/<job_id> instead, or reconnect later
+        return jsonify({"error": str(e)}), 503, {"Retry-After": str(SSE_KEEPALIVE)}
+    
+    def generate():
+        try:
+            for seq, event, data in replay:
+                if seq > last_seen:
+                    yield _sse(event, data, seq)
+                if event == "end":
+                    return
+            if finished:
+                return
+            while True:
+                try:
+                    seq, event, data = subscriber.get(timeout=SSE_KEEPALIVE)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                if seq > last_seen:
+                    yield _sse(event, data, seq)
+                if event == "end":
+                    return
+        finally:
+            job_events.unsubscribe(job_id, subscriber)
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """Cancel a queued job or terminate a running one"""
+    try:
+        job = scheduler.cancel(job_id)
+        if job is None:
+            stored = job_store.get(job_id)
+            if stored is None:
+                return jsonify({"error": f"Job '{job_id}' not found"}), 404
+            return jsonify({"error": f"Job '{job_id}' already {stored['state']}", "state": stored["state"]}), 409
+        logging.info(f"Cancel requested: {job.model} - {job.test_type} ({job.id[:8]})")
+        return jsonify({
+            "status": "cancelled" if job.state == "cancelled" else "cancelling",
+            "job_id": job.id,
+            "state": job.state
+        })
+    except Exception as e:
+        logging.error(f"Cancel job error: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/batches/<batch_id>', methods=['GET'])
+def get_batch(batch_id):
+    """Per-cell progress and speedup for a batch started via /run-batch"""
+    with batches_lock:
+        batch = batches.get(batch_id)
+    if batch is None:
+        # Not run by this process: rebuild the cell view from the registry
+        try:
+            record = job_store.get_batch(batch_id)
+            if record is None:
+                return jsonify({"error": f"Batch '{batch_id}' not found"}), 404
+            batch = BenchmarkBatch.from_registry(record, job_store.batch_cells(batch_id))
+        except Exception as e:
+            logging.error(f"Get batch error: {e}")
+            return jsonify({"error": str(e)}), 500
+    return jsonify(batch.progress())
+
+class RolePromptsCache:
+    """In-process cache of role_prompts.json, reloaded when the file's mtime/size change.
+
+    Each reload parses the file once and pre-renders the JSON bodies of the role
+    endpoints, then swaps the whole snapshot in atomically. A file caught mid-write
+    (invalid JSON) keeps the previous snapshot.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._snapshot = None  # dict built by _build
+        self._failed_signature = None  # don't re-parse a broken file on every request
+        self._stats = {"hits": 0, "reloads": 0, "reload_errors": 0}
+
+    def _build(self, raw, signature):
+        data = json.loads(raw)
+        roles = {
+            role_name: {
+                "name": role_name,
+                "test_count": len(tests),
+                "tests": tests  # Include all test details as-is from JSON
+            }
+            for role_name, tests in data.items()
+        }
+        def render(payload):
+            body = app.json.dumps(payload)
+            return body, hashlib.sha1(body.encode()).hexdigest()
+
+        return {
+            "signature": signature,
+            "data": data,
+            "list_roles": render({
+                "roles": roles,
+                "total_roles": len(roles),
+                "role_names": list(roles.keys())
+            }),
+            "api_roles": render({
+                "roles": list(roles.values()),
+                "total_roles": len(roles),
+                "total_tests": sum(role["test_count"] for role in roles.values())
+            }),
+            "role_detail": {role_name: render(role) for role_name, role in roles.items()}
+        }
+
+    def get(self):
+        """Current snapshot (parsed data plus (body, etag) views), or None when the file does not exist"""
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            self._snapshot = None
+            return None
+        signature = (stat.st_mtime_ns, stat.st_size)
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot["signature"] == signature:
+            self._stats["hits"] += 1
+            return snapshot
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and signature in (snapshot["signature"], self._failed_signature):
+                return snapshot
+            try:
+                with open(self.path, 'rb') as f:
+                    raw = f.read()
+                snapshot = self._build(raw, signature)
+            except (ValueError, AttributeError) as e:
+                self._stats["reload_errors"] += 1
+                self._failed_signature = signature
+                if self._snapshot is None:
+                    raise
+                logging.warning(f"Keeping previous role prompts, reload failed: {e}")
+                return self._snapshot
+            self._snapshot = snapshot
+            self._stats["reloads"] += 1
+            logging.info(f"Loaded role prompts: {len(snapshot['data'])} roles")
+            return snapshot
+
+    def stats(self):
+        return dict(self._stats)
+
+
+role_prompts = RolePromptsCache(WORKING_DIR / "role_prompts.json")
+
+
 def load_role_prompts():
-    """Load role prompts from JSON file"""
-    prompts_file = WORKING_DIR / "role_prompts.json"
-    if prompts_file.exists():
-        with open(prompts_file, 'r') as f:
-            return json.load(f)
-    return None
+    """Load role prompts from JSON file (cached until the file changes)"""
+    snapshot = role_prompts.get()
+    return snapshot["data"] if snapshot else None
+
+
+def cached_json_response(view):
+    """Serve a pre-rendered (body, etag) view, answering 304 when the client's ETag matches"""
+    body, etag = view
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response.make_conditional(request)
 
 @app.route('/list-roles', methods=['GET'])
 def list_roles():
     """Get list of available roles with full details from role_prompts.json"""
     try:
-        data = load_role_prompts()
-        if data is None:
+        snapshot = role_prompts.get()
+        if snapshot is None:
             return jsonify({"error": "role_prompts.json not found"}), 404
         
-        # Return full role details with all test information
-        roles_data = {}
-        for role_name, tests in data.items():
-            roles_data[role_name] = {
-                "name": role_name,
-                "test_count": len(tests),
-                "tests": tests  # Include all test details
-            }
-        
-        return jsonify({
-            "roles": roles_data,
-            "total_roles": len(roles_data),
-            "role_names": list(roles_data.keys())
-        })
+        return cached_json_response(snapshot["list_roles"])
             
     except Exception as e:
         logging.error(f"List roles error: {e}")
@@ -369,25 +3524,11 @@ def list_roles():
 def get_roles():
     """API endpoint to get all roles with full details"""
     try:
-        data = load_role_prompts()
-        if data is None:
+        snapshot = role_prompts.get()
+        if snapshot is None:
             return jsonify({"error": "role_prompts.json not found"}), 404
         
-        # Return structured role data with all test details
-        roles_list = []
-        for role_name, tests in data.items():
-            role_info = {
-                "name": role_name,
-                "test_count": len(tests),
-                "tests": tests  # Return all test details as-is from JSON
-            }
-            roles_list.append(role_info)
-        
-        return jsonify({
-            "roles": roles_list,
-            "total_roles": len(roles_list),
-            "total_tests": sum(len(r["tests"]) for r in roles_list)
-        })
+        return cached_json_response(snapshot["api_roles"])
             
     except Exception as e:
         logging.error(f"Get roles error: {e}")
@@ -397,21 +3538,15 @@ def get_roles():
 def get_role_detail(role_name):
     """Get detailed information about a specific role"""
     try:
-        data = load_role_prompts()
-        if data is None:
+        snapshot = role_prompts.get()
+        if snapshot is None:
             return jsonify({"error": "role_prompts.json not found"}), 404
         
-        if role_name not in data:
+        view = snapshot["role_detail"].get(role_name)
+        if view is None:
             return jsonify({"error": f"Role '{role_name}' not found"}), 404
         
-        tests = data[role_name]
-        role_info = {
-            "name": role_name,
-            "test_count": len(tests),
-            "tests": tests  # Return all test details as-is
-        }
-        
-        return jsonify(role_info)
+        return cached_json_response(view)
             
     except Exception as e:
         logging.error(f"Get role detail error: {e}")
@@ -427,324 +3562,1234 @@ def health():
         "working_dir": str(WORKING_DIR)
     })
 
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_duration(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        http_request_seconds.observe(time.perf_counter() - started, route, request.method, str(response.status_code))
+    return response
+
+def _stat_gauge(stats, keys):
+    """Gauge collector picking `keys` out of a stats() snapshot, labelled by key"""
+    def collect():
+        snapshot = stats()
+        return {(key,): snapshot[key] for key in keys}
+    return collect
+
+metrics.register(Gauge(
+    "trigger_job_queue_jobs",
+    "Benchmark jobs waiting in the queue or running",
+    ("state",),
+    _stat_gauge(lambda: scheduler.stats(), ("queued", "running"))
+))
+metrics.register(Gauge(
+    "trigger_db_pool_connections",
+    "Pooled Postgres connections by state",
+    ("state",),
+    _stat_gauge(lambda: db_pool.stats(), ("in_use", "idle"))
+))
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Route latency, query timing, job queue/run times and outcomes in Prometheus text format"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+@app.route('/api/system-metrics')
+def system_metrics():
+    """Recent CPU, memory, load, disk and benchmark subprocess samples"""
+    seconds = min(max(request.args.get('seconds', 300, type=float), SYSTEM_SAMPLE_INTERVAL), SYSTEM_SAMPLE_INTERVAL * SYSTEM_SAMPLE_HISTORY)
+    samples = system_sampler.series(seconds)
+    return jsonify({
+        "interval": SYSTEM_SAMPLE_INTERVAL,
+        "seconds": seconds,
+        "count": len(samples),
+        "latest": samples[-1] if samples else None,
+        "samples": samples
+    })
+
+def histogram_quantile(counts, q):
+    """Estimate the q-quantile of response_time from RESPONSE_TIME_BUCKETS counts.
+
+    Interpolates log-linearly inside the bucket holding the target rank (linearly
+    in the first one, which starts at 0); the open-ended last bucket reports its
+    lower bound. None for an empty histogram.
+    """
+    total = sum(counts)
+    if not total:
+        return None
+    rank = q * total
+    seen = 0
+    for bucket, count in enumerate(counts):
+        if not count or seen + count < rank:
+            seen += count
+            continue
+        fraction = (rank - seen) / count
+        if bucket == 0:
+            return RESPONSE_TIME_BUCKETS[0] * fraction
+        lower = RESPONSE_TIME_BUCKETS[bucket - 1]
+        if bucket == len(RESPONSE_TIME_BUCKETS):
+            return lower
+        return lower * (RESPONSE_TIME_BUCKETS[bucket] / lower) ** fraction
+    return RESPONSE_TIME_BUCKETS[-1]
+
+def histogram_percentiles(counts):
+    """{"p50": .., "p90": .., "p99": ..} from bucket counts, rounded like the other times"""
+    percentiles = {}
+    for q in PERCENTILES:
+        value = histogram_quantile(counts, q) if counts else None
+        percentiles[f"p{round(q * 100)}"] = round_numeric(value, 2) if value is not None else None
+    return percentiles
+
+def parse_time_metric(value):
+    """Validate the response-time statistic the readiness verdict is based on"""
+    metric = (value or READINESS_TIME_METRIC).lower()
+    if metric not in READINESS_TIME_METRICS:
+        raise InvalidRequest(f"time_metric must be one of: {', '.join(READINESS_TIME_METRICS)}")
+    return metric
+
+def classify_local_readiness(avg_score, avg_time):
+    """YES / HYBRID / NO verdict on running a role locally"""
+    if avg_score >= LOCAL_READY_SCORE and avg_time < LOCAL_READY_TIME:
+        return 'YES'
+    if avg_score >= HYBRID_SCORE and avg_time < HYBRID_TIME:
+        return 'HYBRID'
+    return 'NO'
+
 @app.route('/api/performance-matrix')
+@cached_response(args=('time_metric',))
 def performance_matrix():
-    """Get aggregated performance by role type"""
+    """Get aggregated performance by role type.
+
+    ?time_metric=mean|p50|p90|p99 picks the response time the YES/HYBRID/NO
+    verdict is judged on (default READINESS_TIME_METRIC).
+    """
     try:
-        conn = get_db_connection()
-        cur = conn.cursor()
+        time_metric = parse_time_metric(request.args.get('time_metric'))
+        with db_connection() as conn:
+            cur = conn.cursor()
+            groups = rollup.window_groups(cur)
+            histograms = rollup.window_histograms(cur, ensure=False)
+            cur.close()
         
-        # Get average performance by role
-        cur.execute("""
-            WITH role_performance AS (
-                SELECT 
-                    role_type,
-                    model_name,
-                    AVG(quality_score) as avg_score,
-                    AVG(response_time) as avg_time,
-                    COUNT(*) as test_count,
-                    COUNT(*) FILTER (WHERE success = true) * 100.0 / COUNT(*) as success_rate
-                FROM benchmark_results
-                WHERE role_type IS NOT NULL
-                  AND timestamp > NOW() - INTERVAL '30 days'
-                GROUP BY role_type, model_name
-            ),
-            best_per_role AS (
-                SELECT DISTINCT ON (role_type)
-                    role_type,
-                    model_name,
-                    avg_score,
-                    avg_time,
-                    test_count,
-                    success_rate
-                FROM role_performance
-                ORDER BY role_type, avg_score DESC
+        # Best model per role by average score
+        best_per_role = {}
+        for g in groups:
+            if g.role_type is None or not g.score_count or not g.time_count:
+                continue
+            avg_score = g.score_sum / g.score_count
+            best = best_per_role.get(g.role_type)
+            if best is None or avg_score > best[2]:
+                best_per_role[g.role_type] = (g, g.model_name, avg_score, g.time_sum / g.time_count)
+        
+        results = []
+        for g, model, avg_score, avg_time in sorted(best_per_role.values(), key=lambda best: best[2], reverse=True):
+            counts = histograms.get((model, g.role_type))
+            percentiles = {f"p{round(q * 100)}": histogram_quantile(counts, q) if counts else None for q in PERCENTILES}
+            verdict_time = avg_time if time_metric == "mean" else percentiles[time_metric]
+            results.append((
+                g.role_type,
+                model,
+                round_numeric(avg_score),
+                round_numeric(avg_time),
+                g.test_count,
+                round_numeric(g.success_count * 100.0 / g.test_count),
+                classify_local_readiness(avg_score, verdict_time if verdict_time is not None else avg_time),
+                histogram_percentiles(counts)
+            ))
+        
+        # Format results
+        performance_data = []
+        for row in results:
+            performance_data.append({
+                "task": row[0],  # role_type
+                "model": row[1],  # model_name
+                "score": float(row[2]),
+                "time": float(row[3]),
+                "test_count": int(row[4]),
+                "success_rate": float(row[5]),
+                "status": row[6],
+                **row[7]
+            })
+        
+        return jsonify({
+            "data": performance_data,
+            "time_metric": time_metric,
+            "total_tasks": len(performance_data),
+            "local_ready": len([d for d in performance_data if d['status'] == 'YES']),
+            "hybrid": len([d for d in performance_data if d['status'] == 'HYBRID']),
+            "cloud_only": len([d for d in performance_data if d['status'] == 'NO'])
+        })
+        
+    except InvalidRequest as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logging.error(f"Performance matrix error: {e}")
+        return jsonify({"error": str(e)}), 500
+
+class RegressionDetector:
+    """Streaming one-sided Welch test of each bucket against the pooled previous `baseline` buckets.
+
+    Fed bucket aggregates (count, sum, sum of squares) in time order, O(1) per
+    bucket. `direction` is -1 when lower is worse (scores), +1 when higher is
+    worse (response times); a bucket is flagged when it moves that way by at
+    least `min_change` (absolute, or relative when `relative`) with p < alpha.
+    """
+
+    def __init__(self, direction, min_change, relative=False, baseline=TREND_BASELINE_BUCKETS,
+                 alpha=TREND_ALPHA, min_samples=TREND_MIN_SAMPLES):
+        self.direction = direction
+        self.min_change = min_change
+        self.relative = relative
+        self.baseline = baseline
+        self.alpha = alpha
+        self.min_samples = min_samples
+        self._window = deque()
+        self._totals = [0, 0.0, 0.0]  # pooled count, sum, sum of squares over the window
+
+    @staticmethod
+    def variance(count, total, sq_total):
+        """Sample variance from a count, sum and sum of squares"""
+        if count < 2:
+            return 0.0
+        return max(0.0, (sq_total - total * total / count) / (count - 1))
+
+    def update(self, count, total, sq_total):
+        """Add the next bucket; returns a regression dict when it is a significant move, else None"""
+        count, total, sq_total = int(count or 0), total or 0.0, sq_total or 0.0
+        base_count, base_total, base_sq = self._totals
+        flagged = None
+        if count >= self.min_samples and base_count >= self.min_samples and len(self._window) == self.baseline:
+            mean = total / count
+            base_mean = base_total / base_count
+            change = (mean - base_mean) * self.direction
+            threshold = self.min_change * abs(base_mean) if self.relative else self.min_change
+            if change > 0 and change >= threshold:
+                stderr = math.sqrt(
+                    self.variance(count, total, sq_total) / count
+                    + self.variance(base_count, base_total, base_sq) / base_count
+                )
+                p_value = 0.0 if stderr == 0 else 0.5 * math.erfc(change / stderr / math.sqrt(2))
+                if p_value < self.alpha:
+                    flagged = {
+                        "baseline": round_numeric(base_mean, 2),
+                        "value": round_numeric(mean, 2),
+                        "change": round_numeric(mean - base_mean, 2),
+                        "p_value": float(f"{p_value:.3g}"),
+                        "samples": count,
+                        "baseline_samples": base_count
+                    }
+        if count:
+            self._window.append((count, total, sq_total))
+            self._totals = [base_count + count, base_total + total, base_sq + sq_total]
+            if len(self._window) > self.baseline:
+                old_count, old_total, old_sq = self._window.popleft()
+                self._totals = [
+                    self._totals[0] - old_count, self._totals[1] - old_total, self._totals[2] - old_sq
+                ]
+        return flagged
+
+
+def build_trend_series(buckets, baseline, alpha):
+    """Group trend buckets into per-(model, role) point series and run both detectors over each"""
+    series = []
+    current = None
+    for b in buckets:
+        if current is None or (b.model_name, b.role_type) != (current["model"], current["role"]):
+            current = {"model": b.model_name, "role": b.role_type, "points": [], "regressions": []}
+            detectors = {
+                "score": RegressionDetector(-1, TREND_MIN_SCORE_DROP, baseline=baseline, alpha=alpha),
+                "time": RegressionDetector(1, TREND_MIN_TIME_INCREASE, relative=True, baseline=baseline, alpha=alpha)
+            }
+            series.append(current)
+        start = b.start.date().isoformat()
+        point = {
+            "start": start,
+            "test_count": int(b.test_count),
+            "success_rate": round_numeric(b.success_count * 100.0 / b.test_count) if b.test_count else None
+        }
+        for metric, (count, total, sq_total) in (
+            ("score", (b.score_count, b.score_sum or 0.0, b.score_sq_sum or 0.0)),
+            ("time", (b.time_count, b.time_sum or 0.0, b.time_sq_sum or 0.0))
+        ):
+            point[metric] = round_numeric(total / count, 2) if count else None
+            point[f"{metric}_std"] = (
+                round_numeric(math.sqrt(RegressionDetector.variance(count, total, sq_total)), 2) if count else None
             )
-            SELECT 
-                role_type,
-                model_name,
-                ROUND(avg_score::numeric, 1) as score,
-                ROUND(avg_time::numeric, 1) as time,
-                test_count,
-                ROUND(success_rate::numeric, 1) as success_rate,
-                CASE
-                    WHEN avg_score >= 7.5 AND avg_time < 15 THEN 'YES'
-                    WHEN avg_score >= 7.0 AND avg_time < 30 THEN 'HYBRID'
-                    ELSE 'NO'
-                END as status
-            FROM best_per_role
-            ORDER BY avg_score DESC
-        """)
+            flagged = detectors[metric].update(count, total, sq_total)
+            if flagged:
+                current["regressions"].append({"start": start, "metric": metric, **flagged})
+        current["points"].append(point)
+    return series
+
+@app.route('/api/trends')
+@cached_response(args=('model', 'role', 'bucket', 'days', 'baseline', 'alpha'))
+def get_trends():
+    """Bucketed score/time series per (model, role) with regressions against a rolling baseline"""
+    try:
+        bucket = request.args.get('bucket', 'week').lower()
+        if bucket not in TREND_BUCKETS:
+            raise InvalidRequest(f"bucket must be one of: {', '.join(TREND_BUCKETS)}")
+        days = request.args.get('days', TREND_DEFAULT_DAYS, type=int)
+        if days is None or not 1 <= days <= 3650:
+            raise InvalidRequest("days must be an integer between 1 and 3650")
+        baseline = request.args.get('baseline', TREND_BASELINE_BUCKETS, type=int)
+        if baseline is None or not 1 <= baseline <= 52:
+            raise InvalidRequest("baseline must be an integer between 1 and 52")
+        alpha = request.args.get('alpha', TREND_ALPHA, type=float)
+        if alpha is None or not 0 < alpha < 0.5:
+            raise InvalidRequest("alpha must be a number between 0 and 0.5")
         
-        results = cur.fetchall()
-        cur.close()
-        conn.close()
+        with db_connection() as conn:
+            cur = conn.cursor()
+            buckets = rollup.trend_buckets(
+                cur, bucket, days, request.args.getlist('model'), request.args.getlist('role')
+            )
+            cur.close()
+        
+        series = build_trend_series(buckets, baseline, alpha)
+        return jsonify({
+            "bucket": bucket,
+            "days": days,
+            "baseline_buckets": baseline,
+            "alpha": alpha,
+            "series": series,
+            "total_series": len(series),
+            "regressions": sum(len(s["regressions"]) for s in series)
+        })
+        
+    except InvalidRequest as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logging.error(f"Trends error: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/response-times')
+@cached_response(args=('model', 'role', 'days'))
+def response_time_distribution():
+    """Response-time percentiles and histogram per (model, role) over the last `days` days"""
+    try:
+        days = request.args.get('days', DASHBOARD_WINDOW_DAYS, type=int)
+        if days is None or not 1 <= days <= 3650:
+            raise InvalidRequest("days must be an integer between 1 and 3650")
+        models = set(request.args.getlist('model'))
+        roles = set(request.args.getlist('role'))
+        
+        with db_connection() as conn:
+            cur = conn.cursor()
+            groups = rollup.window_groups(cur, days)
+            histograms = rollup.window_histograms(cur, days, ensure=False)
+            cur.close()
         
-        # Format results
-        performance_data = []
-        for row in results:
-            performance_data.append({
-                "task": row[0],  # role_type
-                "model": row[1],  # model_name
-                "score": float(row[2]),
-                "time": float(row[3]),
-                "test_count": int(row[4]),
-                "success_rate": float(row[5]),
-                "status": row[6]
+        distributions = []
+        for g in sorted(groups, key=lambda g: (g.model_name or "", g.role_type or "")):
+            if (models and g.model_name not in models) or (roles and g.role_type not in roles):
+                continue
+            counts = histograms.get((g.model_name, g.role_type))
+            if not counts or not g.time_count:
+                continue
+            buckets = [
+                {
+                    "lower": RESPONSE_TIME_BUCKETS[bucket - 1] if bucket else 0.0,
+                    "upper": RESPONSE_TIME_BUCKETS[bucket] if bucket < len(RESPONSE_TIME_BUCKETS) else None,
+                    "count": count
+                }
+                for bucket, count in enumerate(counts)
+                if count
+            ]
+            distributions.append({
+                "model": g.model_name,
+                "role": g.role_type,
+                "count": int(g.time_count),
+                "mean": round_numeric(g.time_sum / g.time_count, 2),
+                **histogram_percentiles(counts),
+                "buckets": buckets
             })
         
         return jsonify({
-            "data": performance_data,
-            "total_tasks": len(performance_data),
-            "local_ready": len([d for d in performance_data if d['status'] == 'YES']),
-            "hybrid": len([d for d in performance_data if d['status'] == 'HYBRID']),
-            "cloud_only": len([d for d in performance_data if d['status'] == 'NO'])
+            "days": days,
+            "distributions": distributions,
+            "total": len(distributions)
         })
         
+    except InvalidRequest as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
-        logging.error(f"Performance matrix error: {e}")
+        logging.error(f"Response time distribution error: {e}")
         return jsonify({"error": str(e)}), 500
 
+def build_benchmark_filters(args, success_only=True):
+    """Translate the model/role/minScore/maxScore query args into a WHERE clause and params"""
+    models = args.getlist('model')
+    roles = args.getlist('role')
+    min_score = args.get('minScore', type=float)
+    max_score = args.get('maxScore', type=float)
+    
+    where_clauses = ["success = true"] if success_only else ["TRUE"]
+    params = []
+    
+    if models:
+        placeholders = ','.join(['%s'] * len(models))
+        where_clauses.append(f"model_name IN ({placeholders})")
+        params.extend(models)
+    
+    if roles:
+        placeholders = ','.join(['%s'] * len(roles))
+        where_clauses.append(f"role_type IN ({placeholders})")
+        params.extend(roles)
+    
+    if min_score is not None:
+        where_clauses.append("quality_score >= %s")
+        params.append(min_score)
+    
+    if max_score is not None:
+        where_clauses.append("quality_score <= %s")
+        params.append(max_score)
+    
+    return " AND ".join(where_clauses), params
+
+
+# Public field name -> benchmark_results column for raw row listings
+RESULT_FIELDS = {
+    "id": "id",
+    "model": "model_name",
+    "role": "role_type",
+    "score": "quality_score",
+    "time": "response_time",
+    "success": "success",
+    "timestamp": "timestamp",
+    "prompt": "prompt_text",
+    "response": "full_response",
+    "breakdown": "scoring_breakdown"
+}
+DEFAULT_RESULT_FIELDS = ["id", "model", "role", "score", "time", "success", "timestamp"]
+# Parquet column types (pyarrow aliases) of RESULT_FIELDS; breakdown is exported as a JSON string
+RESULT_PARQUET_TYPES = {
+    "id": "int64",
+    "model": "string",
+    "role": "string",
+    "score": "double",
+    "time": "double",
+    "success": "bool",
+    "timestamp": "timestamp[us]",
+    "prompt": "string",
+    "response": "string",
+    "breakdown": "string"
+}
+
+
+class InvalidRequest(ValueError):
+    """Bad query parameters; routes answer 400"""
+
+
+def parse_result_fields(value):
+    """Validate a comma separated `fields` arg against RESULT_FIELDS"""
+    if not value:
+        return list(DEFAULT_RESULT_FIELDS)
+    fields = [field.strip() for field in value.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in RESULT_FIELDS]
+    if unknown:
+        raise InvalidRequest(f"Unknown field(s): {', '.join(unknown)}. Available: {', '.join(RESULT_FIELDS)}")
+    return fields
+
+
+def build_result_filters(args):
+    """Benchmark filters plus success (true/false/all) and since/until time range"""
+    success = args.get('success', 'true').lower()
+    if success not in ('true', 'false', 'all'):
+        raise InvalidRequest("success must be true, false or all")
+    where_sql, params = build_benchmark_filters(args, success_only=success == 'true')
+    clauses = [where_sql]
+    if success == 'false':
+        clauses.append("success = false")
+    for name, operator in (('since', '>='), ('until', '<')):
+        value = args.get(name)
+        if not value:
+            continue
+        try:
+            datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            raise InvalidRequest(f"{name} must be an ISO 8601 timestamp")
+        clauses.append(f"timestamp {operator} %s")
+        params.append(value)
+    return " AND ".join(clauses), params
+
+
+def encode_cursor(timestamp, row_id):
+    # Legacy rows may have no timestamp: encoded as null
+    raw = json.dumps([timestamp.isoformat() if timestamp is not None else None, row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        timestamp, row_id = json.loads(raw)
+        if timestamp is not None:
+            datetime.fromisoformat(timestamp)
+        return timestamp, int(row_id)
+    except (ValueError, TypeError):
+        raise InvalidRequest("Invalid cursor")
+
+
+def format_result_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet")
+}
+
+
+class _ChunkSink:
+    """Write-only file object that hands buffered bytes back to a generator"""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _export_rows(fields, where_sql, params, batch_rows):
+    """Yield lists of row dicts from a server-side (named) cursor, batch_rows at a time"""
+    columns = [RESULT_FIELDS[field] for field in fields]
+    with db_connection() as conn:
+        # Named cursor: Postgres keeps the result set, we only ever hold one batch
+        cur = conn.cursor(name=f"export_{uuid.uuid4().hex}")
+        cur.itersize = batch_rows
+        cur.execute(export_query(columns, where_sql), params)
+        try:
+            while True:
+                rows = cur.fetchmany(batch_rows)
+                if not rows:
+                    break
+                yield [dict(zip(fields, row)) for row in rows]
+        finally:
+            cur.close()
+            conn.rollback()
+
+
+def iter_export(fmt, fields, where_sql, params, batch_rows=EXPORT_BATCH_ROWS):
+    """Stream benchmark_results as NDJSON, CSV or Parquet bytes with bounded memory"""
+    batches = _export_rows(fields, where_sql, params, batch_rows)
+    try:
+        yield from _encode_export(fmt, fields, batches)
+    finally:
+        # A client that disconnects closes this generator: close the named cursor and
+        # hand the connection back now rather than whenever `batches` is collected
+        batches.close()
+
+
+def _encode_export(fmt, fields, batches):
+    if fmt == "ndjson":
+        for batch in batches:
+            yield "".join(
+                json.dumps({key: format_result_value(value) for key, value in row.items()}, default=str) + "\n"
+                for row in batch
+            ).encode()
+    elif fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(fields)
+        for batch in batches:
+            for row in batch:
+                writer.writerow([
+                    json.dumps(value) if isinstance(value, (dict, list)) else format_result_value(value)
+                    for value in row.values()
+                ])
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode()
+    elif fmt == "parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        sink = _ChunkSink()
+        # Declared up front: inferring from the first batch breaks when that batch is all NULL
+        # in a column (or a different type) and a later batch is not
+        schema = pa.schema([(field, pa.type_for_alias(RESULT_PARQUET_TYPES[field])) for field in fields])
+        writer = pq.ParquetWriter(sink, schema, compression="zstd")
+        for batch in batches:
+            for row in batch:
+                if "breakdown" in row and row["breakdown"] is not None:
+                    # JSONB shapes vary per role; keep it as a JSON string column
+                    row["breakdown"] = json.dumps(row["breakdown"])
+                for key, value in row.items():
+                    if isinstance(value, Decimal):
+                        row[key] = float(value)
+            # One row group per batch, flushed to the client straight away
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            yield sink.drain()
+        writer.close()
+        yield sink.drain()
+    else:
+        raise InvalidRequest(f"Unknown export format: {fmt}")
+
+
+def fetch_results_page(cur, columns, where_sql, params, limit):
+    """Newest-first page of raw rows; served by the (timestamp, id) index"""
+    cur.execute(f"""
+        SELECT {', '.join(columns)}
+        FROM benchmark_results
+        WHERE {where_sql}
+        ORDER BY timestamp DESC, id DESC
+        LIMIT %s
+    """, params + [limit])
+    return cur.fetchall()
+
+
+def export_query(columns, where_sql):
+    """Oldest-first full scan used by bulk exports"""
+    return f"""
+        SELECT {', '.join(columns)}
+        FROM benchmark_results
+        WHERE {where_sql}
+        ORDER BY timestamp, id
+    """
+
+
+# Heavy detail fields, selectable with ?fields=
+DETAIL_FIELDS = {
+    "prompt": "prompt_text",
+    "response": "full_response",
+    "breakdown": "scoring_breakdown",
+}
+
+_result_column_types = None
+_preview_columns = None
+
+
+def parse_detail_fields(value):
+    if not value:
+        return list(DETAIL_FIELDS)
+    fields = [field.strip() for field in value.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in DETAIL_FIELDS]
+    if unknown:
+        raise InvalidRequest(f"Unknown field(s): {', '.join(unknown)}. Available: {', '.join(DETAIL_FIELDS)}")
+    return fields
+
+
+def result_column_types(cur):
+    """{column: data type} of benchmark_results, read once per process"""
+    global _result_column_types
+    if _result_column_types is None:
+        cur.execute("""
+            SELECT column_name, data_type FROM information_schema.columns
+            WHERE table_name = 'benchmark_results'
+              AND table_schema = ANY(current_schemas(false))
+        """)
+        _result_column_types = dict(cur.fetchall())
+    return _result_column_types
+
+
+def response_preview_columns(cur):
+    """SQL for (response preview, response length).
+
+    Uses the precomputed columns from sql/migrations/0002_benchmark_results_preview.sql
+    when they exist, so a preview never reads the TOASTed full_response; otherwise
+    computes them on the fly. Checked once per process.
+    """
+    global _preview_columns
+    if _preview_columns is None:
+        if {"response_preview", "response_length"} <= set(result_column_types(cur)):
+            _preview_columns = ["response_preview", "response_length"]
+        else:
+            logging.info("benchmark_results has no precomputed preview columns; computing previews per request")
+            _preview_columns = [f"left(full_response, {DETAIL_PREVIEW_CHARS})", "char_length(full_response)"]
+    return _preview_columns
+
+
+INGEST_COLUMNS = (
+    "model_name", "role_type", "quality_score", "response_time", "prompt_text",
+    "full_response", "scoring_breakdown", "success", "timestamp"
+)
+
+INGEST_SQL = """
+    WITH incoming ({columns}) AS (VALUES %s),
+    fresh AS (
+        -- Natural key (model, role, timestamp, prompt): drop repeats within the
+        -- batch and rows an earlier (retried) batch already stored
+        SELECT DISTINCT ON (model_name, role_type, timestamp, md5(COALESCE(prompt_text, ''))) *
+        FROM incoming i
+        WHERE NOT EXISTS (
+            SELECT 1 FROM benchmark_results r
+            WHERE r.timestamp = i.timestamp
+              AND r.model_name = i.model_name
+              AND r.role_type = i.role_type
+              AND md5(COALESCE(r.prompt_text, '')) = md5(COALESCE(i.prompt_text, ''))
+        )
+    )
+    INSERT INTO benchmark_results ({columns})
+    SELECT {columns} FROM fresh
+    RETURNING id, timestamp
+"""
+
+
+def _ingest_number(row, name):
+    value = row.get(name)
+    if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+        raise InvalidRequest(f"{name} must be a number")
+    return value
+
+
+def parse_ingest_row(row):
+    """One API-shaped result ({model, role, timestamp, score, ...}) as a tuple in INGEST_COLUMNS order"""
+    if not isinstance(row, dict):
+        raise InvalidRequest("row must be an object")
+    unknown = [name for name in row if name not in RESULT_FIELDS or name == "id"]
+    if unknown:
+        raise InvalidRequest(f"Unknown field(s): {', '.join(unknown)}")
+    for name in ("model", "role"):
+        if not isinstance(row.get(name), str) or not row[name].strip():
+            raise InvalidRequest(f"{name} is required")
+    # The timestamp is part of the natural key, so the client must set it: a
+    # server-side NOW() would make every retry look like a new result
+    try:
+        timestamp = datetime.fromisoformat(row["timestamp"].replace('Z', '+00:00'))
+    except (KeyError, AttributeError, ValueError):
+        raise InvalidRequest("timestamp is required as an ISO 8601 string")
+    for name in ("prompt", "response"):
+        if row.get(name) is not None and not isinstance(row[name], str):
+            raise InvalidRequest(f"{name} must be a string")
+    if row.get("breakdown") is not None and not isinstance(row["breakdown"], dict):
+        raise InvalidRequest("breakdown must be an object")
+    if not isinstance(row.get("success", True), bool):
+        raise InvalidRequest("success must be true or false")
+    return (
+        row["model"].strip(),
+        row["role"].strip(),
+        _ingest_number(row, "score"),
+        _ingest_number(row, "time"),
+        row.get("prompt"),
+        row.get("response"),
+        Json(row["breakdown"]) if row.get("breakdown") is not None else None,
+        row.get("success", True),
+        timestamp
+    )
+
+
+def ingest_results(cur, values, page_rows=BULK_INGEST_PAGE_ROWS):
+    """Insert parsed rows, skipping natural-key duplicates; returns [(id, timestamp)] of the rows written.
+
+    Runs in the caller's transaction. Ingests are serialized with an advisory
+    lock so two concurrent retries of the same batch can't both pass the
+    duplicate check.
+    """
+    timestamp_type = result_column_types(cur).get("timestamp", "timestamp with time zone")
+    template = (
+        "(%s, %s, %s::float8, %s::float8, %s, %s, %s::jsonb, %s::boolean, "
+        f"%s::timestamptz::{timestamp_type})"
+    )
+    cur.execute("SELECT pg_advisory_xact_lock(hashtext('benchmark_results_ingest'))")
+    return execute_values(
+        cur, INGEST_SQL.format(columns=", ".join(INGEST_COLUMNS)), values,
+        template=template, page_size=page_rows, fetch=True
+    )
+
+
+def round_numeric(value, places=1):
+    """Round half away from zero, like Postgres ROUND(x::numeric, n)"""
+    return float(Decimal(str(value)).quantize(Decimal(1).scaleb(-places), rounding=ROUND_HALF_UP))
+
+
+def fetch_benchmark_groups(cur, where_sql, params):
+    """One grouped pass over the filtered rows: sums and counts per (role_type, model_name)"""
+    cur.execute(f"""
+        SELECT
+            role_type,
+            model_name,
+            COUNT(*) as test_count,
+            SUM(quality_score) as score_sum,
+            COUNT(quality_score) as score_count,
+            SUM(response_time) as time_sum,
+            COUNT(response_time) as time_count
+        FROM benchmark_results
+        WHERE {where_sql}
+        GROUP BY role_type, model_name
+    """, params)
+    return cur.fetchall()
+
+
+def fetch_time_percentiles(cur, where_sql, params, pairs):
+    """Exact response-time percentiles for the given (role_type, model_name) pairs.
+
+    The pairs narrow the scan to a few ranges of the (model_name, role_type)
+    index; returns {(role, model): {"p50": .., "p90": .., "p99": ..}}.
+    """
+    if not pairs:
+        return {}
+    cur.execute(f"""
+        SELECT
+            role_type,
+            model_name,
+            percentile_cont(%s::float8[]) WITHIN GROUP (ORDER BY response_time)
+        FROM benchmark_results
+        WHERE {where_sql}
+          AND model_name = ANY(%s) AND role_type = ANY(%s)
+          AND response_time IS NOT NULL
+        GROUP BY role_type, model_name
+    """, [list(PERCENTILES)] + params + [list({model for _, model in pairs}), list({role for role, _ in pairs})])
+    return {
+        (role, model): {
+            f"p{round(q * 100)}": round_numeric(value, 2) if value is not None else None
+            for q, value in zip(PERCENTILES, values)
+        }
+        for role, model, values in cur.fetchall()
+        if (role, model) in pairs
+    }
+
+
+def aggregate_benchmarks(groups):
+    """Reduce per-(role, model) groups into the summary, matrix and chart data of /api/benchmarks.
+
+    Averages are recombined from sums and counts, so the results equal the
+    AVG() the per-widget queries used to compute over the raw rows.
+    """
+    per_model = {}
+    roles = set()
+    total_tests = 0
+    best_per_role = {}
+    for role, model, test_count, score_sum, score_count, time_sum, time_count in groups:
+        total_tests += test_count
+        if role is not None:
+            roles.add(role)
+        totals = per_model.setdefault(model, [0.0, 0, 0.0, 0])
+        totals[0] += score_sum or 0
+        totals[1] += score_count
+        totals[2] += time_sum or 0
+        totals[3] += time_count
+        if not score_count:
+            continue
+        avg_score = score_sum / score_count
+        best = best_per_role.get(role)
+        if best is None or avg_score > best["avg_score"]:
+            best_per_role[role] = {
+                "role": role,
+                "model": model,
+                "avg_score": avg_score,
+                "avg_time": time_sum / time_count if time_count else None,
+                "test_count": test_count
+            }
+    
+    model_scores = [(model, t[0] / t[1]) for model, t in per_model.items() if t[1]]
+    model_times = [(model, t[2] / t[3]) for model, t in per_model.items() if t[3]]
+    model_scores.sort(key=lambda item: item[1], reverse=True)
+    model_times.sort(key=lambda item: item[1])
+    
+    summary = {
+        "totalTests": total_tests,
+        "models": len(per_model),
+        "roles": len(roles),
+        "speedChampion": {
+            "model": model_times[0][0],
+            "time": round(float(model_times[0][1]), 1)
+        } if model_times else None,
+        "qualityChampion": {
+            "model": model_scores[0][0],
+            "score": round(float(model_scores[0][1]), 1)
+        } if model_scores else None,
+        "lastUpdated": datetime.now().isoformat()
+    }
+    
+    matrix = [
+        {
+            "task": best["role"],
+            "model": best["model"],
+            "score": round_numeric(best["avg_score"]),
+            "time": round_numeric(best["avg_time"]) if best["avg_time"] is not None else None,
+            "test_count": int(best["test_count"])
+        }
+        for best in sorted(best_per_role.values(), key=lambda best: best["avg_score"], reverse=True)
+    ]
+    
+    chart_data = {
+        "responseTimes": [{"model": model, "time": round(float(avg), 1)} for model, avg in model_times],
+        "qualityDistribution": [{"model": model, "score": round(float(avg), 1)} for model, avg in model_scores]
+    }
+    return summary, matrix, chart_data
+
 @app.route('/api/benchmarks')
+@cached_response(args=('model', 'role', 'minScore', 'maxScore', 'summary'))
 def get_benchmarks():
     """Unified endpoint matching PRD spec"""
     try:
         # Get query params
-        models = request.args.getlist('model')
-        roles = request.args.getlist('role')
-        min_score = request.args.get('minScore', type=float)
-        max_score = request.args.get('maxScore', type=float)
         summary_only = request.args.get('summary', 'false').lower() == 'true'
+        where_sql, params = build_benchmark_filters(request.args)
         
-        conn = get_db_connection()
-        cur = conn.cursor()
-        
-        # Build WHERE clause for filters
-        where_clauses = ["success = true"]
-        params = []
-        
-        if models:
-            placeholders = ','.join(['%s'] * len(models))
-            where_clauses.append(f"model_name IN ({placeholders})")
-            params.extend(models)
-        
-        if roles:
-            placeholders = ','.join(['%s'] * len(roles))
-            where_clauses.append(f"role_type IN ({placeholders})")
-            params.extend(roles)
-        
-        if min_score is not None:
-            where_clauses.append("quality_score >= %s")
-            params.append(min_score)
+        with db_connection() as conn:
+            cur = conn.cursor()
+            groups = fetch_benchmark_groups(cur, where_sql, params)
+            summary, matrix, chart_data = aggregate_benchmarks(groups)
+            if not summary_only:
+                percentiles = fetch_time_percentiles(
+                    cur, where_sql, params, {(item["task"], item["model"]) for item in matrix}
+                )
+                for item in matrix:
+                    item.update(percentiles.get((item["task"], item["model"]), dict.fromkeys(("p50", "p90", "p99"))))
+            cur.close()
         
-        if max_score is not None:
-            where_clauses.append("quality_score <= %s")
-            params.append(max_score)
+        if summary_only:
+            return jsonify({"summary": summary})
         
-        where_sql = " AND ".join(where_clauses)
+        return jsonify({
+            "summary": summary,
+            "matrix": matrix,
+            "chartData": chart_data
+        })
         
-        # Get summary stats
-        cur.execute(f"""
-            SELECT 
-                COUNT(*) as total_tests,
-                COUNT(DISTINCT model_name) as models,
-                COUNT(DISTINCT role_type) as roles
-            FROM benchmark_results
-            WHERE {where_sql}
-        """, params)
-        summary_row = cur.fetchone()
+    except Exception as e:
+        logging.error(f"Benchmarks error: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/results')
+def list_results():
+    """Raw benchmark rows, newest first, with keyset pagination on (timestamp, id)"""
+    try:
+        fields = parse_result_fields(request.args.get('fields'))
+        limit = min(max(request.args.get('limit', 100, type=int), 1), 1000)
+        where_sql, params = build_result_filters(request.args)
         
-        # Get speed champion
-        cur.execute(f"""
-            SELECT model_name, AVG(response_time) as avg_time
-            FROM benchmark_results
-            WHERE {where_sql}
-            GROUP BY model_name
-            ORDER BY avg_time ASC
-            LIMIT 1
-        """, params)
-        speed_champ = cur.fetchone()
+        cursor = request.args.get('cursor')
+        if cursor:
+            # Seek past the previous page instead of OFFSET, so deep pages cost the same
+            cursor_timestamp, cursor_id = decode_cursor(cursor)
+            if cursor_timestamp is None:
+                # NULL timestamps sort first under DESC: finish those by id, then every timestamped row
+                where_sql += " AND (timestamp IS NOT NULL OR id < %s)"
+                params += [cursor_id]
+            else:
+                where_sql += " AND (timestamp, id) < (%s, %s)"
+                params += [cursor_timestamp, cursor_id]
         
-        # Get quality champion
-        cur.execute(f"""
-            SELECT model_name, AVG(quality_score) as avg_score
-            FROM benchmark_results
-            WHERE {where_sql}
-            GROUP BY model_name
-            ORDER BY avg_score DESC
-            LIMIT 1
-        """, params)
-        quality_champ = cur.fetchone()
-        
-        summary = {
-            "totalTests": summary_row[0],
-            "models": summary_row[1],
-            "roles": summary_row[2],
-            "speedChampion": {
-                "model": speed_champ[0],
-                "time": round(float(speed_champ[1]), 1)
-            } if speed_champ else None,
-            "qualityChampion": {
-                "model": quality_champ[0],
-                "score": round(float(quality_champ[1]), 1)
-            } if quality_champ else None,
-            "lastUpdated": datetime.now().isoformat()
-        }
+        columns = [RESULT_FIELDS[field] for field in fields]
+        select_columns = columns + ["timestamp", "id"]  # always needed for the next cursor
         
-        if summary_only:
+        with db_connection() as conn:
+            cur = conn.cursor()
+            rows = fetch_results_page(cur, select_columns, where_sql, params, limit + 1)
             cur.close()
-            conn.close()
-            return jsonify({"summary": summary})
         
-        # Get matrix data (existing query)
-        cur.execute(f"""
-            WITH role_performance AS (
-                SELECT 
-                    role_type,
-                    model_name,
-                    AVG(quality_score) as avg_score,
-                    AVG(response_time) as avg_time,
-                    COUNT(*) as test_count
-                FROM benchmark_results
-                WHERE {where_sql}
-                GROUP BY role_type, model_name
-            ),
-            best_per_role AS (
-                SELECT DISTINCT ON (role_type)
-                    role_type,
-                    model_name,
-                    avg_score,
-                    avg_time,
-                    test_count
-                FROM role_performance
-                ORDER BY role_type, avg_score DESC
-            )
-            SELECT 
-                role_type,
-                model_name,
-                ROUND(avg_score::numeric, 1) as score,
-                ROUND(avg_time::numeric, 1) as time,
-                test_count
-            FROM best_per_role
-            ORDER BY avg_score DESC
-        """, params)
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        results = [
+            {field: format_result_value(value) for field, value in zip(fields, row)}
+            for row in rows
+        ]
         
-        matrix_results = cur.fetchall()
+        return jsonify({
+            "results": results,
+            "count": len(results),
+            "fields": fields,
+            "next_cursor": encode_cursor(rows[-1][-2], rows[-1][-1]) if has_more else None
+        })
         
-        # Get chart data
-        # Response times by model
-        cur.execute(f"""
-            SELECT 
-                model_name,
-                AVG(response_time) as avg_time
-            FROM benchmark_results
-            WHERE {where_sql}
-            GROUP BY model_name
-            ORDER BY avg_time ASC
-        """, params)
-        response_times = [
-            {"model": row[0], "time": round(float(row[1]), 1)}
-            for row in cur.fetchall()
-        ]
+    except InvalidRequest as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logging.error(f"Results listing error: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/results/export')
+def export_results():
+    """Stream every matching row as NDJSON (default), CSV or Parquet"""
+    try:
+        fmt = request.args.get('format', 'ndjson').lower()
+        if fmt not in EXPORT_FORMATS:
+            raise InvalidRequest(f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+        if fmt == "parquet":
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                return jsonify({"error": "Parquet export needs pyarrow installed on the server"}), 501
+        fields = parse_result_fields(request.args.get('fields') or ",".join(RESULT_FIELDS))
+        where_sql, params = build_result_filters(request.args)
+    except InvalidRequest as e:
+        return jsonify({"error": str(e)}), 400
+    
+    mimetype, extension = EXPORT_FORMATS[fmt]
+    filename = f"benchmark_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+    logging.info(f"Starting {fmt} export: {len(fields)} fields")
+    return Response(
+        stream_with_context(iter_export(fmt, fields, where_sql, params)),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"', "X-Accel-Buffering": "no"}
+    )
+
+@app.route('/api/results/bulk', methods=['POST'])
+def ingest_results_bulk():
+    """Write many result rows in one transaction; rows already stored are skipped, so retries are safe"""
+    try:
+        data = request.get_json(silent=True)
+        rows = data.get('rows') if isinstance(data, dict) else None
+        if not isinstance(rows, list) or not rows:
+            raise InvalidRequest('Body must be {"rows": [...]} with at least one row')
+        if len(rows) > BULK_INGEST_MAX_ROWS:
+            raise InvalidRequest(f"At most {BULK_INGEST_MAX_ROWS} rows per request")
         
-        # Quality distribution by model
-        cur.execute(f"""
-            SELECT 
-                model_name,
-                AVG(quality_score) as avg_score
-            FROM benchmark_results
-            WHERE {where_sql}
-            GROUP BY model_name
-            ORDER BY avg_score DESC
-        """, params)
-        quality_dist = [
-            {"model": row[0], "score": round(float(row[1]), 1)}
-            for row in cur.fetchall()
-        ]
+        values, errors = [], []
+        for index, row in enumerate(rows):
+            try:
+                values.append(parse_ingest_row(row))
+            except InvalidRequest as e:
+                errors.append({"index": index, "error": str(e)})
+        if errors:
+            return jsonify({"error": f"{len(errors)} invalid row(s); nothing was written", "rows": errors[:100]}), 400
         
-        cur.close()
-        conn.close()
-        
-        # Format matrix
-        matrix = []
-        for row in matrix_results:
-            matrix.append({
-                "task": row[0],
-                "model": row[1],
-                "score": float(row[2]),
-                "time": float(row[3]),
-                "test_count": int(row[4])
-            })
+        started = time.monotonic()
+        with db_connection() as conn:
+            cur = conn.cursor()
+            written = ingest_results(cur, values)
+            if written:
+                rollup.invalidate_from(cur, min(timestamp for _, timestamp in written))
+            conn.commit()
+            cur.close()
+        elapsed = time.monotonic() - started
         
+        if written:
+            rollup.request_refresh()
+            response_cache.invalidate()
+        logging.info(f"Ingested {len(written)}/{len(values)} result rows in {elapsed * 1000:.0f}ms")
         return jsonify({
-            "summary": summary,
-            "matrix": matrix,
-            "chartData": {
-                "responseTimes": response_times,
-                "qualityDistribution": quality_dist
-            }
+            "received": len(values),
+            "inserted": len(written),
+            "duplicates": len(values) - len(written),
+            "ids": [row_id for row_id, _ in written],
+            "elapsed_ms": round(elapsed * 1000, 1)
         })
         
+    except InvalidRequest as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
-        logging.error(f"Benchmarks error: {e}")
+        logging.error(f"Bulk ingest error: {e}")
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/benchmarks/<int:benchmark_id>')
+@compressed
 def get_benchmark_detail(benchmark_id):
-    """Get single benchmark result for modal display"""
+    """Get single benchmark result for modal display.
+
+    ?fields=prompt,response,breakdown limits the heavy fields (default: all).
+    ?preview=true sends only the first DETAIL_PREVIEW_CHARS of the response plus
+    its full length; the rest comes from /api/benchmarks/<id>/response.
+    """
     try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-        
-        cur.execute("""
-            SELECT 
-                id,
-                model_name,
-                role_type,
-                quality_score,
-                response_time,
-                prompt_text,
-                full_response,
-                scoring_breakdown
-            FROM benchmark_results
-            WHERE id = %s
-        """, (benchmark_id,))
-        
-        result = cur.fetchone()
-        cur.close()
-        conn.close()
-        
+        fields = parse_detail_fields(request.args.get('fields'))
+        preview = request.args.get('preview', 'false').lower() == 'true'
+        with db_connection() as conn:
+            cur = conn.cursor()
+            columns = ["id", "model_name", "role_type", "quality_score", "response_time"]
+            for field in fields:
+                if field == 'response' and preview:
+                    columns += response_preview_columns(cur)
+                else:
+                    columns.append(DETAIL_FIELDS[field])
+
+            cur.execute(f"""
+                SELECT {', '.join(columns)}
+                FROM benchmark_results
+                WHERE id = %s
+            """, (benchmark_id,))
+
+            result = cur.fetchone()
+            cur.close()
+
         if not result:
             return jsonify({"error": "Benchmark not found"}), 404
-        
-        return jsonify({
+
+        detail = {
             "id": result[0],
             "model": result[1],
             "role": result[2],
             "score": float(result[3]),
-            "time": float(result[4]),
-            "prompt": result[5],
-            "response": result[6],
-            "breakdown": result[7]  # Already JSONB
-        })
-        
+            "time": float(result[4])
+        }
+        values = iter(result[5:])
+        for field in fields:
+            detail[field] = next(values)  # breakdown is already JSONB
+            if field == 'response' and preview:
+                length = next(values) or 0
+                detail["response_length"] = length
+                detail["response_truncated"] = length > DETAIL_PREVIEW_CHARS
+        return jsonify(detail)
+
+    except InvalidRequest as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         logging.error(f"Benchmark detail error: {e}")
         return jsonify({"error": str(e)}), 500
 
 
+@app.route('/api/benchmarks/<int:benchmark_id>/response')
+@compressed
+def get_benchmark_response(benchmark_id):
+    """A character range of full_response, for loading long responses on demand"""
+    try:
+        offset = request.args.get('offset', 0, type=int)
+        limit = request.args.get('limit', DETAIL_CHUNK_CHARS, type=int)
+        if offset < 0 or limit < 1:
+            raise InvalidRequest("offset must be >= 0 and limit >= 1")
+        limit = min(limit, DETAIL_CHUNK_MAX)
+
+        with db_connection() as conn:
+            cur = conn.cursor()
+            length_sql = response_preview_columns(cur)[1]
+            # substr() on a TOASTed value only decompresses up to the end of the slice
+            cur.execute(f"""
+                SELECT substr(full_response, %s, %s), {length_sql}
+                FROM benchmark_results
+                WHERE id = %s
+            """, (offset + 1, limit, benchmark_id))
+            result = cur.fetchone()
+            cur.close()
+
+        if not result:
+            return jsonify({"error": "Benchmark not found"}), 404
+
+        text, total_length = result[0] or "", result[1] or 0
+        end = offset + len(text)
+        return jsonify({
+            "id": benchmark_id,
+            "offset": offset,
+            "text": text,
+            "total_length": total_length,
+            "next_offset": end if end < total_length else None
+        })
+
+    except InvalidRequest as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logging.error(f"Benchmark response chunk error: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+def startup():
+    """One-time process setup shared by every serving mode"""
+    logging.info(f"Starting AI Labs Trigger Server")
+    logging.info(f"Benchmark script: {BENCHMARK_SCRIPT_PATH}")
+    logging.info(f"Working directory: {WORKING_DIR}")
+    logging.info(f"Database pool: {DB_POOL_MIN}-{DB_POOL_MAX} connections to {DB_HOST}:{DB_PORT}/{DB_NAME}")
+    
+    system_sampler.start()
+    if warm_workers is not None:
+        warm_workers.start()
+        logging.info(f"Warm benchmark workers: {warm_workers.size}, recycled after {WARM_WORKER_MAX_JOBS} jobs or {WARM_WORKER_MAX_RSS_MB:.0f} MB")
+    
+    # Each step is independent and none is fatal: the pool reconnects lazily once Postgres is reachable
+    started_at = datetime.now()
+    try:
+        db_pool.warm()
+    except Exception as e:
+        logging.warning(f"Could not pre-open database connections: {e}")
+    try:
+        rollup.ensure_ready()
+    except Exception as e:
+        logging.warning(f"Could not prepare the benchmark rollup: {e}")
+    if resource_governor is not None:
+        try:
+            resource_governor.load(job_store)
+        except Exception as e:
+            logging.warning(f"Could not load recorded job memory peaks: {e}")
+    if not mark_previous_jobs_interrupted(started_at):
+        # Otherwise clients polling /jobs/<id> would see those jobs as running forever
+        threading.Thread(
+            target=_retry_mark_interrupted, args=(started_at,), name="mark-interrupted", daemon=True
+        ).start()
+
+
+def mark_previous_jobs_interrupted(started_at):
+    """Flag jobs a previous process left queued/running; False if the registry is unreachable"""
+    try:
+        interrupted = job_store.mark_interrupted(started_at)
+    except Exception as e:
+        logging.warning(f"Could not mark jobs from a previous run as interrupted, will retry: {e}")
+        return False
+    if interrupted:
+        logging.warning(f"Marked {interrupted} job(s) from a previous run as interrupted")
+    return True
+
+
+def _retry_mark_interrupted(started_at, interval=10):
+    while True:
+        time.sleep(interval)
+        if mark_previous_jobs_interrupted(started_at):
+            return
+
+
+def shutdown(signum=None, frame=None):
+    """Graceful stop: refuse new jobs, drain running ones, release DB connections"""
+    logging.info(f"Shutting down (signal {signum}), giving running jobs {SHUTDOWN_GRACE}s")
+    interrupted, stopped = scheduler.shutdown(SHUTDOWN_GRACE)
+    logging.info(f"Shutdown: {interrupted} queued job(s) interrupted, {stopped} running job(s) stopped")
+    if warm_workers is not None:
+        warm_workers.close()
+    db_pool.close_all()
+    sys.exit(0)
+
+
+def serve(dev=False):
+    """Run the server: waitress in production, Flask's dev server with --dev"""
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    if not dev:
+        try:
+            from waitress import serve as waitress_serve
+        except ImportError:
+            logging.warning("waitress is not installed; falling back to the Flask development server")
+        else:
+            logging.info(f"Serving on {SERVER_HOST}:{SERVER_PORT} with {SERVER_THREADS} threads (waitress)")
+            waitress_serve(app, host=SERVER_HOST, port=SERVER_PORT, threads=SERVER_THREADS, ident="ai-labs-trigger")
+            return
+    app.run(host=SERVER_HOST, port=SERVER_PORT, debug=False, threaded=True)
+
+
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="AI Labs benchmark trigger server")
+    parser.add_argument('--dev', action='store_true', help="use the Flask development server")
+    args = parser.parse_args()
+    
     # Verify paths exist
     if not BENCHMARK_SCRIPT_PATH.exists():
         logging.error(f"Benchmark script not found: {BENCHMARK_SCRIPT_PATH}")
         exit(1)
-    
+        
     if not WORKING_DIR.exists():
         logging.error(f"Working directory not found: {WORKING_DIR}")
         exit(1)
     
-    logging.info(f"Starting AI Labs Trigger Server")
-    logging.info(f"Benchmark script: {BENCHMARK_SCRIPT_PATH}")
-    logging.info(f"Working directory: {WORKING_DIR}")
+    if warm_workers is not None and not WORKER_SCRIPT_PATH.exists():
+        logging.error(f"Warm worker script not found: {WORKER_SCRIPT_PATH}")
+        exit(1)
     
-    app.run(host='0.0.0.0', port=5000, debug=False)
+    startup()
+    serve(dev=args.dev)